@@ -0,0 +1,201 @@
+import argparse             # command line interface
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # whole-array depth profiles
+
+from grid import build_grid, grid_blocks, read_blocks, write_grid
+from reader import load_params
+
+### bathymetry.py project structure:
+# Depth profiles, each one is a function of broadcastable x, y arrays
+# profile_from_params(), the FLAT/SLOPE profile of an InputParams
+# depth_blocks(), row blocks of the depth of an InputParams, computed or read
+# write_depth(), writes DEPTH_FILE for DEPTH_TYPE = DATA
+# Command line interface, see `python bathymetry.py -h`
+#
+# Depth is positive below still water, as FUNWAVE expects. Profiles add up,
+# Flat and Slope give the base depth and the features (BarTrough,
+# GaussianShoal) give a change of depth, e.g.
+# |   from bathymetry import Composite, Slope, BarTrough, write_depth
+# |
+# |   profile = Composite(Slope(10.0, 0.05, 400.0), BarTrough(500.0, 1.5, 20.0))
+# |   write_depth("depth.txt", profile, mglob = 1024, nglob = 512, dx = 1.0, dy = 1.0)
+
+###############################
+#### Depth Profiles
+class Flat:
+    '''Flat Class.
+    Constant depth, DEPTH_TYPE = FLAT
+
+    Args:
+        depth: still water depth (m)
+    '''
+    def __init__(self, depth) -> None:
+        self.depth = depth
+    def __call__(self, x, y):
+        return np.full(np.broadcast_shapes(np.shape(x), np.shape(y)), self.depth, dtype = np.float64)
+
+class Slope:
+    '''Slope Class.
+    Flat offshore and shoaling with a constant slope from Xslp on,
+    the profile of DEPTH_TYPE = SLOPE. Goes negative (dry land) past
+    x = xslope + depth / slope.
+
+    Args:
+        depth: offshore depth (m), DEPTH_FLAT
+        slope: beach slope, SLP
+        xslope: x where the slope starts (m), Xslp
+    '''
+    def __init__(self, depth, slope, xslope) -> None:
+        self.depth = depth
+        self.slope = slope
+        self.xslope = xslope
+    def __call__(self, x, y):
+        h = self.depth - self.slope * np.maximum(x - self.xslope, 0.0)
+        return np.broadcast_to(h, np.broadcast_shapes(np.shape(x), np.shape(y)))
+
+class BarTrough:
+    '''BarTrough Class.
+    Alongshore uniform sand bar with a trough on its shoreward side,
+    both Gaussian in x. Gives a change of depth, add it to a base
+    profile with Composite.
+
+    Args:
+        xbar: x of the bar crest (m)
+        height: bar height above the base profile (m)
+        width: e-folding half width of the bar (m)
+        trough: trough depth below the base profile (m), default height / 2
+        offset: distance from the crest to the trough (m), default 2 * width
+    '''
+    def __init__(self, xbar, height, width, trough = None, offset = None) -> None:
+        self.xbar = xbar
+        self.height = height
+        self.width = width
+        self.trough = height / 2 if trough is None else trough
+        self.offset = 2 * width if offset is None else offset
+    def __call__(self, x, y):
+        bar = np.exp(-((x - self.xbar) / self.width) ** 2)
+        trough = np.exp(-((x - self.xbar - self.offset) / self.width) ** 2)
+        h = self.trough * trough - self.height * bar
+        return np.broadcast_to(h, np.broadcast_shapes(np.shape(x), np.shape(y)))
+
+class GaussianShoal:
+    '''GaussianShoal Class.
+    Elliptic Gaussian shoal, gives a change of depth, add it to a base
+    profile with Composite.
+
+    Args:
+        xc, yc: center of the shoal (m)
+        height: shoal height above the base profile (m)
+        rx, ry: e-folding radii in x and y (m), ry defaults to rx
+    '''
+    def __init__(self, xc, yc, height, rx, ry = None) -> None:
+        self.xc = xc
+        self.yc = yc
+        self.height = height
+        self.rx = rx
+        self.ry = rx if ry is None else ry
+    def __call__(self, x, y):
+        return -self.height * np.exp(-((x - self.xc) / self.rx) ** 2 - ((y - self.yc) / self.ry) ** 2)
+
+class Composite:
+    '''Composite Class.
+    Sum of profiles, usually one base profile (Flat or Slope) and any
+    number of features
+
+    Args:
+        *parts: profiles to add up
+    '''
+    def __init__(self, *parts) -> None:
+        self.parts = parts
+    def __call__(self, x, y):
+        h = np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y)), dtype = np.float64)
+        for part in self.parts:
+            h += part(x, y)
+        return h
+
+###############################
+### Helper Functions
+def profile_from_params(p):
+    '''
+    This function returns the Flat or Slope profile described by the
+    depth section of InputParams p
+    '''
+    if "SLOPE" in p.depth_type:
+        return Slope(p.depth_flat, p.slope, p.xslope)
+    return Flat(p.depth_flat)
+
+def depth_blocks(p, root = ".", rows = None):
+    '''
+    This function yields (j0, depth) row blocks of InputParams p, computed
+    from its FLAT/SLOPE profile or streamed from its DEPTH_FILE (relative
+    to root)
+    '''
+    if "FLAT" in p.depth_type or "SLOPE" in p.depth_type:
+        return grid_blocks(profile_from_params(p), p.mglob, p.nglob, p.dx, p.dy, rows)
+    path = p.depth_file if os.path.isabs(p.depth_file) else os.path.join(root, p.depth_file)
+    return read_blocks(path, p.mglob)
+
+def build_depth(profile, mglob, nglob, dx = 1.0, dy = 1.0):
+    '''
+    This function returns the (nglob, mglob) depth array of profile
+    '''
+    return build_grid(profile, mglob, nglob, dx, dy)
+
+def write_depth(path, profile, mglob, nglob, dx = 1.0, dy = 1.0, fmt = "%.4f", rows = None):
+    '''
+    This function writes the depth of profile on an mglob x nglob grid to
+    path in FUNWAVE's DEPTH_FILE layout, a block of rows at a time.
+    Returns path
+    '''
+    return write_grid(path, profile, mglob, nglob, dx, dy, fmt = fmt, rows = rows)
+
+###############################
+### Command Line Interface
+def parse_numbers(text):
+    return [float(v) for v in text.split(",")]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write a FUNWAVE-TVD DEPTH_FILE")
+    parser.add_argument("path", help = "depth file to write")
+    parser.add_argument("--input", help = "input.txt giving the grid and the FLAT/SLOPE base profile")
+    parser.add_argument("--mglob", type = int)
+    parser.add_argument("--nglob", type = int)
+    parser.add_argument("--dx", type = float)
+    parser.add_argument("--dy", type = float)
+    parser.add_argument("--flat", type = float, metavar = "DEPTH", help = "flat base profile")
+    parser.add_argument("--slope", type = parse_numbers, metavar = "DEPTH,SLP,XSLP",
+                        help = "sloping base profile")
+    parser.add_argument("--bar", type = parse_numbers, action = "append", default = [],
+                        metavar = "XBAR,HEIGHT,WIDTH[,TROUGH[,OFFSET]]", help = "add a bar and trough")
+    parser.add_argument("--shoal", type = parse_numbers, action = "append", default = [],
+                        metavar = "XC,YC,HEIGHT,RX[,RY]", help = "add a Gaussian shoal")
+    parser.add_argument("--fmt", default = "%.4f")
+    args = parser.parse_args(argv)
+    p = load_params(args.input) if args.input else None
+    mglob = args.mglob if args.mglob is not None else (p.mglob if p else 0)
+    nglob = args.nglob if args.nglob is not None else (p.nglob if p else 0)
+    dx = args.dx if args.dx is not None else (p.dx if p else 1.0)
+    dy = args.dy if args.dy is not None else (p.dy if p else 1.0)
+    if mglob <= 0 or nglob <= 0:
+        parser.error("grid size unknown, pass --input or --mglob and --nglob")
+    if args.slope:
+        base = Slope(*args.slope)
+    elif args.flat is not None:
+        base = Flat(args.flat)
+    elif p:
+        base = profile_from_params(p)
+    else:
+        parser.error("no base profile, pass --input, --flat or --slope")
+    profile = Composite(base, *[BarTrough(*v) for v in args.bar],
+                        *[GaussianShoal(*v) for v in args.shoal])
+    start = time.perf_counter()
+    write_depth(args.path, profile, mglob, nglob, dx, dy, fmt = args.fmt)
+    print(f"Wrote {mglob}x{nglob} depth to {args.path} in {time.perf_counter() - start:.2f} s",
+          file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
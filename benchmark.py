@@ -0,0 +1,249 @@
+import argparse             # command line interface
+import json                 # baseline files
+import os                   # help with PATH
+import platform
+import re
+import subprocess           # GUI cold start in a fresh interpreter
+import sys
+import tempfile
+import time
+
+from model import InputParams
+from writer import render, render_cached, write_input, write_input_cached
+from reader import load_params, parse_text
+from cache import CaseCache
+
+### benchmark.py project structure:
+# Helper Functions for timing
+# Benchmarks, each yields (metric, seconds) pairs, lower is better
+#   - generate: input.txt rendering and writing per case
+#   - parse: input.txt parsing per file
+#   - uniquify: main.uniquify() as a directory fills up, and CaseCache
+#   - bathymetry / initial: DEPTH_FILE and ETA/U/V_FILE for N x N grids
+#   - validation: quick checks, incremental revalidation and grid scan
+#   - dispersion: finite depth wavelength of a million (period, depth) pairs
+#   - startup: GUI cold start to first paint (needs a display)
+# Baselines, metrics saved as JSON and compared against a later run
+# Command line interface, see `python benchmark.py -h`
+#
+# Example use case:
+# |   python benchmark.py --save baseline.json
+# |   ... change something ...
+# |   python benchmark.py --compare baseline.json --threshold 0.2
+# exits with 1 when a metric got more than 20% slower than the baseline
+
+SIZES = (500, 1000, 2000, 5000)     # grid sizes of the grid builders
+THRESHOLD = 0.2                     # relative slowdown flagged as regression
+
+###############################
+### Helper Functions
+def best_of(func, repeat = 5, number = 1):
+    '''
+    This function returns the best time in seconds of one call of func,
+    taken over repeat rounds of number calls
+    '''
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def sample_params(i = 0):
+    '''
+    This function returns a WK_REG case varied by i, so consecutive cases
+    differ like the cases of a sweep
+    '''
+    return InputParams(title = f"bench_{i}", mglob = 500, nglob = 100, px = 4, py = 1,
+                       wavemaker = "WK_REG", tperiod = 8.0 + i % 7, amp_wk = 0.5,
+                       dep_wk = 10.0, xc_wk = 50.0, yc_wk = 50.0, ywidth_wk = 100.0,
+                       outputs = ("ETA", "U", "V"))
+
+###############################
+### Benchmarks
+def bench_generate(work, cases = 2000, **kwargs):
+    params = [sample_params(i) for i in range(cases)]
+    yield "generate.render", best_of(lambda: [render(p) for p in params], 3) / cases
+    yield "generate.render_cached", best_of(lambda: [render_cached(p) for p in params], 3) / cases
+    out = os.path.join(work, "generate")
+    os.makedirs(out, exist_ok = True)
+    def write():
+        for i, p in enumerate(params):
+            write_input(p, os.path.join(out, f"input_{i}.txt"))
+    yield "generate.write_input", best_of(write, 3) / cases
+    out_cached = os.path.join(work, "generate_cached")
+    os.makedirs(out_cached, exist_ok = True)
+    def write_cached():
+        for i, p in enumerate(params):
+            write_input_cached(p, os.path.join(out_cached, f"input_{i}.txt"))
+    yield "generate.write_input_cached", best_of(write_cached, 3) / cases
+
+def bench_parse(work, cases = 2000, **kwargs):
+    texts = [render(sample_params(i)) for i in range(cases)]
+    yield "parse.parse_text", best_of(lambda: [parse_text(t) for t in texts], 3) / cases
+    out = os.path.join(work, "parse")
+    os.makedirs(out, exist_ok = True)
+    paths = []
+    for i, text in enumerate(texts):
+        paths.append(os.path.join(out, f"input_{i}.txt"))
+        with open(paths[-1], "w") as f:
+            f.write(text)
+    yield "parse.load_params", best_of(lambda: [load_params(path) for path in paths], 3) / cases
+
+def bench_uniquify(work, fills = (10, 100, 1000), **kwargs):
+    from main import uniquify       # imports tkinter, the GUI itself does not start
+    for fill in fills:
+        out = os.path.join(work, f"uniquify_{fill}")
+        os.makedirs(out, exist_ok = True)
+        path = os.path.join(out, "input.txt")
+        open(path, "w").close()
+        for k in range(1, fill):
+            open(os.path.join(out, f"input({k}).txt"), "w").close()
+        yield f"uniquify.fill_{fill}", best_of(lambda: uniquify(path), 3, 10)
+    cache = CaseCache(os.path.join(work, "cache"))
+    params = [sample_params(i) for i in range(max(fills))]
+    for p in params:
+        cache.write(p)
+    yield "uniquify.case_cache_hit", best_of(lambda: cache.write(params[-1]), 3, 100)
+
+def bench_bathymetry(work, sizes = SIZES, **kwargs):
+    from bathymetry import BarTrough, Composite, Slope, write_depth
+    profile = Composite(Slope(10.0, 0.05, 400.0), BarTrough(500.0, 1.5, 20.0))
+    for n in sizes:
+        path = os.path.join(work, f"depth_{n}.txt")
+        yield f"bathymetry.write_depth_{n}", best_of(lambda: write_depth(path, profile, n, n), 1)
+        os.remove(path)
+
+def bench_initial(work, sizes = SIZES, **kwargs):
+    from initial import GaussianHump, write_fields
+    for n in sizes:
+        field = GaussianHump(n / 2, n / 2, 1.0, n / 10)
+        path = os.path.join(work, f"eta_{n}.txt")
+        yield f"initial.write_eta_{n}", best_of(lambda: write_fields(field, n, n, eta_path = path), 1)
+        os.remove(path)
+
+def bench_validation(work, sizes = SIZES, **kwargs):
+    import validation
+    from bathymetry import Slope, write_depth
+    from grid import scan_grid
+    p = sample_params()
+    settings = {"root": work}
+    yield "validation.quick", best_of(lambda: validation.Validator().run(p, settings, expensive = False), 5, 100)
+    validator = validation.Validator()
+    validator.run(p, settings)
+    changed = [p.replace(tperiod = 8.0 + i % 7) for i in range(100)]
+    yield "validation.incremental", best_of(lambda: [validator.run(q, settings) for q in changed], 3) / len(changed)
+    n = min(sizes)
+    path = write_depth(os.path.join(work, "depth.txt"), Slope(10.0, 0.05, 400.0), n, n)
+    yield f"validation.scan_{n}", best_of(lambda: scan_grid(path, n, p.min_depth), 3)
+
+def bench_dispersion(work, pairs = 1000000, **kwargs):
+    import numpy as np
+    from dispersion import wavelength
+    rng = np.random.default_rng(0)
+    period = rng.uniform(1.0, 25.0, pairs)
+    depth = rng.uniform(0.1, 4000.0, pairs)
+    yield "dispersion.wavelength_1e6", best_of(lambda: wavelength(period, depth), 3)
+
+def bench_startup(work, **kwargs):
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    def run():
+        out = subprocess.run([sys.executable, main_py, "--exit-after-startup"], cwd = work,
+                             capture_output = True, text = True, timeout = 60)
+        found = re.search(r"Startup: ([0-9.]+) s", out.stdout)
+        if out.returncode != 0 or not found:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no startup time")
+        return float(found.group(1))
+    yield "startup.first_paint", min(run() for _ in range(3))
+
+BENCHMARKS = {
+    "generate": bench_generate,
+    "parse": bench_parse,
+    "uniquify": bench_uniquify,
+    "bathymetry": bench_bathymetry,
+    "initial": bench_initial,
+    "validation": bench_validation,
+    "dispersion": bench_dispersion,
+    "startup": bench_startup,
+}
+
+def run_benchmarks(names = None, sizes = SIZES, log = print):
+    '''
+    This function runs the named benchmarks (default all) in a temporary
+    directory and returns {metric: seconds}. A benchmark that fails (e.g.
+    no display for startup, numpy missing) is reported to log and skipped
+    '''
+    metrics = {}
+    with tempfile.TemporaryDirectory() as work:
+        for name in names or BENCHMARKS:
+            try:
+                for metric, seconds in BENCHMARKS[name](work, sizes = sizes):
+                    metrics[metric] = seconds
+                    log(f"{metric:32s} {format_seconds(seconds)}")
+            except (ImportError, OSError, RuntimeError, subprocess.SubprocessError) as e:
+                log(f"{name:32s} skipped: {e}")
+    return metrics
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:9.3f} {unit}"
+    return f"{seconds / 1e-9:9.3f} ns"
+
+###############################
+### Baselines
+def save_baseline(path, metrics):
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                   "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "metrics": metrics},
+                  f, indent = 1, sort_keys = True)
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)["metrics"]
+
+def compare(metrics, baseline, threshold = THRESHOLD):
+    '''
+    This function returns [(metric, old, new, change)] for the metrics in
+    both runs, change is the relative slowdown (0.25 is 25% slower), and
+    the list of regressions, the rows with change above threshold
+    '''
+    rows = []
+    for metric in sorted(set(metrics) & set(baseline)):
+        old, new = baseline[metric], metrics[metric]
+        rows.append((metric, old, new, new / old - 1 if old > 0 else 0.0))
+    return rows, [row for row in rows if row[3] > threshold]
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark generation, parsing, grid builders, validation and GUI startup")
+    parser.add_argument("names", nargs = "*",
+                        help = f"benchmarks to run, default all of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--sizes", default = ",".join(map(str, SIZES)),
+                        help = "grid sizes N (N x N) of the grid builders, comma separated")
+    parser.add_argument("--save", help = "write the metrics to this baseline file")
+    parser.add_argument("--compare", help = "compare the metrics against this baseline file")
+    parser.add_argument("--threshold", type = float, default = THRESHOLD,
+                        help = "relative slowdown reported as regression")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name}")
+    sizes = tuple(int(n) for n in args.sizes.split(","))
+    metrics = run_benchmarks(args.names, sizes)
+    if args.save:
+        save_baseline(args.save, metrics)
+        print(f"Saved {len(metrics)} metrics to {args.save}")
+    if args.compare:
+        rows, regressions = compare(metrics, load_baseline(args.compare), args.threshold)
+        for metric, old, new, change in rows:
+            flag = "  REGRESSION" if change > args.threshold else ""
+            print(f"{metric:32s} {format_seconds(old)} -> {format_seconds(new)} {change:+7.1%}{flag}")
+        print(f"{len(regressions)} of {len(rows)} metrics slower than {args.threshold:.0%} over the baseline")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import hashlib              # content hashes of parameter sets
+import json
+import os                   # help with PATH
+
+from model import InputParams
+from writer import write_input_cached
+
+### cache.py project structure:
+# params_hash(), canonical hash of a full InputParams
+# CaseCache, content-addressed directory of generated inputs
+#
+# Example use case:
+# |   from cache import CaseCache
+# |
+# |   cache = CaseCache("cases")                # index in cases/cache_index.jsonl
+# |   path, created = cache.write(p)            # cases/input_<hash>.txt
+# |   path, created = cache.write(p)            # same path, created is False
+
+HASH_LENGTH = 16    # hex digits of the sha256 kept in file names
+INDEX_NAME = "cache_index.jsonl"
+
+###############################
+### Helper Functions
+def canonical(p):
+    '''
+    This function returns the canonical text of InputParams p, equal
+    parameter sets always give equal text
+    '''
+    return json.dumps(p.to_dict(), sort_keys = True, separators = (",", ":"))
+
+def params_hash(p):
+    '''
+    This function returns the content hash of InputParams p
+    '''
+    return hashlib.sha256(canonical(p).encode()).hexdigest()[:HASH_LENGTH]
+
+###############################
+#### Cache
+class CaseCache:
+    '''CaseCache Class.
+    Directory of inputs named by the hash of their parameters, so writing
+    a case costs one os.path.exists() and an identical case is never
+    written twice. An append-only index maps every hash to its parameters.
+
+    Args:
+        directory: directory holding the cases and the index
+        pattern: path of a case relative to directory, {hash} is replaced
+                 by params_hash(), e.g. "{hash}/input.txt" for sweeps
+    Methods:
+        path(): returns the path p is (or would be) written to
+        write(): writes p unless cached, returns (path, created)
+        lookup(): returns the InputParams stored under a hash, or None
+    '''
+    def __init__(self, directory, pattern = "input_{hash}.txt") -> None:
+        self.directory = directory
+        self.pattern = pattern
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._index = None
+        self._recorded = set()      # hashes appended by this CaseCache
+        os.makedirs(directory, exist_ok = True)
+    def relpath(self, h):
+        return self.pattern.format(hash = h)
+    def path(self, p):
+        return os.path.join(self.directory, self.relpath(params_hash(p)))
+    def write(self, p):
+        h = params_hash(p)
+        path = os.path.join(self.directory, self.relpath(h))
+        if os.path.exists(path):
+            return path, False
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        write_input_cached(p, path)
+        self.record([(h, p)])
+        return path, True
+    def record(self, entries):
+        '''
+        Appends (hash, InputParams) entries to the index, used directly by
+        writers that create the files themselves (see sweep.py). Hashes
+        already appended by this CaseCache, or twice in entries, are
+        appended once. Returns the entries appended
+        '''
+        fresh = {}
+        for h, p in entries:
+            if h not in self._recorded and h not in fresh:
+                fresh[h] = p
+        if not fresh:
+            return []
+        self._recorded.update(fresh)
+        entries = list(fresh.items())
+        with open(self.index_path, "a") as f:
+            f.write("".join(json.dumps({"hash": h, "path": self.relpath(h), "params": p.to_dict()}) + "\n"
+                            for h, p in entries))
+        if self._index is not None:
+            for h, p in entries:
+                self._index[h] = p.to_dict()
+        return entries
+    def index(self):
+        '''
+        Returns the index as a dict of hash -> parameter dict, read once
+        '''
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._index[entry["hash"]] = entry["params"]
+        return self._index
+    def lookup(self, h):
+        d = self.index().get(h)
+        return InputParams.from_dict(d) if d is not None else None
+    def __contains__(self, p):
+        return os.path.exists(self.path(p))
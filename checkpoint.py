@@ -0,0 +1,144 @@
+import math
+
+from decomposition import NGHOST
+from output_volume import VALUE_BYTES, human_bytes
+
+### checkpoint.py project structure:
+# Helper Functions for the size and write time of one hot start checkpoint
+# daly_interval()/expected_wall(), Young/Daly optimum checkpoint interval
+#   and the expected wall time of a run that can fail
+# CheckpointPlan/plan_checkpoints(), recommended HOTSTART_INTV of an
+#   InputParams and the overhead of the interval it has
+#
+# Intervals here are wall seconds, HOTSTART_INTV counts simulated seconds.
+# The plan converts with the simulated/wall time ratio of the run estimate
+# (see estimate.estimate_run()).
+
+# fields of one hot start checkpoint, every rank writes its subdomain with
+# ghost cells in binary
+HOTSTART_FIELDS = ("Eta", "U", "V", "HU", "HV", "P", "Q", "Mask", "Mask9", "Depth")
+NODE_MTBF_HOURS = 50000.0       # mean time between failures of one node
+BANDWIDTH = 1.0e9               # filesystem write rate for checkpoints (bytes/s)
+FILE_LATENCY = 0.01             # seconds to create one file
+
+###############################
+### Helper Functions
+def checkpoint_bytes(p, ghost = NGHOST):
+    '''
+    This function returns the bytes of one hot start checkpoint of
+    InputParams p, every field of all PX x PY subdomains with their
+    ghost cells
+    '''
+    px, py = max(1, p.px), max(1, p.py)
+    cells = (p.mglob + 2 * ghost * px) * (p.nglob + 2 * ghost * py)
+    return len(HOTSTART_FIELDS) * cells * VALUE_BYTES["BINARY"]
+
+def checkpoint_seconds(p, bandwidth = BANDWIDTH, file_latency = FILE_LATENCY):
+    '''
+    This function returns the wall seconds to write one checkpoint of
+    InputParams p, one file per field and rank
+    '''
+    files = len(HOTSTART_FIELDS) * max(1, p.px) * max(1, p.py)
+    return checkpoint_bytes(p) / bandwidth + files * file_latency
+
+def system_mtbf(ranks, cores_per_node = None, node_mtbf_hours = NODE_MTBF_HOURS):
+    '''
+    This function returns the mean time between failures (s) of a run on
+    ranks cores, any failing node stops the run
+    '''
+    nodes = math.ceil(ranks / cores_per_node) if cores_per_node else ranks
+    return node_mtbf_hours * 3600.0 / max(1, nodes)
+
+###############################
+#### Young/Daly
+def daly_interval(cost, mtbf):
+    '''
+    This function returns the compute time (s) between checkpoints that
+    minimizes the expected wall time, Daly's higher order estimate of the
+    optimum for checkpoint cost and mean time between failures mtbf
+    (Young's sqrt(2 C M) to first order)
+    '''
+    if cost <= 0:
+        return 0.0
+    if cost >= 2.0 * mtbf:
+        return mtbf
+    ratio = cost / (2.0 * mtbf)
+    return math.sqrt(2.0 * cost * mtbf) * (1.0 + math.sqrt(ratio) / 3.0 + ratio / 9.0) - cost
+
+def expected_wall(seconds, interval, cost, mtbf, restart = None):
+    '''
+    This function returns the expected wall time of seconds of failure
+    free work checkpointed every interval seconds of work, with failures
+    at exponentially distributed times (Daly's model). restart is the time
+    to read a checkpoint back, it defaults to cost. Without checkpoints
+    (interval 0 or above seconds) a failure restarts the whole run.
+    '''
+    restart = cost if restart is None else restart
+    if seconds <= 0:
+        return 0.0
+    if interval <= 0 or interval >= seconds:
+        interval, cost, segments = seconds, 0.0, 1.0
+    else:
+        segments = seconds / interval
+    exponent = (interval + cost) / mtbf
+    if exponent > 700:         # beyond float range, the run never finishes
+        return math.inf
+    return mtbf * math.exp(restart / mtbf) * math.expm1(exponent) * segments
+
+###############################
+#### Plan
+class CheckpointPlan:
+    '''CheckpointPlan Class.
+    Result of plan_checkpoints()
+
+    Attributes:
+        bytes: size of one checkpoint
+        cost: wall seconds to write one checkpoint
+        mtbf: mean time between failures of the run (s)
+        wall: predicted failure free wall time (s)
+        interval: recommended wall seconds between checkpoints
+        hotstart_intv: the recommended interval in simulated seconds
+        overhead: expected extra wall time with the recommendation, as a
+                  fraction of wall
+        current: expected overhead of the HOTSTART_INTV of the input,
+                 None without hot start
+        none: expected overhead without any checkpoint
+    '''
+    def __init__(self, bytes, cost, mtbf, wall, interval, hotstart_intv, overhead, current, none) -> None:
+        self.bytes = bytes
+        self.cost = cost
+        self.mtbf = mtbf
+        self.wall = wall
+        self.interval = interval
+        self.hotstart_intv = hotstart_intv
+        self.overhead = overhead
+        self.current = current
+        self.none = none
+    def __repr__(self):
+        return (f"checkpoint {human_bytes(self.bytes)} in {self.cost:.1f} s, "
+                f"HOTSTART_INTV = {self.hotstart_intv:.4g} s ({self.interval / 60.0:.0f} min wall), "
+                f"{self.overhead:.2%} expected overhead")
+
+def plan_checkpoints(p, wall, cores_per_node = None, node_mtbf_hours = NODE_MTBF_HOURS,
+                     bandwidth = BANDWIDTH):
+    '''
+    This function plans the hot start checkpoints of InputParams p for a
+    failure free wall time of wall seconds (see estimate.estimate_run()).
+    Returns a CheckpointPlan, or None without a run to plan
+    '''
+    if wall is None or wall <= 0 or p.total_time <= 0:
+        return None
+    cost = checkpoint_seconds(p, bandwidth)
+    mtbf = system_mtbf(max(1, p.px) * max(1, p.py), cores_per_node, node_mtbf_hours)
+    interval = min(daly_interval(cost, mtbf), wall)
+    sim_per_wall = p.total_time / wall
+
+    def overhead(work_interval):
+        expected = expected_wall(wall, work_interval, cost, mtbf)
+        return expected / wall - 1.0
+
+    current = None
+    if p.hot_start:
+        current = overhead(p.hotstart_intv / sim_per_wall if p.hotstart_intv > 0 else 0.0)
+    return CheckpointPlan(checkpoint_bytes(p), cost, mtbf, wall, interval, interval * sim_per_wall,
+                          overhead(interval), current, overhead(0.0))
@@ -0,0 +1,241 @@
+import argparse             # command line interface
+import concurrent.futures   # process pool for directories of inputs
+import json                 # saved index
+import os                   # help with PATH
+import sys
+import time
+
+from model import FIELDS, OUTPUT_FIELDS, attr_name, coerce, logical
+from reader import list_inputs, parse_file
+
+### compare.py project structure:
+# canonical(), the KEY = VALUE pairs of one input file in a canonical form
+# CompareIndex/build_index(), groups of identical inputs and, for every key,
+#   the groups holding each of its values
+# Command line interface, see `python compare.py -h`
+#
+# Example use case:
+# |   python compare.py runs/ --pattern "input*.txt"
+# lists the keys whose values differ between input.txt, input(1).txt, ...
+# and the groups of files that are the same case, and
+# |   python compare.py runs/ --diff runs/input(3).txt runs/input(7).txt
+# shows the keys two of them differ in.
+#
+# Two files are the same case when they set the same keys to the same
+# values: comments, blank lines, spacing, key order, the case of keys
+# and the spelling of numbers (1.0, 1.000000) and logicals (T, TRUE) do
+# not matter. Files are parsed once, in a process pool, and every
+# comparison works on the canonical forms, never on the text.
+
+MISSING = "<missing>"       # value of a key a file does not set
+
+###############################
+### Helper Functions
+def canonical_pair(key, value):
+    '''
+    This function returns (key, value) in canonical form: known keys as
+    FUNWAVE spells them and values converted to their type and written
+    back (floats with repr()), unknown keys with spacing collapsed
+    '''
+    if key in OUTPUT_FIELDS:
+        return key, "T" if logical(value) else "F"
+    try:
+        name = attr_name(key)
+    except KeyError:
+        return key, " ".join(value.split())
+    key = FIELDS[name].metadata["key"]
+    try:
+        value = coerce(name, value)
+    except ValueError:
+        return key, " ".join(value.split())
+    if isinstance(value, bool):
+        return key, "T" if value else "F"
+    if isinstance(value, float):
+        return key, repr(value)
+    if isinstance(value, tuple):
+        return key, " ".join(value)
+    return key, str(value)
+
+def canonical(path):
+    '''
+    This function returns the canonical form of the input file at path,
+    its (key, value) pairs sorted by key, a key set twice keeps the last
+    value as FUNWAVE does
+    '''
+    values = dict(canonical_pair(k, v) for k, v in parse_file(path).values.items())
+    return tuple(sorted(values.items()))
+
+def _canonical_chunk(paths):
+    out = []
+    for path in paths:
+        try:
+            out.append((path, canonical(path)))
+        except OSError as e:
+            out.append((path, None))
+            print(f"{path}: {e}", file = sys.stderr)
+    return out
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+###############################
+#### Index
+class CompareIndex:
+    '''CompareIndex Class.
+    Result of build_index(), every file is in exactly one group of
+    identical inputs
+
+    Args:
+        forms: {path: canonical form} of every file
+    Attributes:
+        paths: the files, sorted
+        groups: lists of paths with the same canonical form, largest first
+        group_of: {path: group number}
+        keys: {key: {value: [group numbers]}}, MISSING for groups that do
+              not set the key
+    Methods:
+        varying(): the keys whose value is not the same in every group
+        diff(): the keys two files differ in
+        to_json(): the whole report as a dict
+    '''
+    def __init__(self, forms) -> None:
+        self.forms = forms
+        self.paths = sorted(forms)
+        by_form = {}
+        for path in self.paths:
+            by_form.setdefault(forms[path], []).append(path)
+        self.groups = sorted(by_form.values(), key = lambda g: (-len(g), g[0]))
+        self.group_forms = [dict(forms[g[0]]) for g in self.groups]
+        self.group_of = {path: n for n, g in enumerate(self.groups) for path in g}
+        all_keys = set().union(*self.group_forms) if self.group_forms else set()
+        self.keys = {}
+        for key in sorted(all_keys):
+            values = {}
+            for n, form in enumerate(self.group_forms):
+                values.setdefault(form.get(key, MISSING), []).append(n)
+            self.keys[key] = values
+    def files(self, groups):
+        return sum(len(self.groups[n]) for n in groups)
+    def varying(self):
+        return [key for key, values in self.keys.items() if len(values) > 1]
+    def value_counts(self, key):
+        '''
+        Returns [(value, number of files)] of key, most common first
+        '''
+        counts = [(value, self.files(groups)) for value, groups in self.keys[key].items()]
+        return sorted(counts, key = lambda c: (-c[1], c[0]))
+    def diff(self, a, b):
+        '''
+        Returns [(key, value in a, value in b)] of every key the files a
+        and b differ in, MISSING where one does not set the key
+        '''
+        fa = self.group_forms[self.group_of[a]]
+        fb = self.group_forms[self.group_of[b]]
+        return [(key, fa.get(key, MISSING), fb.get(key, MISSING))
+                for key in sorted(set(fa) | set(fb)) if fa.get(key, MISSING) != fb.get(key, MISSING)]
+    def to_json(self):
+        return {"files": len(self.paths),
+                "groups": self.groups,
+                "varying": {key: dict(self.value_counts(key)) for key in self.varying()}}
+    def __repr__(self):
+        return f"{len(self.paths)} files, {len(self.groups)} distinct cases, {len(self.varying())} keys vary"
+
+def build_index(paths, pattern = "*.txt", workers = 1, chunk_size = 256, saved = None):
+    '''
+    This function parses every input file under paths (files or
+    directories, see reader.list_inputs()) into its canonical form, on a
+    process pool of workers when workers > 1, and returns a CompareIndex.
+    saved is the path of a JSON cache of canonical forms: files whose
+    modification time and size match it are not parsed again, and it is
+    rewritten with the forms of this run. The cache keeps every distinct
+    form once, and every form as numbers of distinct (key, value) pairs
+    '''
+    files = [os.path.abspath(path) for path in list_inputs(paths, pattern)]
+    cache = {"pairs": [], "forms": [], "files": {}}
+    if saved and os.path.exists(saved):
+        with open(saved) as f:
+            cache = json.load(f)
+    pairs = [tuple(pair) for pair in cache["pairs"]]
+    pair_ids = {pair: n for n, pair in enumerate(pairs)}
+    forms = [tuple(ids) for ids in cache["forms"]]
+    form_ids = {ids: n for n, ids in enumerate(forms)}
+    stamps = {}
+    found = {}      # path -> form number
+    todo = []
+    for path in files:
+        stamps[path] = _stamp(path)
+        entry = cache["files"].get(path)
+        if entry is not None and entry[:2] == stamps[path]:
+            found[path] = entry[2]
+        else:
+            todo.append(path)
+    chunks = [todo[k:k + chunk_size] for k in range(0, len(todo), chunk_size)]
+    if workers and workers > 1 and len(chunks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+            parsed = [pair for chunk in pool.map(_canonical_chunk, chunks) for pair in chunk]
+    else:
+        parsed = [pair for chunk in chunks for pair in _canonical_chunk(chunk)]
+    for path, form in parsed:
+        if form is None:
+            continue
+        ids = tuple(pair_ids.setdefault(pair, len(pair_ids)) for pair in form)
+        found[path] = form_ids.setdefault(ids, len(form_ids))
+    if len(pair_ids) > len(pairs):
+        pairs += list(pair_ids)[len(pairs):]
+    if len(form_ids) > len(forms):
+        forms += list(form_ids)[len(forms):]
+    if saved:
+        partial = saved + ".part"
+        with open(partial, "w") as f:
+            json.dump({"pairs": pairs, "forms": forms,
+                       "files": {path: stamps[path] + [n] for path, n in found.items()}}, f)
+        os.replace(partial, saved)
+    decoded = {}
+    for n in set(found.values()):
+        decoded[n] = tuple(pairs[k] for k in forms[n])
+    return CompareIndex({path: decoded[n] for path, n in found.items()})
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare many FUNWAVE-TVD input files at once")
+    parser.add_argument("paths", nargs = "+", help = "input files or directories")
+    parser.add_argument("--pattern", default = "input*.txt", help = "file pattern inside directories")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--index", help = "JSON cache of parsed files, only changed files are parsed again")
+    parser.add_argument("--diff", nargs = 2, metavar = ("A", "B"), help = "show the keys two files differ in")
+    parser.add_argument("--values", type = int, default = 5, help = "values listed per varying key and files per group")
+    parser.add_argument("--json", action = "store_true", help = "print the report as JSON")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    index = build_index(args.paths, args.pattern, args.workers, saved = args.index)
+    elapsed = time.perf_counter() - start
+    if args.diff:
+        a, b = (os.path.abspath(path) for path in args.diff)
+        for path in (a, b):
+            if path not in index.group_of:
+                parser.error(f"{path} is not one of the files compared")
+        changes = index.diff(a, b)
+        if not changes:
+            print(f"{args.diff[0]} and {args.diff[1]} are the same case")
+        for key, va, vb in changes:
+            print(f"{key}: {va} -> {vb}")
+    elif args.json:
+        print(json.dumps(index.to_json(), indent = 1))
+    else:
+        for key in index.varying():
+            counts = index.value_counts(key)
+            shown = ", ".join(f"{value} ({n})" for value, n in counts[:args.values])
+            more = f", ... {len(counts) - args.values} more" if len(counts) > args.values else ""
+            print(f"{key}: {len(counts)} values, {shown}{more}")
+        for group in index.groups:
+            if len(group) > 1:
+                shown = " ".join(os.path.relpath(path) for path in group[:args.values])
+                more = f" ... {len(group) - args.values} more" if len(group) > args.values else ""
+                print(f"Same case ({len(group)} files): {shown}{more}")
+    print(f"{index} ({elapsed:.2f} s)", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
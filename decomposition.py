@@ -0,0 +1,152 @@
+import argparse             # command line interface
+import math
+import sys
+
+### decomposition.py project structure:
+# CostModel, predicted wall time of one time step for a PX x PY split
+# factorizations()/rank_decompositions(), candidate splits of a rank budget
+# best_decomposition(), the split with the lowest predicted time
+# Command line interface, see `python decomposition.py -h`
+#
+# Example use case:
+# |   from decomposition import best_decomposition
+# |
+# |   d = best_decomposition(500, 500, ranks = 64, cores_per_node = 32)
+# |   print(d.px, d.py, d.seconds)              # 8 8 ...
+
+NGHOST = 3          # FUNWAVE ghost cell width on every side of a subdomain
+
+###############################
+#### Cost Model
+class CostModel:
+    '''CostModel Class.
+    Predicts the wall time of one FUNWAVE time step on a PX x PY split as
+    compute time of the largest subdomain plus its halo exchanges. Every
+    constant can be calibrated against a timed run.
+
+    Args:
+        cell_cost: seconds per grid cell per time step on one core
+        exchanges: halo exchanges per time step (Runge-Kutta stages x variables)
+        latency, bandwidth: MPI message latency (s) and bandwidth (bytes/s)
+                            between ranks on the same node
+        node_latency, node_bandwidth: the same between nodes
+        ghost: ghost cell width
+    Methods:
+        step_time(): predicted seconds per time step
+    '''
+    def __init__(self, cell_cost = 2.0e-7, exchanges = 24, latency = 1.0e-6, bandwidth = 5.0e9,
+                 node_latency = 5.0e-6, node_bandwidth = 1.0e10, ghost = NGHOST) -> None:
+        self.cell_cost = cell_cost
+        self.exchanges = exchanges
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.node_latency = node_latency
+        self.node_bandwidth = node_bandwidth
+        self.ghost = ghost
+    def message_time(self, values, off_node):
+        '''
+        Seconds to send values doubles to one neighbour, off_node is the
+        fraction of such messages that leave the node
+        '''
+        size = 8.0 * values
+        on = self.latency + size / self.bandwidth
+        off = self.node_latency + size / self.node_bandwidth
+        return (1.0 - off_node) * on + off_node * off
+    def step_time(self, mglob, nglob, px, py, cores_per_node = None):
+        '''
+        Returns (compute, halo) seconds per time step. Ranks are numbered
+        with x fastest, so x neighbours are consecutive ranks and y
+        neighbours are px ranks apart; with cores_per_node given, that
+        sets how many exchanges leave the node.
+        '''
+        nx = math.ceil(mglob / px)
+        ny = math.ceil(nglob / py)
+        compute = (nx + 2 * self.ghost) * (ny + 2 * self.ghost) * self.cell_cost
+        halo = 0.0
+        if px > 1:      # two x neighbours, each sends ny rows of ghost cells
+            off = 1.0 / cores_per_node if cores_per_node else 0.0
+            halo += 2 * self.message_time(self.ghost * (ny + 2 * self.ghost), min(1.0, off))
+        if py > 1:
+            off = px / cores_per_node if cores_per_node else 0.0
+            halo += 2 * self.message_time(self.ghost * (nx + 2 * self.ghost), min(1.0, off))
+        return compute, halo * self.exchanges
+
+class Decomposition:
+    '''Decomposition Class.
+    One scored PX x PY split, see rank_decompositions()
+
+    Args:
+        px, py: processors in x and y
+        compute, halo: predicted seconds per time step
+    '''
+    def __init__(self, px, py, compute, halo) -> None:
+        self.px = px
+        self.py = py
+        self.compute = compute
+        self.halo = halo
+        self.seconds = compute + halo
+    def __repr__(self):
+        return (f"PX = {self.px}, PY = {self.py}: {self.seconds * 1e3:.3f} ms/step "
+                f"({self.halo / self.seconds:.0%} halo exchange)")
+
+###############################
+### Helper Functions
+def factorizations(ranks):
+    '''
+    This function yields every (px, py) with px * py == ranks
+    '''
+    for px in range(1, ranks + 1):
+        if ranks % px == 0:
+            yield px, ranks // px
+
+def valid(mglob, nglob, px, py, ghost = NGHOST):
+    '''
+    A split is valid when every subdomain is at least as wide as the
+    ghost cells it has to fill for its neighbours
+    '''
+    return mglob // px >= ghost and nglob // py >= ghost
+
+def rank_decompositions(mglob, nglob, ranks, cores_per_node = None, model = None):
+    '''
+    This function returns a Decomposition for every valid split of ranks,
+    fastest first
+    '''
+    model = model or CostModel()
+    out = []
+    for px, py in factorizations(ranks):
+        if valid(mglob, nglob, px, py, model.ghost):
+            out.append(Decomposition(px, py, *model.step_time(mglob, nglob, px, py, cores_per_node)))
+    out.sort(key = lambda d: (d.seconds, abs(d.px - d.py)))
+    return out
+
+def best_decomposition(mglob, nglob, ranks, cores_per_node = None, model = None):
+    '''
+    This function returns the Decomposition of ranks with the lowest
+    predicted time per step, or None if no split is valid
+    '''
+    ranked = rank_decompositions(mglob, nglob, ranks, cores_per_node, model)
+    return ranked[0] if ranked else None
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Recommend FUNWAVE-TVD PX and PY")
+    parser.add_argument("mglob", type = int)
+    parser.add_argument("nglob", type = int)
+    parser.add_argument("ranks", type = int, help = "total MPI ranks, PX * PY")
+    parser.add_argument("--cores-per-node", type = int)
+    parser.add_argument("--cell-cost", type = float, default = CostModel().cell_cost,
+                        help = "seconds per cell per time step, calibrate from a timed run")
+    parser.add_argument("--top", type = int, default = 5, help = "number of splits to list")
+    args = parser.parse_args(argv)
+    ranked = rank_decompositions(args.mglob, args.nglob, args.ranks, args.cores_per_node,
+                                 CostModel(cell_cost = args.cell_cost))
+    if not ranked:
+        print(f"No valid split of {args.ranks} ranks for a {args.mglob}x{args.nglob} grid", file = sys.stderr)
+        return 1
+    for d in ranked[:args.top]:
+        print(d)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import numpy as np          # whole-array dispersion
+
+from estimate import GRAVITY
+
+### dispersion.py project structure:
+# wavenumber()/wavelength(), linear dispersion w^2 = g k tanh(k h) solved
+#   for whole arrays of (period, depth) pairs
+# wave_period(), the period that sets the wavelength of a wavemaker
+#
+# Example use case:
+# |   from dispersion import wavelength
+# |
+# |   L = wavelength(10.0, depth)       # depth can be a whole depth grid
+#
+# The start is Guo's explicit approximation (0.75% at worst) and Newton
+# steps on f(k) = w^2 - g k tanh(k h) take it to double precision, so a
+# million pairs cost a few array passes and no Python loop.
+
+NEWTON_STEPS = 3
+KH_MAX = np.pi          # Boussinesq dispersion of FUNWAVE holds up to h = L / 2
+
+###############################
+### Dispersion
+def wavenumber(period, depth, steps = NEWTON_STEPS):
+    '''
+    This function returns the wavenumber k (rad/m) of linear waves of
+    period (s) in depth (m), both broadcastable arrays or numbers. Dry
+    cells (depth <= 0) and periods <= 0 give NaN
+    '''
+    period = np.asarray(period, dtype = np.float64)
+    depth = np.asarray(depth, dtype = np.float64)
+    valid = (period > 0) & (depth > 0)
+    with np.errstate(divide = "ignore", invalid = "ignore", over = "ignore"):
+        omega = np.where(valid, 2.0 * np.pi / period, np.nan)
+        h = np.where(valid, depth, np.nan)
+        # Guo (2002): kh = x^2 (1 - exp(-x^2.5))^-0.4 with x = w sqrt(h / g)
+        x = omega * np.sqrt(h / GRAVITY)
+        k = x * x * (-np.expm1(-x ** 2.5)) ** -0.4 / h
+        for _ in range(steps):
+            t = np.tanh(k * h)
+            f = GRAVITY * k * t - omega * omega
+            df = GRAVITY * (t + k * h * (1.0 - t * t))
+            k = k - f / df
+    return k
+
+def wavelength(period, depth, steps = NEWTON_STEPS):
+    '''
+    This function returns the wavelength 2 pi / k (m), see wavenumber()
+    '''
+    return 2.0 * np.pi / wavenumber(period, depth, steps)
+
+def wave_period(p):
+    '''
+    This function returns the period (s) that sets the wavelength of the
+    wavemaker of InputParams p, the peak period of the spectral ones, or
+    None if there is none
+    '''
+    match p.wavemaker:
+        case 'WK_REG':
+            period = p.tperiod
+        case 'WK_IRR' | 'WK_NEW_IRR' | 'JON_2D' | 'JON_1D' | 'TMA_1D':
+            period = 1.0 / p.freqpeak if p.freqpeak > 0 else 0.0
+        case 'WK_TIME_SERIES' | 'WK_DATA2D':
+            period = p.peak_period
+        case _:
+            period = 0.0
+    return period if period > 0 else None
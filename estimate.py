@@ -0,0 +1,94 @@
+import math
+
+import numpy as np          # celerity over whole depth fields
+
+from decomposition import CostModel
+
+### estimate.py project structure:
+# Helper Functions for wave celerity and the CFL-limited time step
+# RunEstimate/estimate_run(), time steps, wall time and core-hours of a run
+# calibrate_cell_cost(), fits CostModel.cell_cost to a timed run
+
+GRAVITY = 9.81
+
+###############################
+### Helper Functions
+def celerity(depth, amplitude = 0.0):
+    '''
+    This function returns the long wave celerity sqrt(g (h + a)) for a
+    depth array (or number), dry cells (h + a <= 0) have celerity 0
+    '''
+    return np.sqrt(GRAVITY * np.maximum(np.asarray(depth, dtype = np.float64) + amplitude, 0.0))
+
+def max_celerity(depth, amplitude = 0.0):
+    '''
+    This function returns the largest celerity over a depth array
+    '''
+    c = celerity(depth, amplitude)
+    return float(np.max(c)) if np.size(c) else 0.0
+
+def cfl_dt(cfl, dx, dy, cmax):
+    '''
+    This function returns the largest stable time step for celerity cmax,
+    FUNWAVE's dt = CFL * min(dx, dy) / c
+    '''
+    if cmax <= 0:
+        return math.inf
+    return cfl * min(dx, dy) / cmax
+
+###############################
+#### Run Estimate
+class RunEstimate:
+    '''RunEstimate Class.
+    Predicted cost of one FUNWAVE run, see estimate_run()
+
+    Attributes:
+        cmax: largest wave celerity (m/s)
+        dt: time step used (s), the CFL limit unless FIXED_DT is set
+        dt_cfl: CFL-limited time step (s)
+        steps: number of time steps over TOTAL_TIME
+        seconds: predicted wall time (s)
+        core_hours: seconds * PX * PY / 3600
+    '''
+    def __init__(self, cmax, dt, dt_cfl, steps, seconds, ranks) -> None:
+        self.cmax = cmax
+        self.dt = dt
+        self.dt_cfl = dt_cfl
+        self.steps = steps
+        self.seconds = seconds
+        self.core_hours = seconds * ranks / 3600.0
+    def __repr__(self):
+        return (f"dt = {self.dt:.4g} s, {self.steps} steps, "
+                f"{self.seconds / 3600.0:.2f} h wall, {self.core_hours:.1f} core-hours")
+
+def estimate_run(p, depth_max = None, model = None, cores_per_node = None):
+    '''
+    This function estimates the time step and cost of InputParams p.
+    depth_max is the deepest point of the bathymetry, it defaults to
+    DEPTH_FLAT, which is right for FLAT and SLOPE. For DATA pass the
+    maximum of the depth file (see validation.depth_range()).
+    Returns a RunEstimate, or None if the grid is empty
+    '''
+    if p.mglob <= 0 or p.nglob <= 0 or p.dx <= 0 or p.dy <= 0:
+        return None
+    model = model or CostModel()
+    depth_max = p.depth_flat if depth_max is None else depth_max
+    amplitude = abs(p.amp_wk) if p.wavemaker != "" else 0.0
+    cmax = max_celerity(depth_max, amplitude)
+    dt_cfl = cfl_dt(p.cfl, p.dx, p.dy, cmax)
+    dt = p.dt if p.fixed_dt and p.dt > 0 else dt_cfl
+    steps = math.ceil(p.total_time / dt) if math.isfinite(dt) and dt > 0 else 0
+    px, py = max(1, p.px), max(1, p.py)
+    seconds = steps * sum(model.step_time(p.mglob, p.nglob, px, py, cores_per_node))
+    return RunEstimate(cmax, dt, dt_cfl, steps, seconds, px * py)
+
+def calibrate_cell_cost(p, wall_seconds, steps, model = None, cores_per_node = None):
+    '''
+    This function returns the CostModel.cell_cost that makes the predicted
+    wall time of InputParams p over steps time steps equal wall_seconds,
+    measured on a real run
+    '''
+    model = model or CostModel()
+    compute, halo = model.step_time(p.mglob, p.nglob, max(1, p.px), max(1, p.py), cores_per_node)
+    per_step = max(wall_seconds / steps - halo, 0.0)
+    return model.cell_cost * per_step / compute
@@ -0,0 +1,139 @@
+import argparse             # command line interface
+import concurrent.futures   # thread pool over snapshot files
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # gathered values
+
+from reader import load_params
+from results import open_results
+
+### extract.py project structure:
+# Helper Functions for the cells of points, transects and station files
+# Series/extract(), time series of many cells in one pass over the snapshots
+# Command line interface, see `python extract.py -h`
+#
+# Example use case:
+# |   python extract.py input.txt --stations gauges.txt --transect 1,50,500,50 --out series.npz
+# reads every snapshot of the OUTPUTS of input.txt once and keeps only the
+# values at the gauges and along the transect.
+#
+# Every snapshot is memory-mapped (see results.py) and indexed at all cells
+# at once, so a pass costs the pages holding those cells, not gauges x
+# frames reads of whole grids. Snapshots are read by a thread pool, each
+# task holds one memory map and the values it gathered.
+
+###############################
+### Helper Functions
+def transect_cells(i0, j0, i1, j1):
+    '''
+    This function returns the 0-based (i, j) arrays of the cells on the
+    line from cell (i0, j0) to cell (i1, j1), one per step of the longer axis
+    '''
+    n = max(abs(i1 - i0), abs(j1 - j0)) + 1
+    i = np.rint(np.linspace(i0, i1, n)).astype(np.int64)
+    j = np.rint(np.linspace(j0, j1, n)).astype(np.int64)
+    return i, j
+
+def read_station_file(path):
+    '''
+    This function returns the 0-based (i, j) arrays of a STATION_FILE
+    '''
+    data = np.loadtxt(path, ndmin = 2, usecols = (0, 1)).astype(np.int64)
+    return data[:, 0] - 1, data[:, 1] - 1
+
+###############################
+#### Extraction
+class Series:
+    '''Series Class.
+    Result of extract(), values of every field at every cell over time
+
+    Attributes:
+        times: (frames,) time of every snapshot
+        i, j: (cells,) 0-based cell indices
+        values: {field: (frames, cells) array}
+    Methods:
+        save(): writes everything to one .npz file
+    '''
+    def __init__(self, times, i, j, values) -> None:
+        self.times = times
+        self.i = i
+        self.j = j
+        self.values = values
+    def save(self, path):
+        np.savez(path, times = self.times, i = self.i, j = self.j,
+                 **{f"field_{name}": v for name, v in self.values.items()})
+        return path
+    def __repr__(self):
+        return f"Series({len(self.times)} frames x {len(self.i)} cells of {', '.join(self.values)})"
+
+def extract(results, fields, i, j, workers = None, dtype = np.float32):
+    '''
+    This function gathers fields of Results (see results.py) at the 0-based
+    cells (i, j) from every snapshot, reading snapshots on a thread pool of
+    workers. Values are stored as dtype. Returns a Series, the times are
+    those of the first field
+    '''
+    i = np.asarray(i, dtype = np.int64)
+    j = np.asarray(j, dtype = np.int64)
+    ny, nx = results.shape
+    if np.any((i < 0) | (i >= nx) | (j < 0) | (j >= ny)):
+        raise ValueError(f"cells outside the {nx} x {ny} snapshots")
+    values = {}
+    times = np.empty(0)
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        for name in fields:
+            stack = results[name]
+            out = np.empty((len(stack), len(i)), dtype = dtype)
+            def gather(k):
+                out[k] = stack.snapshot(k)[j, i]
+            # map() keeps every task to one snapshot, list() re-raises errors
+            list(pool.map(gather, range(len(stack))))
+            values[name] = out
+            if len(times) == 0:
+                times = stack.times
+    return Series(times, i, j, values)
+
+###############################
+### Command Line Interface
+def parse_cells(text):
+    return [int(v) for v in text.split(",")]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Extract time series from FUNWAVE-TVD snapshot outputs")
+    parser.add_argument("input", help = "input.txt of the run")
+    parser.add_argument("--folder", help = "RESULT_FOLDER, default the one of the input")
+    parser.add_argument("--fields", help = "comma separated fields, default the OUTPUTS of the input")
+    parser.add_argument("--stations", action = "append", default = [], help = "STATION_FILE of 1-based i j cells")
+    parser.add_argument("--point", type = parse_cells, action = "append", default = [], metavar = "I,J",
+                        help = "one 1-based cell")
+    parser.add_argument("--transect", type = parse_cells, action = "append", default = [],
+                        metavar = "I0,J0,I1,J1", help = "every cell on a line between two 1-based cells")
+    parser.add_argument("--workers", type = int)
+    parser.add_argument("--out", default = "series.npz")
+    args = parser.parse_args(argv)
+    results = open_results(args.input, args.folder)
+    if args.fields:
+        fields = [f.strip().lower() for f in args.fields.split(",")]
+    else:
+        fields = [f.lower() for f in load_params(args.input).outputs]
+    missing = [f for f in fields if f not in results]
+    for name in missing:
+        print(f"No {name} snapshots in {results.folder}, skipped", file = sys.stderr)
+    fields = [f for f in fields if f not in missing]
+    cells = [read_station_file(path) for path in args.stations]
+    cells += [(np.array([i - 1]), np.array([j - 1])) for i, j in args.point]
+    cells += [transect_cells(i0 - 1, j0 - 1, i1 - 1, j1 - 1) for i0, j0, i1, j1 in args.transect]
+    if not cells or not fields:
+        parser.error("nothing to extract, pass --stations, --point or --transect and a field with snapshots")
+    i = np.concatenate([c[0] for c in cells])
+    j = np.concatenate([c[1] for c in cells])
+    start = time.perf_counter()
+    series = extract(results, fields, i, j, args.workers)
+    series.save(args.out)
+    print(f"Wrote {series} to {args.out} in {time.perf_counter() - start:.2f} s", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
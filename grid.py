@@ -0,0 +1,244 @@
+import mmap                 # read grid files without loading them
+import os
+
+import numpy as np          # whole-array grid arithmetic
+
+from jobs import Cancelled, atomic_open
+
+### grid.py project structure:
+# Helper Functions for Mglob x Nglob grid coordinates
+# grid_blocks()/write_grid(), FUNWAVE ASCII grids written a row block at a time
+# scan_grid(), memory-mapped single pass check of an existing grid file
+# read_blocks(), memory-mapped row block reader of an existing grid file
+#
+# FUNWAVE reads a grid file as Nglob lines of Mglob values, the first line
+# is j = 1 (y = 0). Every writer here keeps that layout.
+
+BLOCK_VALUES = 1 << 20      # values per row block, bounds the text held in memory
+SCAN_BYTES = 1 << 24        # bytes of text parsed at a time by scan_grid()
+MAX_BAD_ROWS = 5            # rows with a wrong value count kept by a GridReport
+
+###############################
+### Helper Functions
+def block_rows(mglob, values = BLOCK_VALUES):
+    '''
+    This function returns how many grid rows of mglob values fit in
+    one block of about values numbers
+    '''
+    return max(1, values // max(1, mglob))
+
+def coordinates(mglob, dx, j0, j1, dy):
+    '''
+    This function returns the x (1, mglob) and y (j1 - j0, 1) coordinate
+    arrays of rows j0 to j1, they broadcast to a (j1 - j0, mglob) block
+    '''
+    x = (np.arange(mglob, dtype = np.float64) * dx)[np.newaxis, :]
+    y = (np.arange(j0, j1, dtype = np.float64) * dy)[:, np.newaxis]
+    return x, y
+
+###############################
+### Row Blocks
+def grid_blocks(func, mglob, nglob, dx = 1.0, dy = 1.0, rows = None):
+    '''
+    This function yields (j0, block) for the grid func(x, y) evaluated a
+    row block at a time, block has shape (rows, mglob) and holds rows
+    j0 to j0 + rows. func takes broadcastable x and y arrays (see
+    coordinates()) and must only use whole-array operations.
+    '''
+    rows = rows or block_rows(mglob)
+    for j0 in range(0, nglob, rows):
+        j1 = min(nglob, j0 + rows)
+        x, y = coordinates(mglob, dx, j0, j1, dy)
+        yield j0, np.broadcast_to(func(x, y), (j1 - j0, mglob))
+
+def build_grid(func, mglob, nglob, dx = 1.0, dy = 1.0):
+    '''
+    This function returns the whole (nglob, mglob) grid func(x, y),
+    only meant for grids that fit in memory
+    '''
+    x, y = coordinates(mglob, dx, 0, nglob, dy)
+    return np.array(np.broadcast_to(func(x, y), (nglob, mglob)), dtype = np.float64)
+
+def write_blocks(path, blocks, mglob, fmt = "%.4f", cancel = None, progress = None):
+    '''
+    This function writes (j0, block) pairs to path in FUNWAVE's ASCII
+    layout. Every block is formatted with one %-operation and written
+    with one f.write(), so only one block of text exists at a time.
+    The text goes to a temporary file renamed to path at the end, so path
+    is never left half written. progress(rows) is called after every
+    block, writing stops with Cancelled once cancel (a threading.Event)
+    is set. Returns path
+    '''
+    row_fmt = " ".join([fmt] * mglob) + "\n"
+    formats = {}    # rows -> format string of a whole block
+    rows = 0
+    with atomic_open(path, "w", buffering = 1 << 20) as f:
+        for j0, block in blocks:
+            if cancel is not None and cancel.is_set():
+                raise Cancelled(path)
+            n = block.shape[0]
+            if n not in formats:
+                formats[n] = row_fmt * n
+            f.write(formats[n] % tuple(np.ravel(block).tolist()))
+            rows += n
+            if progress is not None:
+                progress(rows)
+    return path
+
+def write_grid(path, func, mglob, nglob, dx = 1.0, dy = 1.0, fmt = "%.4f", rows = None,
+               cancel = None, progress = None):
+    '''
+    Shorthand for write_blocks(path, grid_blocks(func, ...), mglob, fmt, cancel, progress)
+    '''
+    return write_blocks(path, grid_blocks(func, mglob, nglob, dx, dy, rows), mglob, fmt, cancel, progress)
+
+###############################
+#### Grid Scan
+class ScanCancelled(Cancelled):
+    pass
+
+class GridReport:
+    '''GridReport Class.
+    Result of scan_grid()
+
+    Args:
+        path: grid file that was scanned
+    Attributes:
+        rows: number of non-blank lines
+        count: number of values
+        bad_rows: up to MAX_BAD_ROWS (row, values) pairs with a value count
+                  other than the expected Mglob, rows count from 1
+        unreadable: (row, text) of the first value that is not a number, or None
+        nans: number of NaN values
+        dry: number of values below min_depth, 0 if no min_depth was given
+        min, max: range of the finite values, None if there are none
+    '''
+    def __init__(self, path) -> None:
+        self.path = path
+        self.rows = 0
+        self.count = 0
+        self.bad_rows = []
+        self.unreadable = None
+        self.nans = 0
+        self.dry = 0
+        self.min = None
+        self.max = None
+    def problems(self, mglob, nglob, name = "Grid"):
+        '''
+        Returns a list of warning messages for a grid expected to be
+        nglob rows of mglob values
+        '''
+        out = []
+        if self.unreadable is not None:
+            out.append(f"{name} file has a value that is not a number on row {self.unreadable[0]}: {self.unreadable[1]}")
+        if self.rows != nglob:
+            out.append(f"{name} file has {self.rows} rows, Nglob is {nglob}")
+        for row, n in self.bad_rows:
+            out.append(f"{name} file row {row} has {n} values, Mglob is {mglob}")
+        if self.nans:
+            out.append(f"{name} file has {self.nans} NaN values")
+        if self.dry:
+            out.append(f"{name} file has {self.dry} cells shallower than MinDepth")
+        return out
+    def summary(self, name = "Grid"):
+        if self.min is None:
+            return f"{name}: no finite values"
+        return f"{name}: {self.rows} rows, {self.count} values, range {self.min:g} to {self.max:g}"
+
+def _chunks(mm, chunk_bytes):
+    '''
+    Yields (end, text) pieces of mm that end on a line break
+    '''
+    size = len(mm)
+    pos = 0
+    while pos < size:
+        end = min(size, pos + chunk_bytes)
+        if end < size:
+            nl = mm.find(b"\n", end)
+            end = size if nl == -1 else nl + 1
+        yield end, mm[pos:end]
+        pos = end
+
+def _parse(text, lines, first_row, report):
+    '''
+    Returns the values of text as a float array. When text holds a value
+    that is not a number, the non-blank lines are parsed one at a time
+    and the first bad value is recorded in report.
+    '''
+    try:
+        return np.array(text.split(), dtype = np.float64)
+    except ValueError:
+        pass
+    good = []
+    for k, line in enumerate(lines):
+        for token in line.split():
+            try:
+                good.append(float(token))
+            except ValueError:
+                if report.unreadable is None:
+                    report.unreadable = (first_row + k, token.decode(errors = "replace"))
+    return np.array(good, dtype = np.float64)
+
+def scan_grid(path, mglob = None, min_depth = None, progress = None, cancel = None,
+              chunk_bytes = SCAN_BYTES):
+    '''
+    This function checks the ASCII grid at path in one pass over a memory
+    map of the file, parsing chunk_bytes of text at a time, and returns a
+    GridReport. Rows are checked against mglob values when given, values
+    below min_depth are counted as dry when given.
+    progress(fraction) is called after every chunk, scanning stops with
+    ScanCancelled once cancel (a threading.Event) is set.
+    '''
+    report = GridReport(path)
+    if os.path.getsize(path) == 0:
+        return report
+    lo = hi = None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        for end, text in _chunks(mm, chunk_bytes):
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(path)
+            lines = [line for line in text.splitlines() if line.strip()]
+            values = _parse(text, lines, report.rows + 1, report)
+            if mglob is not None and len(values) != len(lines) * mglob:
+                for k, line in enumerate(lines):
+                    n = len(line.split())
+                    if n != mglob and len(report.bad_rows) < MAX_BAD_ROWS:
+                        report.bad_rows.append((report.rows + k + 1, n))
+            report.rows += len(lines)
+            report.count += len(values)
+            nan = np.isnan(values)
+            report.nans += int(nan.sum())
+            finite = values[np.isfinite(values)]
+            if finite.size:
+                lo = finite.min() if lo is None else min(lo, finite.min())
+                hi = finite.max() if hi is None else max(hi, finite.max())
+            if min_depth is not None:
+                report.dry += int((finite < min_depth).sum())
+            if progress is not None:
+                progress(end / size)
+    report.min = None if lo is None else float(lo)
+    report.max = None if hi is None else float(hi)
+    return report
+
+###############################
+### Reading
+def read_blocks(path, mglob, chunk_bytes = SCAN_BYTES):
+    '''
+    This function yields (j0, block) for the ASCII grid at path, reading
+    a memory map of the file chunk_bytes of text at a time. Blocks have
+    mglob columns and as many rows as fit in a chunk. Raises ValueError
+    if a chunk does not hold whole rows of mglob numbers (see scan_grid()
+    to find out why).
+    '''
+    if os.path.getsize(path) == 0:
+        return
+    j0 = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+        for end, text in _chunks(mm, chunk_bytes):
+            values = np.array(text.split(), dtype = np.float64)
+            if values.size % mglob:
+                raise ValueError(f"{path} has rows that are not {mglob} values long near row {j0 + 1}")
+            block = values.reshape(-1, mglob)
+            yield j0, block
+            j0 += block.shape[0]
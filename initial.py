@@ -0,0 +1,183 @@
+import argparse             # command line interface
+import os                   # help with PATH
+import sys
+
+import numpy as np          # whole-array initial fields
+
+from bathymetry import depth_blocks
+from grid import grid_blocks, write_blocks, write_grid
+from reader import load_params
+
+### initial.py project structure:
+# Initial fields, each gives eta(x, y), u(x, y) and v(x, y) on broadcastable arrays
+# field_from_params(), the field of an INI_SOL/INI_REC/INI_GAU wavemaker
+# write_fields()/write_mask(), ETA_FILE, U_FILE, V_FILE and MASK_FILE
+# Command line interface, see `python initial.py -h`
+#
+# Example use case:
+# |   from initial import SolitaryWave, write_fields
+# |
+# |   wave = SolitaryWave(x0 = 200.0, amp = 0.5, depth = 10.0)
+# |   write_fields(wave, 1024, 64, 1.0, 1.0, "eta.txt", "u.txt", "v.txt")
+
+GRAVITY = 9.81
+
+###############################
+#### Initial Fields
+class GaussianHump:
+    '''GaussianHump Class.
+    Gaussian hump of still water, INI_GAU
+
+    Args:
+        xc, yc: center (m)
+        amp: height (m)
+        width: e-folding radius (m)
+    '''
+    def __init__(self, xc, yc, amp, width) -> None:
+        self.xc = xc
+        self.yc = yc
+        self.amp = amp
+        self.width = width
+    def eta(self, x, y):
+        return self.amp * np.exp(-((x - self.xc) ** 2 + (y - self.yc) ** 2) / self.width ** 2)
+    def u(self, x, y):
+        return np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y)))
+    v = u
+
+class RectangularHump:
+    '''RectangularHump Class.
+    Rectangular hump of still water, INI_REC
+
+    Args:
+        xc, yc: center (m)
+        amp: height (m)
+        xwidth, ywidth: size of the hump (m), ywidth defaults to xwidth
+    '''
+    def __init__(self, xc, yc, amp, xwidth, ywidth = None) -> None:
+        self.xc = xc
+        self.yc = yc
+        self.amp = amp
+        self.xwidth = xwidth
+        self.ywidth = xwidth if ywidth is None else ywidth
+    def eta(self, x, y):
+        inside = (np.abs(x - self.xc) <= self.xwidth / 2) & (np.abs(y - self.yc) <= self.ywidth / 2)
+        return np.where(inside, self.amp, 0.0)
+    def u(self, x, y):
+        return np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y)))
+    v = u
+
+class SolitaryWave:
+    '''SolitaryWave Class.
+    KdV/Boussinesq solitary wave travelling in +x, INI_SOL.
+    eta = a sech^2(k (x - x0)) with k = sqrt(3 a / (4 h^3)), and the
+    depth averaged velocity u = c eta / (h + eta) with c = sqrt(g (h + a))
+    so the wave moves off without shedding a reflected tail.
+
+    Args:
+        x0: crest position (m)
+        amp: wave height (m)
+        depth: still water depth under the wave (m)
+    '''
+    def __init__(self, x0, amp, depth) -> None:
+        self.x0 = x0
+        self.amp = amp
+        self.depth = depth
+        self.k = np.sqrt(3.0 * amp / (4.0 * depth ** 3))
+        self.c = np.sqrt(GRAVITY * (depth + amp))
+    def eta(self, x, y):
+        eta = self.amp / np.cosh(self.k * (x - self.x0)) ** 2
+        return np.broadcast_to(eta, np.broadcast_shapes(np.shape(x), np.shape(y)))
+    def u(self, x, y):
+        eta = self.eta(x, y)
+        return self.c * eta / (self.depth + eta)
+    def v(self, x, y):
+        return np.zeros(np.broadcast_shapes(np.shape(x), np.shape(y)))
+
+###############################
+### Helper Functions
+def field_from_params(p):
+    '''
+    This function returns the initial field of InputParams p for the
+    INI_SOL, INI_REC and INI_GAU wavemakers, or None for the others
+    '''
+    match p.wavemaker:
+        case 'INI_SOL':
+            return SolitaryWave(p.xwavemaker, p.amp_wk, p.dep_wk or p.depth_flat)
+        case 'INI_REC':
+            return RectangularHump(p.xc_wk, p.yc_wk, p.amp_wk, p.wid)
+        case 'INI_GAU':
+            return GaussianHump(p.xc_wk, p.yc_wk, p.amp_wk, p.wid)
+    return None
+
+def write_fields(field, mglob, nglob, dx = 1.0, dy = 1.0, eta_path = None, u_path = None, v_path = None,
+                 fmt = "%.6f", rows = None):
+    '''
+    This function writes the eta, u and v of field to the given paths
+    (None skips a file), each a block of rows at a time. Returns the
+    paths written
+    '''
+    out = []
+    for path, func in ((eta_path, field.eta), (u_path, field.u), (v_path, field.v)):
+        if path:
+            out.append(write_grid(path, func, mglob, nglob, dx, dy, fmt = fmt, rows = rows))
+    return out
+
+def mask_blocks(depth_blocks, min_depth):
+    '''
+    This function yields (j0, mask) for (j0, depth) blocks, cells deeper
+    than min_depth are wet (1), the others dry (0)
+    '''
+    for j0, depth in depth_blocks:
+        yield j0, (depth > min_depth).astype(np.int8)
+
+def write_mask(path, p, root = ".", rows = None):
+    '''
+    This function writes the MASK_FILE of InputParams p, derived from its
+    FLAT/SLOPE profile or streamed from its DEPTH_FILE. Returns path
+    '''
+    return write_blocks(path, mask_blocks(depth_blocks(p, root, rows), p.min_depth), p.mglob, fmt = "%d")
+
+def write_initial(p, root = ".", fmt = "%.6f", cancel = None, progress = None):
+    '''
+    This function writes the ETA_FILE, U_FILE, V_FILE (the field of the
+    wavemaker, see field_from_params()) and MASK_FILE of InputParams p
+    under root, skipping files p does not name. progress(fraction, path)
+    reports how far the whole set got, cancel stops it with
+    jobs.Cancelled (see grid.write_blocks()), files already written are
+    kept. Returns the paths written
+    '''
+    def path(name):
+        return name if os.path.isabs(name) else os.path.join(root, name)
+    files = []      # (path, blocks, fmt)
+    field = field_from_params(p)
+    if field is not None:
+        for name, func in ((p.eta_file, field.eta), (p.u_file, field.u), (p.v_file, field.v)):
+            if name != "":
+                files.append((path(name), grid_blocks(func, p.mglob, p.nglob, p.dx, p.dy), fmt))
+    if p.init_mask and p.mask_file != "":
+        files.append((path(p.mask_file), mask_blocks(depth_blocks(p, root), p.min_depth), "%d"))
+    out = []
+    for k, (target, blocks, f) in enumerate(files):
+        report = None if progress is None else (
+            lambda rows, k = k, target = target: progress((k + rows / max(1, p.nglob)) / len(files), target))
+        out.append(write_blocks(target, blocks, p.mglob, f, cancel, report))
+    return out
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write FUNWAVE-TVD initial condition files")
+    parser.add_argument("input", help = "input.txt giving the grid, the INI_* wavemaker and the file names")
+    parser.add_argument("--fmt", default = "%.6f")
+    args = parser.parse_args(argv)
+    p = load_params(args.input)
+    if not p.init:
+        p = p.replace(eta_file = p.eta_file or "eta.txt", u_file = p.u_file or "u.txt",
+                      v_file = p.v_file or "v.txt")
+    paths = write_initial(p, os.path.dirname(os.path.abspath(args.input)), args.fmt)
+    for path in paths:
+        print(f"Wrote {path}")
+    return 0 if paths else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
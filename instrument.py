@@ -0,0 +1,242 @@
+import argparse             # command line interface
+import atexit               # save on exit, see enable()
+import functools
+import json                 # histogram and trace files
+import math
+import os                   # help with PATH
+import sys
+import threading            # callbacks on the Tk thread, checks on workers
+import time
+
+### instrument.py project structure:
+# Histogram, log-bucketed latency histogram of one timed name
+# Recorder, histograms and Chrome trace events of every span
+# enable()/span()/timed(), opt-in timing, free when not enabled
+# Command line interface, see `python instrument.py -h`
+#
+# Example use case:
+# |   import instrument
+# |
+# |   instrument.enable("profile")      # writes profile.json and profile.trace.json at exit
+# |   with instrument.span("render", "writer"):
+# |       text = render(p)
+# |
+# |   @instrument.timed()               # times every call, named onCheckDepth
+# |   def onCheckDepth():
+# |       ...
+#
+# `python main.py --profile` and `python sweep.py ... --profile PATH` turn it
+# on. profile.trace.json opens in chrome://tracing or ui.perfetto.dev,
+# `python instrument.py profile.json` prints the latency table. Nothing is
+# recorded until enable() is called, until then span() and timed() cost
+# one global lookup.
+
+SUB_BUCKETS = 4             # histogram buckets per doubling of the latency (~19% wide)
+MAX_EVENTS = 1 << 20        # trace events kept, later ones are only counted
+
+###############################
+#### Recording
+class Histogram:
+    '''Histogram Class.
+    Latencies of one name, bucket k holds durations from 2^(k/SUB_BUCKETS)
+    up to 2^((k+1)/SUB_BUCKETS) nanoseconds
+
+    Attributes:
+        count, total: number of calls and their summed seconds
+        min, max: fastest and slowest call (s)
+        buckets: {k: calls}
+    Methods:
+        add(): records one duration in nanoseconds
+        percentile(): upper bound (s) of the bucket holding a percentile
+    '''
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = {}
+    def add(self, ns):
+        seconds = ns * 1e-9
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        k = int(math.log2(max(ns, 1)) * SUB_BUCKETS)
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q / 100.0 * self.count
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen >= target:
+                return min(self.max, 2.0 ** ((k + 1) / SUB_BUCKETS) * 1e-9)
+        return self.max
+    def to_json(self):
+        return {"count": self.count, "total": self.total, "mean": self.total / max(1, self.count),
+                "min": self.min if self.count else 0.0, "max": self.max,
+                "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99),
+                "buckets": [[2.0 ** ((k + 1) / SUB_BUCKETS) * 1e-9, n] for k, n in sorted(self.buckets.items())]}
+
+class Recorder:
+    '''Recorder Class.
+    Histograms by (category, name) and trace events of every span, safe
+    to use from several threads
+
+    Methods:
+        record(): adds one span
+        to_json(): histograms as a dict
+        trace(): Chrome trace event format as a dict
+        report(): latency table, slowest total first
+        save(): writes prefix.json and prefix.trace.json
+    '''
+    def __init__(self) -> None:
+        self.origin = time.perf_counter_ns()
+        self.histograms = {}
+        self.events = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.threads = {}
+    def record(self, name, cat, start, end):
+        tid = threading.get_ident()
+        with self.lock:
+            key = (cat, name)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].add(end - start)
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+            if len(self.events) < MAX_EVENTS:
+                self.events.append((name, cat, start, end, tid))
+            else:
+                self.dropped += 1
+    def to_json(self):
+        with self.lock:
+            return {f"{cat}/{name}": h.to_json() for (cat, name), h in sorted(self.histograms.items())}
+    def trace(self):
+        pid = os.getpid()
+        with self.lock:
+            events = [{"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                       "ts": (start - self.origin) / 1e3, "dur": (end - start) / 1e3}
+                      for name, cat, start, end, tid in self.events]
+            events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": label}}
+                       for tid, label in self.threads.items()]
+            return {"traceEvents": events, "displayTimeUnit": "ms",
+                    "otherData": {"dropped_events": self.dropped}}
+    def report(self):
+        return report(self.to_json())
+    def save(self, prefix):
+        with open(prefix + ".json", "w") as f:
+            json.dump(self.to_json(), f, indent = 1)
+        with open(prefix + ".trace.json", "w") as f:
+            json.dump(self.trace(), f)
+        return prefix + ".json", prefix + ".trace.json"
+
+###############################
+### Helper Functions
+def report(histograms):
+    '''
+    This function formats histograms (see Recorder.to_json()) as a table,
+    the name with the most total time first
+    '''
+    lines = [f"{'name':40s} {'calls':>8s} {'total':>9s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'max':>9s}"]
+    for name, h in sorted(histograms.items(), key = lambda item: -item[1]["total"]):
+        times = " ".join(f"{h[k] * 1e3:7.3g}ms" if k != "total" else f"{h[k]:8.3f}s"
+                         for k in ("total", "p50", "p90", "p99", "max"))
+        lines.append(f"{name[-40:]:40s} {h['count']:8d} {times}")
+    return "\n".join(lines)
+
+class _Null:
+    def __enter__(self):
+        return None
+    def __exit__(self, *exc):
+        return False
+
+class _Span:
+    def __init__(self, recorder, name, cat) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, self.cat, self.start, time.perf_counter_ns())
+        return False
+
+NULL = _Null()
+RECORDER = None             # the Recorder once enable() was called
+
+###############################
+#### Instrumentation
+def enable(prefix = None):
+    '''
+    This function starts recording and returns the Recorder. With prefix
+    the histograms and the trace are saved to prefix.json and
+    prefix.trace.json when the program exits
+    '''
+    global RECORDER
+    if RECORDER is None:
+        RECORDER = Recorder()
+        if prefix:
+            atexit.register(_save_at_exit, prefix)
+    return RECORDER
+
+def _save_at_exit(prefix):
+    if RECORDER is not None and RECORDER.histograms:
+        for path in RECORDER.save(prefix):
+            print(f"Wrote {path}", file = sys.stderr)
+
+def enabled():
+    return RECORDER is not None
+
+def span(name, cat = "app"):
+    '''
+    This function returns a context manager timing its block as name,
+    a no-op unless enable() was called
+    '''
+    return NULL if RECORDER is None else _Span(RECORDER, name, cat)
+
+def timed(name = None, cat = "tk"):
+    '''
+    This function returns a decorator timing every call of a function,
+    named name (default the function name). Tk callbacks are category tk
+    '''
+    def decorate(func):
+        label = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = RECORDER
+            if recorder is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(label, cat, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+def wrap(func, name, cat = "tk"):
+    '''
+    Shorthand for timed(name, cat)(func), for lambdas and trace handlers
+    '''
+    return timed(name, cat)(func)
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Print the latency table of a saved profile")
+    parser.add_argument("path", help = "PREFIX.json written by --profile")
+    parser.add_argument("--grep", help = "only names containing this text")
+    args = parser.parse_args(argv)
+    with open(args.path) as f:
+        histograms = json.load(f)
+    if args.grep:
+        histograms = {k: v for k, v in histograms.items() if args.grep in k}
+    print(report(histograms))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import contextlib
+import os                   # help with PATH
+import queue                # outcome of the worker thread
+import threading            # jobs run off the Tk thread
+
+### jobs.py project structure:
+# Cancelled/atomic_open(), files appear whole or not at all, also when a
+#   write is cancelled or fails half way
+# JobRunner, one background job at a time with progress and cancel, for
+#   the GUI's Generate and Build buttons (main.py)
+#
+# Example use case:
+# |   from jobs import atomic_open
+# |
+# |   with atomic_open("input.txt") as f:       # written to a temporary file
+# |       f.write(text)                         # renamed over input.txt on success
+#
+# A JobRunner never touches widgets: the job reports through progress()
+# and the GUI polls JobRunner.progress and JobRunner.poll() with m.after().
+
+###############################
+### Atomic Writes
+class Cancelled(Exception):
+    '''
+    Raised by writers and jobs that stop because their cancel event is set
+    '''
+
+@contextlib.contextmanager
+def atomic_open(path, mode = "w", **kwargs):
+    '''
+    This function opens a temporary file next to path for writing and
+    renames it to path once the block finishes. If the block raises
+    (Cancelled included), the temporary file is removed and path is left
+    as it was
+    '''
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with open(partial, mode, **kwargs) as f:
+            yield f
+        os.replace(partial, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
+
+###############################
+#### Job Runner
+class JobRunner:
+    '''JobRunner Class.
+    Runs one job at a time on a worker thread. A job is a function
+    job(progress, cancel): progress(fraction, text) reports how far it
+    got (fraction None when unknown) and cancel is a threading.Event it
+    checks between units of work, raising Cancelled once it is set.
+
+    Attributes:
+        name: name of the running or last job
+        progress: (fraction, text) last reported by the job
+    Methods:
+        start(): starts a job, False if one is still running
+        cancel(): asks the running job to stop
+        busy(): True while a job runs
+        poll(): None while the job runs, then once (state, value):
+                ("done", result), ("cancelled", message) or ("failed", error)
+    '''
+    def __init__(self) -> None:
+        self.name = ""
+        self.progress = (None, "")
+        self.outcome = queue.Queue()
+        self.stop = threading.Event()
+        self.thread = None
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+    def start(self, name, job):
+        if self.busy():
+            return False
+        self.name = name
+        self.progress = (0.0, name)
+        self.stop = stop = threading.Event()
+        def report(fraction, text = None):
+            self.progress = (fraction, text if text is not None else self.progress[1])
+        def work():
+            try:
+                self.outcome.put(("done", job(report, stop)))
+            except Cancelled as e:
+                self.outcome.put(("cancelled", str(e)))
+            except Exception as e:      # shown by the GUI, the worker thread must not die silently
+                self.outcome.put(("failed", e))
+        self.thread = threading.Thread(target = work, name = name, daemon = True)
+        self.thread.start()
+        return True
+    def cancel(self):
+        self.stop.set()
+    def poll(self):
+        try:
+            return self.outcome.get_nowait()
+        except queue.Empty:
+            return None
@@ -1,15 +1,74 @@
+import time                 # startup timing, see report_startup()
+STARTUP = time.perf_counter()
 import tkinter as tk        # GUI Library, native Python library
 from tkinter import ttk     # extra widgets from library
+from tkinter import filedialog
+from tkinter import simpledialog
 import os                   # help with PATH
+import sys                  # --exit-after-startup, see report_startup()
+import queue                # results of background checks
+import threading            # grid file scans off the Tk thread
+
+from model import InputParams   # widget-free input parameters
+from writer import write_input  # widget-free input.txt writer
+from reader import load_params  # input.txt reader
+from cache import CaseCache     # content-addressed input.txt names
+import validation               # widget-free checks, grid file scans
+from decomposition import best_decomposition    # PX/PY optimizer
+import spectrum                 # WaveCompFile generator
+import initial                  # ETA/U/V/MASK_FILE generator
+import stations                 # STATION_FILE generator
+import checkpoint               # HOTSTART_INTV planner
+import instrument               # --profile, opt-in callback timing
+import jobs                     # generation off the Tk thread, atomic writes
+import sweep                    # parameter sweeps from the Generate button
 
 ### main.py project structure:
 # Helper Classes, such as Classes that manage widgets
 # Helper Functions
 # Main GUI Body
-#   - This contains a generate() function for generating input.txt
+#   - This contains a generate() function for generating input.txt,
+#     it collects the widgets into an InputParams (model.py) and
+#     hands it to write_input() (writer.py)
+#   - open_input() loads an existing input.txt through reader.py
+#   - without Overwrite, generate() names the file by the hash of its
+#     parameters (cache.py), regenerating an unchanged case is a no-op
+#   - hot start, initial condition and wavemaker widgets are built the
+#     first time their section is shown (LazySection), the time from
+#     start to first paint is printed by report_startup()
+#   - validate() scans the depth/friction/initial condition files and
+#     estimates dt, core-hours and output volume on a worker thread
+#     (validation.py), results are polled with m.after()
+#   - every widget change reports to Live, validation runs again after
+#     a short pause in typing and only reruns the checks whose inputs
+#     changed (validation.Validator)
+#   - with --profile every Tk callback, validation check and input.txt
+#     section writer is timed (instrument.py), histograms and a Chrome
+#     trace are written to profile.json and profile.trace.json on exit
+#   - Generate, Build Initial Files and Place Stations run as a job on a
+#     worker thread (jobs.py) with a progress bar and a Cancel button,
+#     files are written to a temporary name and renamed when complete,
+#     with the Sweep field set Generate writes a whole sweep (sweep.py)
+# Headless generation and parameter sweeps live in sweep.py
 
 ###############################
 #### Helper Classes
+class Live:
+    '''Live Class.
+    Every widget class below reports its changes here. The GUI sets
+    Live.callback once its widgets exist, changes made before that
+    (defaults set while building) are ignored.
+
+    Attributes:
+        callback: function called without arguments on every change
+    '''
+    callback = None
+    @staticmethod
+    @instrument.timed("Live.changed")
+    def changed(*args):
+        if Live.callback is not None:
+            Live.callback()
+
 class LabelEntryD: # shorthand LED in variable names
     '''LabelEntryD(ecimal) Class. 
     This class manages a label and entry widget, where input to the
@@ -42,11 +101,12 @@ class LabelEntryD: # shorthand LED in variable names
             elif not self.str.get().strip() == '':
                 self.str.set(f"{self.value : .0f}")
             return True
-        self.str.trace_add("write", set)
+        self.str.trace_add("write", instrument.wrap(set, "LabelEntryD.trace"))
+        self.str.trace_add("write", Live.changed)
         self.entry = tk.Entry(m, textvariable = self.str)
     def set(self, x):
         self.str.set(f"{x : .0f}")
-        self.value = x
+        self.value = round(x)
     def get(self):
         return self.value
     def hide(self):
@@ -90,7 +150,8 @@ class LabelEntryF:
             elif not self.str.get().strip() == "":
                 self.str.set(f"{self.value : f}")
             return True
-        self.str.trace_add("write", set)
+        self.str.trace_add("write", instrument.wrap(set, "LabelEntryF.trace"))
+        self.str.trace_add("write", Live.changed)
         self.entry = tk.Entry(m, textvariable = self.str)
         
     def set(self, x):
@@ -131,6 +192,7 @@ class LabelEntryS:
     def __init__(self, m, text) -> None:
         self.label = tk.Label(m, text = text)
         self.str = tk.StringVar(value = "")
+        self.str.trace_add("write", Live.changed)
         self.entry = tk.Entry(m, textvariable = self.str)
         
     def set(self, x):
@@ -168,6 +230,7 @@ class CheckB:
     '''
     def __init__(self, m, text, value = False, command = None) -> None:
         self.bool = tk.BooleanVar(value = value)
+        self.bool.trace_add("write", Live.changed)
         if command != None:
             self.check = tk.Checkbutton(m, text = text,
                                     variable = self.bool,
@@ -180,7 +243,7 @@ class CheckB:
                                     onvalue = True,
                                     offvalue = False)                
     def set(self, x):
-        self.bool.set()
+        self.bool.set(x)
     def get(self):
         return self.bool.get()
     def hide(self):
@@ -213,6 +276,7 @@ class LabelCombo:
     def __init__(self, m, text, arr) -> None:
         self.label = tk.Label(m, text = text)
         self.str = tk.StringVar()
+        self.str.trace_add("write", Live.changed)
         self.combo = ttk.Combobox(m, textvariable = self.str)
         self.combo['values'] = arr
     def set(self, x):
@@ -229,6 +293,59 @@ class LabelCombo:
         self.label.grid(row = row, column = column)
         self.combo.grid(row = row, column = column + 1)
 
+class Deferred:
+    '''Deferred Class.
+    Stand-in for a widget of a LazySection that is not built yet. It keeps
+    the value it is set to, so collect_params()/apply_params() work before
+    the section is shown, and the widget starts from that value once built
+    (see realize()).
+
+    Args:
+        value: value get() returns until set() is called
+    '''
+    def __init__(self, value) -> None:
+        self.value = value
+    def set(self, x):
+        self.value = x
+    def get(self):
+        return self.value
+    def hide(self):
+        pass
+
+class LazySection:
+    '''LazySection Class.
+    Builds the widgets of one GUI section the first time it is shown,
+    instead of at startup.
+
+    Args:
+        build: function creating the widgets, called at most once
+    Methods:
+        ensure(): builds the section unless it is built already
+    Attributes:
+        built: True once build() ran
+        seconds: time build() took
+    
+    Example use case:
+    |   def build_hotstart_entries():
+    |       global filenum_hot_led
+    |       filenum_hot_led = realize(filenum_hot_led, LabelEntryD(frame, "Initial Enumeration"))
+    |   hotstart_section = LazySection(build_hotstart_entries)
+    |   def show_hotstart_entries():
+    |       hotstart_section.ensure()                 # builds on first call only
+    |       filenum_hot_led.grid(row = 1)
+    '''
+    def __init__(self, build) -> None:
+        self.build = build
+        self.built = False
+        self.seconds = 0.0
+    def ensure(self):
+        if self.built:
+            return
+        start = time.perf_counter()
+        self.build()
+        self.built = True
+        self.seconds = time.perf_counter() - start
+
 class CreateToolTip(object): # shortened to ttp in var names
     """
     Create a tooltip for a given widget, so when user hovers over a widget, a textbox/tooltip
@@ -292,6 +409,7 @@ class CreateToolTip(object): # shortened to ttp in var names
 
 ###############################
 ### Helper Functions
+@instrument.timed()
 def center(e):
     '''
     This function is used to center the title of the window
@@ -300,6 +418,14 @@ def center(e):
     s = 'Generate input.txt'.rjust(w//2)
     m.title(s)
 
+def realize(stand_in, widget):
+    '''
+    This function gives a newly built widget the value of its Deferred
+    stand-in and returns the widget
+    '''
+    widget.set(stand_in.get())
+    return widget
+
 def uniquify(path):
     '''
     This function is used to produce a unique filename given a PATH
@@ -320,127 +446,259 @@ if __name__ == "__main__":      # Stops bad run of main.py
         debug_print()           # see function at bottom
     m = tk.Tk()
     cwd = os.path.dirname(os.path.realpath(__file__))
+    if "--profile" in sys.argv[1:]:     # see instrument.py
+        instrument.enable(os.path.join(cwd, "profile"))
     output_folder = "output/"
     init_station = tk.BooleanVar(value = False)
 
     ### Local Functions
     # TODO: 
-    def generate():
-        print("Generating input.txt")
-        if overwrite_cb.get():
-            filename = os.path.join(cwd, "input.txt")
-        else:
-            filename = uniquify(os.path.join(cwd, "input.txt"))
-        f = open(filename, "w+")
-        f.write("! INPUT FILE FOR FUNWAVE_TVD\n! NOTE: all input parameter are capital sensitive\n")
-        f.write("! --------------------TITLE-------------------------------------\n! title only for log file\n")
-        f.write(f"TITLE = {title_les.get()}\n\n")
-        f.write("! -------------------PARALLEL INFO-----------------------------\n!    PX,PY - processor numbers in X and Y\n!    NOTE: make sure consistency with mpirun -np n (px*py)\n")
-        f.write(f"PX ={px_led.get() : .0f}\nPY ={py_led.get() : .0f}\n")
-        f.write("! --------------------DEPTH-------------------------------------\n! Depth types, DEPTH_TYPE=DATA: from depth file\n!              DEPTH_TYPE=FLAT: idealized flat, need depth_flat\n!              DEPTH_TYPE=SLOPE: idealized slope,\n!                                 need slope,SLP starting point, Xslp\n!                                 and depth_flat\n")
-        f.write(f"DEPTH_TYPE ={last_depth_check}\n")
-        if "FLAT" in last_depth_check or "SLOPE" in last_depth_check:
-                f.write(f"DEPTH_FLAT ={depth_flat_lef.get() : f}\n")
-                if "SLOPE" in last_depth_check:
-                    f.write(f"SLP ={slope_lef.get() : f}\nXslp ={xslope_lef.get() : f}\n")
+    @instrument.timed()
+    def collect_params():
+        '''
+        Reads every widget into an InputParams, see model.py
+        '''
+        return InputParams(
+            title = title_les.get(),
+            px = px_led.get(), py = py_led.get(),
+            depth_type = last_depth_check,
+            depth_flat = depth_flat_lef.get(), slope = slope_lef.get(),
+            xslope = xslope_lef.get(), depth_file = depth_data_les.get(),
+            result_folder = result_folder_les.get(),
+            mglob = mglob_led.get(), nglob = nglob_led.get(),
+            dx = dx_lef.get(), dy = dy_lef.get(),
+            total_time = time_total_lef.get(), plot_intv = plot_int_lef.get(),
+            screen_intv = screen_int_lef.get(), plot_start = plot_start_lef.get(),
+            fixed_dt = fixed_dt_check.get(), dt = dt_lef.get(),
+            hot_start = hotstart_check.get(), filenum_hotstart = filenum_hot_led.get(),
+            hotstart_intv = hotstart_int_lef.get(),
+            init = init_check.get(), eta_file = init_eta_les.get(),
+            u_file = init_u_les.get(), v_file = init_v_les.get(),
+            init_mask = init_mask_check.get(), mask_file = init_mask_les.get(),
+            dispersion = dispersion_check.get(),
+            gamma1 = gamma1_lef.get(), gamma2 = gamma2_lef.get(),
+            gamma3 = gamma3_lef.get(), beta_ref = beta_lef.get(),
+            viscosity_breaking = viscosity_breaking_check.get(),
+            cbrk1 = cbrk1_lef.get(), cbrk2 = cbrk2_lef.get(),
+            swe_eta_dep = swe_eta_lef.get(), roller_effect = roller_effect_check.get(),
+            cd_fixed = cd_fixed_lef.get(), friction_matrix = friction_matrix_check.get(),
+            friction_file = friction_matrix_les.get(), show_breaking = show_breaking_check.get(),
+            wavemaker_cbrk = wavemaker_break_lef.get(),
+            time_scheme = time_scheme_combo.get(), high_order = high_order_combo.get(),
+            cfl = cfl_lef.get(), froude_cap = froude_cap_lef.get(),
+            min_depth = min_depth_lef.get(),
+            wavemaker = wavemaker if isWavemaker.get() else "",
+            dep_wk = dep_wk_lef.get(), xc_wk = xc_wk_lef.get(), yc_wk = yc_wk_lef.get(),
+            ywidth_wk = ywidth_wk_lef.get(), tperiod = tperiod_lef.get(),
+            amp_wk = amp_wk_lef.get(), theta_wk = theta_wk_lef.get(),
+            time_ramp = time_ramp_lef.get(), delta_wk = delta_wk_lef.get(),
+            freqpeak = freqpeak_lef.get(), freqmin = freqmin_lef.get(),
+            freqmax = freqmax_lef.get(), hmo = hmo_lef.get(),
+            gamma_tma = gamma_tma_lef.get(), theta_peak = theta_peak_lef.get(),
+            nfreq = nfreq_led.get(), ntheta = ntheta_led.get(),
+            equal_energy = equal_energy.get(),
+            wave_comp_file = wave_comp_file_les.get(), num_wave_comp = num_wave_comp_led.get(),
+            peak_period = peak_period_lef.get(),
+            xwavemaker = xwavemaker_lef.get(), wid = wid_lef.get(),
+            periodic = pbc_check.get(),
+            num_stations = number_stations_led.get(), station_file = station_file_lef.get(),
+            output_res = output_res_led.get(),
+            outputs = tuple(output_list.get(item).split(" ")[0]
+                            for item in output_list.curselection()))
+    @instrument.timed()
+    def apply_params(p):
+        '''
+        Fills every widget from an InputParams, the reverse of collect_params()
+        '''
+        global last_depth_check, wavemaker
+        title_les.set(p.title)
+        px_led.set(p.px)
+        py_led.set(p.py)
+        last_depth_check = p.depth_type
+        isFlat.set('FLAT' in p.depth_type)
+        isSlope.set('SLOPE' in p.depth_type)
+        isDepthData.set(not ('FLAT' in p.depth_type or 'SLOPE' in p.depth_type))
+        depth_flat_lef.set(p.depth_flat)
+        slope_lef.set(p.slope)
+        xslope_lef.set(p.xslope)
+        depth_data_les.set(p.depth_file)
+        hide_depth_entries()
+        if isFlat.get():
+            show_flat_lef()
+        elif isSlope.get():
+            show_slope_lef()
         else:
-            f.write(f"DEPTH_FILE = {depth_data.get()}\n")
-        f.write("! -------------------PRINT---------------------------------\n! PRINT*,\n! result folder\n")
-        f.write("RESULT_FOLDER = " + ("./" if result_folder_les.get() == "" else result_folder_les.get()) + "\n")
-        f.write("! ------------------DIMENSION-----------------------------\n! global grid dimension\n")
-        f.write(f"Mglob = {mglob_led.get()}\nNglob = {nglob_led.get()}\n")
-        f.write("! ----------------- TIME----------------------------------\n! time: total computational time/ plot time / screen interval\n! all in seconds\n")
-        f.write(f"TOTAL_TIME ={time_total_lef.get() : f}\n")
-        f.write(f"PLOT_INTV ={plot_int_lef.get() : f}\n")
-        f.write(f"SCREEN_INTV ={screen_int_lef.get() : f}\n")
-        if (hotstart_check.get()):
-            f.write(f"! -------------------HOT START---------------------------------\nHOT_START = T\n")
-            f.write(f"FileNumber_HOTSTART = {filenum_hot_led.get()}\n")
-            f.write(f"HOTSTART_INTV = {hotstart_int_lef.get() :f}\n")
-        if (init_check.get()):
-            f.write(f"! ---------------INITIAL CONDITION----------------------------\nINI_UVZ = F\n")
-            f.write(f"ETA_FILE = {init_eta_les.get()}")
-            if init_u_les.get() != "":
-                f.write(f"U_FILE = {init_u_les.get()}")
-            if init_v_les.get() != "":
-                f.write(f"V_FILE = {init_v_les.get()}")
-            if init_mask_check.get():
-                f.write(f"MASK_FILE = {init_mask_les.get()}")
-        f.write("! ----------------PHYSICS------------------------------\n! parameters to control type of equations\n! dispersion: all dispersive terms\n! gamma1=1.0,gamma2=1.0: defalt: Fully nonlinear equations\n")
-
-        f.write(f"DISPERSION = " + ("T" if dispersion_check.get() else "F"))
-        f.write(f"Gamma1 = {gamma1_lef.get() :f}\n")
-        f.write(f"Gamma2 = {gamma2_lef.get() :f}\n")
-        f.write(f"Gamma3 = {gamma3_lef.get() :f}\n")
-        f.write(f"Beta_ref = {beta_lef.get() :f}\n")
-        if viscosity_breaking_check.get():
-            f.write(f"VISCOSITY_BREAKING = T\n")
-            f.write(f"Cbrk1 = {cbrk1_lef.get()}\n")
-            f.write(f"Cbrk2 = {cbrk2_lef.get()}\n")
+            show_data()
+        result_folder_les.set(p.result_folder)
+        mglob_led.set(p.mglob)
+        nglob_led.set(p.nglob)
+        dx_lef.set(p.dx)
+        dy_lef.set(p.dy)
+        time_total_lef.set(p.total_time)
+        plot_int_lef.set(p.plot_intv)
+        screen_int_lef.set(p.screen_intv)
+        plot_start_lef.set(p.plot_start)
+        fixed_dt_check.set(p.fixed_dt)
+        dt_lef.set(p.dt)
+        onCheckFixedDt()
+        hotstart_check.set(p.hot_start)
+        filenum_hot_led.set(p.filenum_hotstart)
+        hotstart_int_lef.set(p.hotstart_intv)
+        onCheckHotStart()
+        init_check.set(p.init)
+        init_eta_les.set(p.eta_file)
+        init_u_les.set(p.u_file)
+        init_v_les.set(p.v_file)
+        init_mask_check.set(p.init_mask)
+        init_mask_les.set(p.mask_file)
+        onCheckInit()
+        if p.init:
+            onCheckInitMask()
+        dispersion_check.set(p.dispersion)
+        gamma1_lef.set(p.gamma1)
+        gamma2_lef.set(p.gamma2)
+        gamma3_lef.set(p.gamma3)
+        beta_lef.set(p.beta_ref)
+        viscosity_breaking_check.set(p.viscosity_breaking)
+        cbrk1_lef.set(p.cbrk1)
+        cbrk2_lef.set(p.cbrk2)
+        onCheckViscosityBreaking()
+        swe_eta_lef.set(p.swe_eta_dep)
+        roller_effect_check.set(p.roller_effect)
+        cd_fixed_lef.set(p.cd_fixed)
+        friction_matrix_check.set(p.friction_matrix)
+        friction_matrix_les.set(p.friction_file)
+        onCheckFrictionMatrix()
+        show_breaking_check.set(p.show_breaking)
+        wavemaker_break_lef.set(p.wavemaker_cbrk)
+        time_scheme_combo.set(p.time_scheme)
+        high_order_combo.set(p.high_order)
+        cfl_lef.set(p.cfl)
+        froude_cap_lef.set(p.froude_cap)
+        min_depth_lef.set(p.min_depth)
+        dep_wk_lef.set(p.dep_wk)
+        xc_wk_lef.set(p.xc_wk)
+        yc_wk_lef.set(p.yc_wk)
+        ywidth_wk_lef.set(p.ywidth_wk)
+        tperiod_lef.set(p.tperiod)
+        amp_wk_lef.set(p.amp_wk)
+        theta_wk_lef.set(p.theta_wk)
+        time_ramp_lef.set(p.time_ramp)
+        delta_wk_lef.set(p.delta_wk)
+        freqpeak_lef.set(p.freqpeak)
+        freqmin_lef.set(p.freqmin)
+        freqmax_lef.set(p.freqmax)
+        hmo_lef.set(p.hmo)
+        gamma_tma_lef.set(p.gamma_tma)
+        theta_peak_lef.set(p.theta_peak)
+        nfreq_led.set(p.nfreq)
+        ntheta_led.set(p.ntheta)
+        equal_energy.set(p.equal_energy)
+        wave_comp_file_les.set(p.wave_comp_file)
+        num_wave_comp_led.set(p.num_wave_comp)
+        peak_period_lef.set(p.peak_period)
+        xwavemaker_lef.set(p.xwavemaker)
+        wid_lef.set(p.wid)
+        isWavemaker.set(p.wavemaker != "")
+        if p.wavemaker != "":
+            wavemaker = p.wavemaker
+            wavemaker_section.ensure()
+            wavemaker_list.selection_clear(0, tk.END)
+            for i, item in enumerate(wavemaker_list.get(0, tk.END)):
+                if f"({p.wavemaker})" in item:
+                    wavemaker_list.select_set(i)
+        onCheckWaveMaker()
+        pbc_check.set(p.periodic)
+        number_stations_led.set(p.num_stations)
+        station_file_lef.set(p.station_file)
+        output_res_led.set(p.output_res)
+        output_list.selection_clear(0, tk.END)
+        for i, item in enumerate(output_list.get(0, tk.END)):
+            if item.split(" ")[0] in p.outputs:
+                output_list.select_set(i)
+    @instrument.timed()
+    def open_input():
+        path = filedialog.askopenfilename(initialdir = cwd, title = "Open input.txt",
+                                          filetypes = (("Input files", "*.txt"), ("All files", "*")))
+        if path:
+            apply_params(load_params(path))
+    # one background job at a time, widgets are only touched here on the
+    # Tk thread, the job reports through job_runner.progress
+    job_runner = jobs.JobRunner()
+    def run_job(name, job, on_done = None):
+        '''
+        Runs job(progress, cancel) on a worker thread, see jobs.JobRunner,
+        on_done(result) is called on the Tk thread once it finished
+        '''
+        if not job_runner.start(name, job):
+            print(f"{job_runner.name} is still running, cancel it first")
+            return
+        gen_button.config(state = tk.DISABLED)
+        cancel_button.config(state = tk.NORMAL)
+        m.after(100, poll_job, on_done)
+    @instrument.timed()
+    def poll_job(on_done):
+        fraction, text = job_runner.progress
+        job_progress["value"] = fraction or 0.0
+        job_status.set(text)
+        outcome = job_runner.poll()
+        if outcome is None:
+            m.after(100, poll_job, on_done)
+            return
+        state, value = outcome
+        gen_button.config(state = tk.NORMAL)
+        cancel_button.config(state = tk.DISABLED)
+        job_progress["value"] = 0.0
+        job_status.set(f"{job_runner.name} {state}")
+        if state == "done":
+            if on_done is not None:
+                on_done(value)
         else:
-            f.write(f"VISCOSITY_BREAKING = F\n")
-        f.write(f"SWE_ETA_DEP = {swe_eta_lef.get()}\n")
-        f.write(f"ROLLER_EFFECT = " + ("T" if roller_effect_check.get() else "F") + "\n")
-        f.write("!----------------Friction-----------------------------\n")
-        f.write(f"Cd_fixed = {cd_fixed_lef.get():f}\n")
-        f.write(f"FRICTION_MATRIX = " + ("T" if friction_matrix_check.get() else "F") + "\n")
-        if friction_matrix_check.get():
-            f.write(f"FRICTION_FILE = {friction_matrix_les}\n")
-        f.write(f"SHOW_BREAKING = " + ("T" if show_breaking_check.get() else "F") + "\n")
-        f.write(f"WAVEMAKER_cbrk = {wavemaker_break_lef.get():f}\n")
-        f.write("! ----------------NUMERICS----------------------------\n! time scheme: runge_kutta for all types of equations\n!              predictor-corrector for NSWE\n! space scheme: second-order\n!               fourth-order\n! construction: HLLC\n! cfl condition: CFL\n! froude number cap: FroudeCap\n")
-        f.write(f"Time_Scheme = {time_scheme_combo.get()}\n")
-        f.write(f"HIGH_ORDER = {high_order_combo.get()}\n")
-        f.write(f"CFL = {cfl_lef.get()}\n")
-        f.write(f"FroudeCap = {froude_cap_lef.get()}\n")
-        f.write(f"MinDepth = {min_depth_lef.get():f}\n")
-        f.write(f"! ----------------WAVEMAKER------------------------------\n!  wave maker\n! LEF_SOL- left boundary solitary, need AMP,DEP, LAGTIME\n! INI_SOL- initial solitary wave, WKN B solution,\n! need AMP, DEP, XWAVEMAKER\n! INI_REC - rectangular hump, need to specify Xc,Yc and WID\n! WK_REG - Wei and Kirby 1999 internal wave maker, Xc_WK,Tperiod\n!          AMP_WK,DEP_WK,Theta_WK, Time_ramp (factor of period)\n! WK_IRR - Wei and Kirby 1999 TMA spectrum wavemaker, Xc_WK,\n!          DEP_WK,Time_ramp, Delta_WK, FreqPeak, FreqMin,FreqMax,\n!          Hmo,GammaTMA,ThetaPeak\n! WK_TIME_SERIES - fft time series to get each wave component\n!                 and then use Wei and Kirby 1999\n!          need input WaveCompFile (including 3 columns: per,amp,pha)\n!          NumWaveComp,PeakPeriod,DEP_WK,Xc_WK,Ywidth_WK\n")
-        if isWavemaker:
-            f.write(f"WAVEMAKER = {wavemaker}\n")
-            match wavemaker:
-                case 'WK_REG':
-                    f.write(f"DEP_WK = {dep_wk_lef.get():f}\n")
-                    f.write(f"Xc_WK = {xc_wk_lef.get():f}\n")
-                    f.write(f"Yc_WK = {yc_wk_lef.get():f}\n")
-                    f.write(f"Tperiod = {tperiod_lef.get():f}\n")
-                    f.write(f"AMP_WK = {amp_wk_lef.get():f}\n")
-                    f.write(f"Theta_WK = {theta_wk_lef.get():f}\n")
-                    f.write(f"Delta_WK = {theta_wk_lef.get():f}\n")
-                case 'WK_IRR':
-                    pass
-                case 'WK_NEW_IRR':
-                    pass
-                case 'JON_2D':
-                    pass
-                case 'JON_1D':
-                    pass
-                case 'TMA_1D':
-                    pass
-                case 'WK_NEW_DATA_2D':
-                    pass
-                case 'WK_DATA2D':
-                    pass
-                case 'WK_NEW_DATA_2D':
-                    pass
-                case 'LEFT_BC_IRR':
-                    pass
-                case 'LEF_SOL':
-                    pass
-                case 'INI_SOL':
-                    pass
-                case 'INI_REC':
-                    pass
-                case 'INI_GAU':
-                    pass
-        f.write(f"! ---------------- PERIODIC BOUNDARY CONDITION ---------\n! South-North periodic boundary condition\n!\n")
-        f.write("PERIODIC = " + ("T" if pbc_check.get() else "F") + "\n")
-        f.write("! -----------------OUTPUT-----------------------------\n! stations\n! if NumberStations>0, need input i,j in STATION_FILE\n")
-        f.write(f"NumStations = {number_stations_led.get()}\n")
-        if number_stations_led.get() > 0:
-            f.write(f"STATION_FILE = {station_file_lef}\n")
-        for item in output_list.curselection():
-            f.write(output_list.get(item).split(" ")[0] + " = T\n")
-        f.close()
+            print(f"{job_runner.name} {state}: {value}")
+    @instrument.timed()
+    def cancel_job():
+        job_runner.cancel()
+        job_status.set(f"Cancelling {job_runner.name}")
+    @instrument.timed()
+    def generate():
+        p = collect_params()
+        overwrite = overwrite_cb.get()
+        if sweep_les.get().strip():
+            generate_sweep(p, not overwrite)
+            return
+        print("Generating input.txt")
+        def job(progress, cancel):
+            if overwrite:
+                return write_input(p, os.path.join(cwd, "input.txt")), True
+            return CaseCache(cwd).write(p)
+        def done(result):
+            path, created = result
+            if not created:
+                print(f"Unchanged case, already written to {path}")
+        run_job("Generate", job, done)
+    def generate_sweep(p, cache):
+        '''
+        Writes the cartesian product of the Sweep field around p to the
+        sweep folder, see sweep.run_sweep()
+        '''
+        try:
+            axes = sweep.parse_axes(sweep_les.get())
+        except ValueError as e:
+            print(e)
+            return
+        total = 1
+        for values in axes.values():
+            total *= len(values)
+        out_dir = os.path.join(cwd, "sweep")
+        print(f"Generating {total} cases in {out_dir}")
+        def job(progress, cancel):
+            stats = sweep.run_sweep(sweep.product_cases(p, axes), out_dir, log = None, cache = cache,
+                                    progress = lambda n: progress(n / total, f"{n} of {total} cases"),
+                                    cancel = cancel)
+            if cancel.is_set():
+                raise jobs.Cancelled(f"stopped after {stats}")
+            return stats
+        run_job("Sweep", job, lambda stats: print(f"Wrote {stats}"))
 
     ### Window Params
     m.geometry("1400x600")
@@ -458,14 +716,17 @@ if __name__ == "__main__":      # Stops bad run of main.py
     # configure the canvas
     canvas_m.configure(yscrollcommand=param_scrollbar.set)
     canvas_m.bind(
-        '<Configure>', lambda e: canvas_m.configure(scrollregion=canvas_m.bbox("all"))
+        '<Configure>', instrument.wrap(lambda e: canvas_m.configure(scrollregion=canvas_m.bbox("all")),
+                                       "canvas_m.<Configure>")
     )
 
     param_m = ttk.Frame(canvas_m) # main param frame
+    @instrument.timed()
     def resize_scrollbar():
         canvas_m.configure(scrollregion=canvas_m.bbox("all"))
     param_m.bind("<Configure>",         # dynamic scrolling
-                 lambda e: canvas_m.configure(scrollregion=canvas_m.bbox("all"))) 
+                 instrument.wrap(lambda e: canvas_m.configure(scrollregion=canvas_m.bbox("all")),
+                                 "param_m.<Configure>"))
     
     ## child widgets
     title_frame = tk.Frame(param_m)
@@ -479,9 +740,6 @@ if __name__ == "__main__":      # Stops bad run of main.py
     wavemaker_frame = tk.Frame(param_m)
     hotstart_frame = tk.Frame(param_m)
     init_frame = tk.Frame(param_m)
-    sponge_frame = tk.Frame(param_m)
-    vessel_frame = tk.Frame(param_m)
-    tide_frame = tk.Frame(param_m)
     
 
     
@@ -537,18 +795,32 @@ if __name__ == "__main__":      # Stops bad run of main.py
     parallel_label = tk.Label(parallel_frame, text = "Parallelization Arguments")
     px_led = LabelEntryD(parallel_frame, "PX")
     py_led = LabelEntryD(parallel_frame, "PY")
-    px_led.set(os.cpu_count() / 2)
+    px_led.set(max(1, os.cpu_count() // 2))
     py_led.set(1)
+    @instrument.timed()
+    def optimize_parallel():
+        '''
+        Replaces PX, PY by the fastest split of the same number of ranks
+        '''
+        best = best_decomposition(mglob_led.get(), nglob_led.get(),
+                                  max(1, px_led.get() * py_led.get()))
+        if best is not None:
+            px_led.set(best.px)
+            py_led.set(best.py)
+            print(f"Recommended {best}")
+    optimize_button = tk.Button(parallel_frame, text = "Optimize", command = optimize_parallel)
     ## parallel pos
     parallel_label.grid(row = 0, columnspan = 3, sticky = "W")
     px_led.entry.configure(width = 5)
     py_led.entry.configure(width = 5)
     px_led.grid(row = 1, column = 0)
     py_led.grid(row = 1, column = 2)
+    optimize_button.grid(row = 1, column = 4)
     ## ttp
     parallel_label_ttp = CreateToolTip(parallel_label, "PX, PY - Processor Numbers in X\nNOTE: Correlates to mpirun -np n (px*py)")
     px_led_ttp = CreateToolTip(px_led.label, "PX - Processor Numbers in X")
     py_led_ttp = CreateToolTip(py_led.label, "PY - Processor Numbers in Y")
+    optimize_ttp = CreateToolTip(optimize_button, "Splits PX*PY ranks into the PX, PY with the lowest predicted time per step")
 
     ### Dimension/Grid Widgets
     dimension_label = tk.Label(dimension_frame, text = "Dimension and Grid Size Arguments")
@@ -574,6 +846,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     screen_int_lef = LabelEntryF(time_frame, text = "Console Interval (s)")
     plot_start_lef = LabelEntryF(time_frame, "Output Start Time (s)")
     # support function for fixed dt
+    @instrument.timed()
     def onCheckFixedDt():
         if fixed_dt_check.get():
             show_dt()
@@ -601,6 +874,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
         dt_lef.hide()
 
     ### Depth Widgets
+    @instrument.timed()
     def onCheckDepth():
         global last_depth_check
         if 'FLAT' in last_depth_check:
@@ -679,6 +953,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     gamma2_lef = LabelEntryF(physics_frame, "Gamma2")
     gamma3_lef = LabelEntryF(physics_frame, "Gamma3")
     beta_lef = LabelEntryF(physics_frame, text = "Beta")
+    @instrument.timed()
     def onCheckViscosityBreaking():
         if viscosity_breaking_check.get():
             show_breaking_entries()
@@ -693,6 +968,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     roller_effect_check = CheckB(physics_frame, text = "Roller Effect",
                                  value = False)
     friction_label = tk.Label(physics_frame, text = "Friction Specification")
+    @instrument.timed()
     def onCheckFrictionMatrix():
         if friction_matrix_check.get():
             friction_matrix_les.grid(row = 14)
@@ -767,6 +1043,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     min_depth_lef.grid(row = 5)
 
     ### Hot Start
+    @instrument.timed()
     def onCheckHotStart():
         if hotstart_check.get():   
             show_hotstart_entries()
@@ -775,12 +1052,18 @@ if __name__ == "__main__":      # Stops bad run of main.py
         resize_scrollbar()  
     hotstart_check = CheckB(hotstart_frame, "Hot Start",
                         value = False, command = onCheckHotStart)
-    filenum_hot_led = LabelEntryD(hotstart_frame, 
-                                  "Initial Enumeration")
-    hotstart_int_lef = LabelEntryF(hotstart_frame,
-                                  "Hot Start Time (s)")
+    filenum_hot_led = Deferred(0)
+    hotstart_int_lef = Deferred(0.0)
+    def build_hotstart_entries():
+        global filenum_hot_led, hotstart_int_lef
+        filenum_hot_led = realize(filenum_hot_led, LabelEntryD(hotstart_frame,
+                                                               "Initial Enumeration"))
+        hotstart_int_lef = realize(hotstart_int_lef, LabelEntryF(hotstart_frame,
+                                                                 "Hot Start Time (s)"))
+    hotstart_section = LazySection(build_hotstart_entries)
     hotstart_check.check.grid(row = 0, sticky = "W")
     def show_hotstart_entries():
+        hotstart_section.ensure()
         filenum_hot_led.grid(row = 1)
         hotstart_int_lef.grid(row = 2)
     def hide_hotstart_entries():
@@ -788,12 +1071,14 @@ if __name__ == "__main__":      # Stops bad run of main.py
         hotstart_int_lef.hide()
 
     ### Initial Condition
+    @instrument.timed()
     def onCheckInit():
         if init_check.get():
             show_init_entries()
         else:
             hide_init_entries()
         resize_scrollbar()  
+    @instrument.timed()
     def onCheckInitMask():
         if init_mask_check.get():
             show_init_mask_entry()
@@ -802,25 +1087,58 @@ if __name__ == "__main__":      # Stops bad run of main.py
         resize_scrollbar()  
     init_check = CheckB(init_frame, "Initial Condition",
                         value = False, command = onCheckInit)
-    init_eta_les = LabelEntryS(init_frame, "Initial Eta File")
-    init_u_les = LabelEntryS(init_frame, "Initial U File")
-    init_v_les = LabelEntryS(init_frame, "Initial V File")
-    init_mask_check = CheckB(init_frame, "Initial Mask",
-                             value = False, command = onCheckInitMask)
-    init_mask_les = LabelEntryS(init_frame, "Mask File")
+    init_eta_les = Deferred("")
+    init_u_les = Deferred("")
+    init_v_les = Deferred("")
+    init_mask_check = Deferred(False)
+    init_mask_les = Deferred("")
+    def build_init_entries():
+        global init_eta_les, init_u_les, init_v_les, init_mask_check, init_mask_les, init_build_button
+        init_eta_les = realize(init_eta_les, LabelEntryS(init_frame, "Initial Eta File"))
+        init_u_les = realize(init_u_les, LabelEntryS(init_frame, "Initial U File"))
+        init_v_les = realize(init_v_les, LabelEntryS(init_frame, "Initial V File"))
+        init_mask_check = realize(init_mask_check, CheckB(init_frame, "Initial Mask",
+                                                          value = False, command = onCheckInitMask))
+        init_mask_les = realize(init_mask_les, LabelEntryS(init_frame, "Mask File"))
+        init_build_button = tk.Button(init_frame, text = "Build Initial Files", command = build_initial)
+    init_section = LazySection(build_init_entries)
+    @instrument.timed()
+    def build_initial():
+        '''
+        Writes the initial condition files named above, eta/u/v from an
+        INI_SOL/INI_REC/INI_GAU wavemaker and the mask from the depth
+        '''
+        p = collect_params()
+        if initial.field_from_params(p) is None and not p.init_mask:
+            print("Select an INI_SOL, INI_REC or INI_GAU wave maker or an initial mask first")
+            return
+        def job(progress, cancel):
+            return initial.write_initial(p, cwd, cancel = cancel,
+                                         progress = lambda f, path: progress(f, f"Writing {os.path.basename(path)}"))
+        def done(paths):
+            for path in paths:
+                print(f"Wrote {path}")
+        run_job("Build Initial Files", job, done)
     
     init_check.check.grid(row = 0, columnspan = 2, sticky = "NW")
     def show_init_entries():
-        init_u_les.grid(row = 1)
-        init_v_les.grid(row = 2)
-        init_mask_check.grid(row = 3)
+        init_section.ensure()
+        init_eta_les.grid(row = 1)
+        init_u_les.grid(row = 2)
+        init_v_les.grid(row = 3)
+        init_mask_check.grid(row = 4)
+        init_build_button.grid(row = 6, columnspan = 2)
     def hide_init_entries():
+        if not init_section.built:
+            return
+        init_eta_les.hide()
         init_u_les.hide()
         init_v_les.hide()
         init_mask_check.hide()
         init_mask_les.hide()
+        init_build_button.grid_forget()
     def show_init_mask_entry():
-        init_mask_les.grid(row = 4)
+        init_mask_les.grid(row = 5)
     def hide_init_mask_entry():
         init_mask_les.hide()
     
@@ -834,6 +1152,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
                         '2D Wave Data (WK_NEW_DATA_2D)', 'Left Boundary Wave Maker (LEFT_BC_IRR)',
                         'Left Boundary Solitary (LEF_SOL)', 'Initial Solitary Wave (INI_SOL)', 
                         'Rectangular Hump (INI_REC)', 'Initial Gaussian Hump (INI_GAU)'))
+    @instrument.timed()
     def onCheckWaveMaker():
         if (isWavemaker.get()):
             show_wavemaker()
@@ -842,54 +1161,142 @@ if __name__ == "__main__":      # Stops bad run of main.py
         resize_scrollbar()  
     wavemaker_check = tk.Checkbutton(wavemaker_frame, text = "Wave Maker",
                                      variable = isWavemaker, command = onCheckWaveMaker)
-    wavemaker_list = tk.Listbox(wavemaker_frame, listvariable = wavemaker_var,
-                                selectmode = tk.SINGLE, height = 4, width = 42)
-    wavemaker_scrollbar = ttk.Scrollbar(wavemaker_frame, orient = tk.VERTICAL,
-                                        command = wavemaker_list.yview)
-    wavemaker_list['yscrollcommand'] = wavemaker_scrollbar
-    # wavemaker Params
-    wavemaker_break_lef = LabelEntryF(wavemaker_frame, text = "Breaking Parameter")
-    xc_wk_lef = LabelEntryF(wavemaker_frame, text = "X (m)")
-    yc_wk_lef = LabelEntryF(wavemaker_frame, text = "Y (m)")
-    ywidth_wk_lef = LabelEntryF(wavemaker_frame, text = "Y Width (m)")
-    tperiod_lef = LabelEntryF(wavemaker_frame, text = "Period (s)")
-    amp_wk_lef = LabelEntryF(wavemaker_frame, text = "Amplitude (m)")
-    dep_wk_lef = LabelEntryF(wavemaker_frame, text = "Water Depth (m)")
-    theta_wk_lef = LabelEntryF(wavemaker_frame, text = "Theta (deg)")
-    time_ramp_lef = LabelEntryF(wavemaker_frame, text = "Time Ramp (s)")
-    freqpeak_lef = LabelEntryF(wavemaker_frame, text = "Peak Freq (1/s)")
-    delta_wk_lef = LabelEntryF(wavemaker_frame, text = "Delta")
-    freqmin_lef = LabelEntryF(wavemaker_frame, text = "Min Freq (1/s)")
-    freqmax_lef = LabelEntryF(wavemaker_frame, text = "Max Freq (1/2)")
-    hmo_lef = LabelEntryF(wavemaker_frame, text = "Hmo (m)")
-    gamma_tma_lef = LabelEntryF(wavemaker_frame, text = "Gamma")
-    theta_peak_lef = LabelEntryF(wavemaker_frame, text = "Theta Peak")
-    nfreq_led = LabelEntryD(wavemaker_frame, text = "Num Freq")
-    ntheta_led = LabelEntryD(wavemaker_frame, text = "Num Theta")
+    # wavemaker Params, stand-ins until build_wavemaker_widgets() runs
+    wavemaker_break_lef = Deferred(cbrk1_lef.get())
+    xc_wk_lef = Deferred(0.0)
+    yc_wk_lef = Deferred(0.0)
+    ywidth_wk_lef = Deferred(0.0)
+    tperiod_lef = Deferred(0.0)
+    amp_wk_lef = Deferred(0.0)
+    dep_wk_lef = Deferred(0.0)
+    theta_wk_lef = Deferred(0.0)
+    time_ramp_lef = Deferred(0.0)
+    freqpeak_lef = Deferred(0.0)
+    delta_wk_lef = Deferred(0.0)
+    freqmin_lef = Deferred(0.0)
+    freqmax_lef = Deferred(0.0)
+    hmo_lef = Deferred(0.0)
+    gamma_tma_lef = Deferred(3.3)
+    theta_peak_lef = Deferred(0.0)
+    nfreq_led = Deferred(45)
+    ntheta_led = Deferred(24)
     equal_energy = tk.BooleanVar(value = False)
-    equal_energy_check = tk.Checkbutton(wavemaker_frame, text = "Equal Energy",
-                                        variable = equal_energy)
-    wavemaker_list.select_set(0)
-    wavemaker_break_lef.set(cbrk1_lef.get())
-    gamma_tma_lef.set(3.3)
-    theta_peak_lef.set(0.0)
-    nfreq_led.set(45)
-    ntheta_led.set(24)
-    ## use Default Checkbutton
+    wave_comp_file_les = Deferred("")
+    num_wave_comp_led = Deferred(0)
+    peak_period_lef = Deferred(0.0)
+    xwavemaker_lef = Deferred(0.0)
+    wid_lef = Deferred(0.0)
     use_defaults_wk = tk.BooleanVar(value = True)
+    def build_wavemaker_widgets():
+        global wavemaker_list, wavemaker_scrollbar, wavemaker_break_lef, xc_wk_lef, yc_wk_lef
+        global ywidth_wk_lef, tperiod_lef, amp_wk_lef, dep_wk_lef, theta_wk_lef, time_ramp_lef
+        global freqpeak_lef, delta_wk_lef, freqmin_lef, freqmax_lef, hmo_lef, gamma_tma_lef
+        global theta_peak_lef, nfreq_led, ntheta_led, equal_energy_check, wave_comp_file_les
+        global num_wave_comp_led, peak_period_lef, xwavemaker_lef, wid_lef
+        global build_wave_comp_button, use_defaults_wk_check
+        wavemaker_list = tk.Listbox(wavemaker_frame, listvariable = wavemaker_var,
+                                    selectmode = tk.SINGLE, height = 4, width = 42)
+        wavemaker_scrollbar = ttk.Scrollbar(wavemaker_frame, orient = tk.VERTICAL,
+                                            command = wavemaker_list.yview)
+        wavemaker_list['yscrollcommand'] = wavemaker_scrollbar
+        wavemaker_break_lef = realize(wavemaker_break_lef, LabelEntryF(wavemaker_frame, text = "Breaking Parameter"))
+        xc_wk_lef = realize(xc_wk_lef, LabelEntryF(wavemaker_frame, text = "X (m)"))
+        yc_wk_lef = realize(yc_wk_lef, LabelEntryF(wavemaker_frame, text = "Y (m)"))
+        ywidth_wk_lef = realize(ywidth_wk_lef, LabelEntryF(wavemaker_frame, text = "Y Width (m)"))
+        tperiod_lef = realize(tperiod_lef, LabelEntryF(wavemaker_frame, text = "Period (s)"))
+        amp_wk_lef = realize(amp_wk_lef, LabelEntryF(wavemaker_frame, text = "Amplitude (m)"))
+        dep_wk_lef = realize(dep_wk_lef, LabelEntryF(wavemaker_frame, text = "Water Depth (m)"))
+        theta_wk_lef = realize(theta_wk_lef, LabelEntryF(wavemaker_frame, text = "Theta (deg)"))
+        time_ramp_lef = realize(time_ramp_lef, LabelEntryF(wavemaker_frame, text = "Time Ramp (s)"))
+        freqpeak_lef = realize(freqpeak_lef, LabelEntryF(wavemaker_frame, text = "Peak Freq (1/s)"))
+        delta_wk_lef = realize(delta_wk_lef, LabelEntryF(wavemaker_frame, text = "Delta"))
+        freqmin_lef = realize(freqmin_lef, LabelEntryF(wavemaker_frame, text = "Min Freq (1/s)"))
+        freqmax_lef = realize(freqmax_lef, LabelEntryF(wavemaker_frame, text = "Max Freq (1/2)"))
+        hmo_lef = realize(hmo_lef, LabelEntryF(wavemaker_frame, text = "Hmo (m)"))
+        gamma_tma_lef = realize(gamma_tma_lef, LabelEntryF(wavemaker_frame, text = "Gamma"))
+        theta_peak_lef = realize(theta_peak_lef, LabelEntryF(wavemaker_frame, text = "Theta Peak"))
+        nfreq_led = realize(nfreq_led, LabelEntryD(wavemaker_frame, text = "Num Freq"))
+        ntheta_led = realize(ntheta_led, LabelEntryD(wavemaker_frame, text = "Num Theta"))
+        equal_energy_check = tk.Checkbutton(wavemaker_frame, text = "Equal Energy",
+                                            variable = equal_energy)
+        wave_comp_file_les = realize(wave_comp_file_les, LabelEntryS(wavemaker_frame, text = "Wave Comp File"))
+        num_wave_comp_led = realize(num_wave_comp_led, LabelEntryD(wavemaker_frame, text = "Num Wave Comp"))
+        peak_period_lef = realize(peak_period_lef, LabelEntryF(wavemaker_frame, text = "Peak Period (s)"))
+        xwavemaker_lef = realize(xwavemaker_lef, LabelEntryF(wavemaker_frame, text = "Crest X (m)"))
+        wid_lef = realize(wid_lef, LabelEntryF(wavemaker_frame, text = "Width (m)"))
+        build_wave_comp_button = tk.Button(wavemaker_frame, text = "Build Wave Comp File",
+                                           command = build_wave_comp)
+        ## use Default Checkbutton
+        use_defaults_wk_check = tk.Checkbutton(wavemaker_frame, text = "Use Defaults",
+                                               variable = use_defaults_wk, command = toggle_defaults_wk)
+        wavemaker_list.select_set(0)
+        wavemaker_list.bind('<<ListboxSelect>>', toggle_wavemaker_entries)
+        wavemaker_list.bind('<<ListboxSelect>>', Live.changed, add = "+")
+    wavemaker_section = LazySection(build_wavemaker_widgets)
+    @instrument.timed()
+    def build_wave_comp():
+        '''
+        Writes the WaveCompFile of the selected wavemaker, from a measured
+        series for WK_TIME_SERIES or from the spectrum values for WK_DATA2D,
+        as a job. A series of one eta column asks for its sample interval
+        '''
+        if wave_comp_file_les.get() == "":
+            wave_comp_file_les.set("wavecomp.txt")
+        path = os.path.join(cwd, wave_comp_file_les.get())
+        if wavemaker == 'WK_TIME_SERIES':
+            series = filedialog.askopenfilename(initialdir = cwd, title = "Open surface elevation series",
+                                                filetypes = (("Text files", "*.txt *.dat"), ("All files", "*")))
+            if not series:
+                return
+            try:
+                columns = spectrum.series_columns(series)
+            except (OSError, ValueError) as e:
+                print(e)
+                return
+            dt = None
+            if columns == 1:        # eta only, the sample interval is not in the file
+                dt = simpledialog.askfloat("Sample interval", "Seconds between the samples of the series",
+                                           minvalue = 1e-9, parent = m)
+                if dt is None:
+                    return
+            num_comp = num_wave_comp_led.get() or 100
+            def job(progress, cancel):
+                progress(None, f"Reading {os.path.basename(series)}")
+                eta, step = spectrum.load_series(series, dt)
+                progress(None, "Wave components")
+                per, amp, pha = spectrum.wave_components(eta, step, num_comp)
+                return spectrum.write_wave_comp(path, per, amp, pha), len(per), spectrum.peak_period(per, amp)
+            def done(result):
+                written, count, period = result
+                num_wave_comp_led.set(count)
+                peak_period_lef.set(period)
+                print(f"Wrote {written}")
+            run_job("Wave Comp File", job, done)
+        else:
+            p = collect_params()
+            try:
+                freq, theta, amp = spectrum.spectrum_from_params(p)
+            except ValueError as e:
+                print(e)
+                return
+            run_job("Wave Comp File",
+                    lambda progress, cancel: spectrum.write_data2d(path, freq, theta, amp, 1.0 / p.freqpeak),
+                    lambda written: print(f"Wrote {written}"))
+    @instrument.timed()
     def toggle_defaults_wk():
         toggle_wavemaker_entries(None)
         resize_scrollbar()
-    use_defaults_wk_check = tk.Checkbutton(wavemaker_frame, text = "Use Defaults",
-                                           variable = use_defaults_wk, command = toggle_defaults_wk)
     ## wavemaker pos
     wavemaker_check.grid(row = 0, columnspan = 2, sticky = tk.N + tk.W)
     def show_wavemaker():
+        wavemaker_section.ensure()
         wavemaker_break_lef.grid(row = 1)
         wavemaker_list.grid(row = 2, columnspan = 2)
         wavemaker_scrollbar.grid(row = 2, column = 3, sticky = "NSE")
         toggle_wavemaker_entries("")
     def hide_wavemaker():
+        if not wavemaker_section.built:
+            return
         wavemaker_break_lef.hide()
         wavemaker_list.grid_forget()
         wavemaker_scrollbar.grid_forget()
@@ -916,6 +1323,13 @@ if __name__ == "__main__":      # Stops bad run of main.py
         ntheta_led.hide()
         equal_energy_check.grid_forget()
         use_defaults_wk_check.grid_forget()
+        wave_comp_file_les.hide()
+        num_wave_comp_led.hide()
+        peak_period_lef.hide()
+        build_wave_comp_button.grid_forget()
+        xwavemaker_lef.hide()
+        wid_lef.hide()
+    @instrument.timed()
     def toggle_wavemaker_entries(event):
         global wavemaker
         hide_wavemaker_entries()
@@ -967,8 +1381,30 @@ if __name__ == "__main__":      # Stops bad run of main.py
         elif 'WK_NEW_DATA_2D' in curwavemaker:
             wavemaker = "WK_NEW_DATA_2D"
             pass
+        elif 'WK_TIME_SERIES' in curwavemaker:
+            wavemaker = "WK_TIME_SERIES"
+            xc_wk_lef.grid(row = 3)
+            ywidth_wk_lef.grid(row = 4)
+            dep_wk_lef.grid(row = 5)
+            wave_comp_file_les.grid(row = 6)
+            num_wave_comp_led.grid(row = 7)
+            peak_period_lef.grid(row = 8)
+            build_wave_comp_button.grid(row = 9, columnspan = 2)
         elif 'WK_DATA2D' in curwavemaker:
             wavemaker = "WK_DATA2D"
+            xc_wk_lef.grid(row = 3)
+            ywidth_wk_lef.grid(row = 4)
+            dep_wk_lef.grid(row = 5)
+            freqpeak_lef.grid(row = 6)
+            freqmin_lef.grid(row = 7)
+            freqmax_lef.grid(row = 8)
+            hmo_lef.grid(row = 9)
+            gamma_tma_lef.grid(row = 10)
+            theta_peak_lef.grid(row = 11)
+            nfreq_led.grid(row = 12)
+            ntheta_led.grid(row = 13)
+            wave_comp_file_les.grid(row = 14)
+            build_wave_comp_button.grid(row = 15, columnspan = 2)
         elif 'WK_NEW_DATA_2D' in curwavemaker:
             wavemaker = 'WK_NEW_DATA_2D'
         elif 'LEFT_BC_IRR' in curwavemaker:
@@ -979,14 +1415,16 @@ if __name__ == "__main__":      # Stops bad run of main.py
             pass
         elif 'INI_SOL' in curwavemaker:
             wavemaker = "INI_SOL"
-            pass
-        elif 'INI_REC' in curwavemaker:
-            wavemaker = "INI_REC"
-            pass
-        elif 'INI_GAU' in curwavemaker:
-            wavemaker = "INI_GAU"
+            amp_wk_lef.grid(row = 3)
+            dep_wk_lef.grid(row = 4)
+            xwavemaker_lef.grid(row = 5)
+        elif 'INI_REC' in curwavemaker or 'INI_GAU' in curwavemaker:
+            wavemaker = "INI_REC" if 'INI_REC' in curwavemaker else "INI_GAU"
+            amp_wk_lef.grid(row = 3)
+            xc_wk_lef.grid(row = 4)
+            yc_wk_lef.grid(row = 5)
+            wid_lef.grid(row = 6)
         resize_scrollbar()
-    wavemaker_list.bind('<<ListboxSelect>>', toggle_wavemaker_entries)
 
     ### periodic boundary condition widgets
     pbc_check = CheckB(pbc_frame, "Periodic Boundary Condition")
@@ -997,6 +1435,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     result_folder_les = LabelEntryS(output_frame, "Output Folder")
     result_folder_les.set("output/")
     number_stations_led = LabelEntryD(output_frame, "Number of Stations")
+    @instrument.timed()
     def onWriteNumberStations(var, index, mode):
         if (number_stations_led.str.get().strip().isdigit()):
                 number_stations_led.value = int(number_stations_led.str.get())
@@ -1020,6 +1459,32 @@ if __name__ == "__main__":      # Stops bad run of main.py
     output_scrollbar = ttk.Scrollbar(output_frame, orient = tk.VERTICAL,
                                      command = output_list.yview)
     output_list['yscrollcommand'] = output_scrollbar
+    output_list.bind('<<ListboxSelect>>', Live.changed)
+    @instrument.timed()
+    def place_stations():
+        '''
+        Snaps the gauges of a coordinate file (x y in metres) to the
+        nearest wet cells, writes STATION_FILE and sets NumStations
+        '''
+        points = filedialog.askopenfilename(initialdir = cwd, title = "Open station coordinates (x y)",
+                                            filetypes = (("Text files", "*.txt *.dat *.csv"), ("All files", "*")))
+        if not points:
+            return
+        p = collect_params()
+        name = station_file_lef.get() or "stations.txt"
+        def job(progress, cancel):
+            progress(None, "Placing stations")
+            x, y = stations.from_coordinates(points)
+            return stations.place_stations(p, x, y, name, cwd)
+        def done(result):
+            p, dropped = result
+            number_stations_led.set(p.num_stations)
+            station_file_lef.set(p.station_file)
+            print(f"Wrote {p.num_stations} stations to {p.station_file}"
+                  + (f", dropped {dropped} (outside the grid, dry or repeated)" if dropped else ""))
+        run_job("Place Stations", job, done)
+    stations_button = tk.Button(output_frame, text = "Place Stations...", command = place_stations)
+    stations_ttp = CreateToolTip(stations_button, "Snaps a file of x y gauge positions (m) to the nearest wet cells and writes the station file, see stations.py for transects and contours")
     
     output_label.grid(row = 0, columnspan = 2,
                       sticky = "W")
@@ -1027,6 +1492,7 @@ if __name__ == "__main__":      # Stops bad run of main.py
     result_folder_les.entry.grid(row = 1, column = 1)
     number_stations_led.grid(row = 2)
     output_res_led.grid(row = 3)
+    stations_button.grid(row = 4, column = 1)
     output_list.grid(row = 6, columnspan = 3)
     output_scrollbar.grid(row = 6, column = 3, sticky = "NSW")
     def show_number_station_file():
@@ -1045,68 +1511,192 @@ if __name__ == "__main__":      # Stops bad run of main.py
     warnings_scrollbar = ttk.Scrollbar(warnings_frame, orient = tk.VERTICAL,
                                         command = warnings_text.yview)
     warnings_text['yscrollcommand'] = warnings_scrollbar
-    # main warnings logic function
-    def validate():
-        debug()
-        counter = 0
-        # support function
-        def insert(message):
-            nonlocal counter
-            warnings_text.insert(tk.END, "- " + message + "\n")
-            counter += 1
+    scan_status = tk.StringVar(value = "")
+    scan_status_label = tk.Label(warnings_frame, textvariable = scan_status)
+    budget_lef = LabelEntryF(warnings_frame, "Core-hour Budget")
+    budget_lef.set(0.0)
+    quota_lef = LabelEntryF(warnings_frame, "Output Quota (GB)")
+    quota_lef.set(0.0)
+    mtbf_lef = LabelEntryF(warnings_frame, "Node MTBF (h)")
+    mtbf_lef.set(checkpoint.NODE_MTBF_HOURS)
+    checkpoint_bw_lef = LabelEntryF(warnings_frame, "Checkpoint Write (MB/s)")
+    checkpoint_bw_lef.set(checkpoint.BANDWIDTH / 1e6)
+    # main warnings logic function, the checks live in validation.py,
+    # validator keeps their results and reruns only the stale ones
+    validator = validation.Validator()
+    validate_delay = 400                # ms without changes before validating
+    validate_job = None
+    @instrument.timed()
+    def schedule_validation():
+        '''
+        Validates once the widgets stop changing for validate_delay ms
+        '''
+        global validate_job
+        if validate_job is not None:
+            m.after_cancel(validate_job)
+        validate_job = m.after(validate_delay, validate)
+    def validation_settings():
+        return {"root": cwd, "budget": budget_lef.get(),
+                "quotas": validation.Quotas(bytes = quota_lef.get() * 1024 ** 3 or None),
+                "mtbf": mtbf_lef.get(), "checkpoint_bandwidth": checkpoint_bw_lef.get() * 1e6}
+    def show_warnings(results):
+        warnings = [w for check, result in results if result for w in result[0]]
+        notes = [n for check, result in results if result for n in result[1]]
         warnings_text.config(state = tk.NORMAL)
         warnings_text.delete('1.0', tk.END)
-        ### Insert validation checks here 
-        ## Model Validity Test
-        if (mglob_led.get() == 0 or nglob_led.get() == 0
-            or dx_lef.get() == 0 or dy_lef.get() == 0):
-            insert("Global dimensions evaluate to 0")
-        # wavemaker validation
-        if isWavemaker.get():
-            match wavemaker:
-                case 'WK_REG':
-                    # Bounds Checks
-                    if (xc_wk_lef.get() > mglob_led.get() * dx_lef.get()):
-                        insert("Out of Bounds x coordinate for wave maker")
-                    if (yc_wk_lef.get() > nglob_led.get() * dy_lef.get()):
-                        insert("Out of Bounds y coordinate for wave maker")
-                    if (ywidth_wk_lef.get() > nglob_led.get() * dy_lef.get()):
-                        insert("Invalid wave maker y width")
-                    # Wave Validity
-                    wavelength = 9.8 * tperiod_lef.get() * tperiod_lef.get() / 2 / 3.14
-                    if (isFlat or isSlope) and wavelength > 2 * depth_flat_lef.get():
-                        insert("Wave maker produces waves outside of resolution (lambda > 2h)")
-                case 'WK_IRR':
-                    pass
-        ## File Checks
-        if (isDepthData.get() and depth_data_les.get() == ""):
-            insert("Depth data file not specified")
-        if (friction_matrix_check.get() and friction_matrix_les.get() == ""):
-            insert("Friction matrix file not specified")
-        ### Cleanup and warnings counter
-        warnings_text.insert("1.0", f"{counter :d} warnings\n")
+        warnings_text.insert(tk.END, f"{len(warnings) :d} warnings\n")
+        for message in warnings:
+            warnings_text.insert(tk.END, "- " + message + "\n")
+        for message in notes:
+            warnings_text.insert(tk.END, "  " + message + "\n")
         warnings_text.config(state = tk.DISABLED)
-    warnings_button.configure(command = validate)
+    @instrument.timed()
+    def validate():
+        global validate_job
+        validate_job = None
+        p = collect_params()
+        settings = validation_settings()
+        results = validator.run(p, settings, expensive = False)
+        show_warnings(results)
+        stale = [check for check, result in results if result is None]
+        if stale:
+            start_grid_scan(p, settings, stale)
+    # grid file scan and run cost estimate, run on a worker thread and
+    # report through scan_queue
+    scan_queue = queue.Queue()
+    scan_cancel = threading.Event()     # event of the running scan
+    scan_poll = None                    # m.after() id of the pending poll_grid_scan
+    def start_grid_scan(p, settings, checks):
+        global scan_cancel, scan_poll
+        scan_cancel.set()               # stop a scan that is still running
+        cancel = scan_cancel = threading.Event()
+        def progress(name, fraction):
+            scan_queue.put((cancel, "progress", f"{name} file {fraction:.0%}"))
+        def work():
+            done = []
+            try:
+                for check in checks:
+                    start = time.perf_counter()
+                    try:
+                        result = check.run(p, dict(settings, progress = progress, cancel = cancel))
+                    except (OSError, ValueError) as e:
+                        result = ([f"Grid file scan failed: {e}"], [])
+                    done.append((check, check.key(p, settings), result, time.perf_counter() - start))
+            except validation.ScanCancelled:
+                pass                    # replaced by a newer scan, its message is ignored
+            finally:                    # also on errors, so the status line is cleared
+                scan_queue.put((cancel, "done", (p, settings, done)))
+        threading.Thread(target = work, daemon = True).start()
+        scan_status.set("Scanning grid files")
+        if scan_poll is not None:       # one poll loop serves every scan
+            m.after_cancel(scan_poll)
+        scan_poll = m.after(100, poll_grid_scan)
+    @instrument.timed()
+    def poll_grid_scan():
+        global scan_poll
+        scan_poll = None
+        while not scan_queue.empty():
+            owner, kind, data = scan_queue.get_nowait()
+            if owner is not scan_cancel:    # left over from a replaced scan
+                continue
+            if kind == "progress":
+                scan_status.set("Scanning " + data)
+                continue
+            p, settings, done = data
+            for check, key, result, seconds in done:
+                validator.store(check, key, result, seconds)
+            show_warnings(validator.run(p, settings, expensive = False))
+            scan_status.set("")
+            return
+        scan_poll = m.after(100, poll_grid_scan)
+    @instrument.timed()
+    def plan_hotstart():
+        '''
+        Turns hot start on with the HOTSTART_INTV that minimizes the
+        expected wall time, see checkpoint.py
+        '''
+        p = collect_params()
+        run = validation.run_estimate(p, cwd)
+        plan = checkpoint.plan_checkpoints(p, run.seconds if run else None, node_mtbf_hours = mtbf_lef.get(),
+                                           bandwidth = checkpoint_bw_lef.get() * 1e6 or checkpoint.BANDWIDTH)
+        if plan is None:
+            return
+        hotstart_check.set(True)
+        onCheckHotStart()
+        hotstart_int_lef.set(round(plan.hotstart_intv, 3))
+        print(f"Hot start {plan}")
+    plan_hotstart_button = tk.Button(warnings_frame, text = "Plan Hot Start", command = plan_hotstart)
+    @instrument.timed()
+    def validate_button():
+        debug()
+        validate()
+    warnings_button.configure(command = validate_button)
     # position
     warnings_button.grid(columnspan = 2)
     warnings_text.grid(row = 1)
     warnings_scrollbar.grid(row = 1, column = 2,
                             sticky = 'NSE')
+    scan_status_label.grid(row = 2, sticky = "W")
+    budget_lef.grid(row = 3)
+    budget_ttp = CreateToolTip(budget_lef.label, "Warns when the estimated run cost exceeds this many core-hours, 0 for no limit")
+    quota_lef.grid(row = 4)
+    quota_ttp = CreateToolTip(quota_lef.label, "Warns when the selected outputs would write more than this to the result folder, 0 for no limit")
+    mtbf_lef.grid(row = 5)
+    mtbf_ttp = CreateToolTip(mtbf_lef.label, "Mean time between failures of one compute node, sets the recommended hot start interval")
+    checkpoint_bw_lef.grid(row = 6)
+    checkpoint_bw_ttp = CreateToolTip(checkpoint_bw_lef.label, "Filesystem write rate for hot start files")
+    plan_hotstart_button.grid(row = 7, columnspan = 2)
 
     # input generation/params widgets and frame
     overwrite_cb = CheckB(igp_frame, text = "Overwrite?", value = True)
     gen_button = tk.Button(igp_frame, text = "Generate",
                            width = 25, height = 3,
                            command = generate)
+    open_button = tk.Button(igp_frame, text = "Open...",
+                            width = 25, command = open_input)
+    sweep_frame = tk.Frame(igp_frame)
+    sweep_les = LabelEntryS(sweep_frame, "Sweep")
+    job_progress = ttk.Progressbar(igp_frame, orient = tk.HORIZONTAL, length = 180,
+                                   mode = "determinate", maximum = 1.0)
+    job_status = tk.StringVar(value = "")
+    job_status_label = tk.Label(igp_frame, textvariable = job_status)
+    cancel_button = tk.Button(igp_frame, text = "Cancel", width = 25,
+                              state = tk.DISABLED, command = cancel_job)
     gen_button.grid(row = 1)
+    open_button.grid(row = 2)
     overwrite_cb.grid(row = 0)
+    sweep_frame.grid(row = 3)
+    sweep_les.grid(row = 0)
+    job_progress.grid(row = 4)
+    job_status_label.grid(row = 5)
+    cancel_button.grid(row = 6)
 
     overwrite_check_ttp = CreateToolTip(overwrite_cb.check, "Overwrites input.txt file when checked")
+    sweep_ttp = CreateToolTip(sweep_les.label, "KEY=V1,V2; KEY=V3,V4 writes every combination to the sweep folder, unchecking Overwrite? skips cases already written")
+    cancel_ttp = CreateToolTip(cancel_button, "Stops the running generation, files already written are kept whole")
     
     def debug_print():
         print(time_scheme_combo.get())
+        if instrument.enabled():
+            print(instrument.RECORDER.report())
+
+    @instrument.timed()
+    def report_startup():
+        '''
+        Prints the time from the first line of main.py to the first paint
+        of the window, lazily built sections are not included. With
+        --exit-after-startup the window closes right after (benchmark.py)
+        '''
+        m.update_idletasks()
+        print(f"Startup: {time.perf_counter() - STARTUP:.3f} s to first paint "
+              f"({widgets_built - STARTUP:.3f} s to build the widgets)", flush = True)
+        if "--exit-after-startup" in sys.argv[1:]:
+            m.destroy()
 
     canvas_m.create_window((0, 0), window=param_m, anchor="nw")
+    Live.callback = schedule_validation     # live validation from here on
+    widgets_built = time.perf_counter()
+    m.after_idle(report_startup)
     m.mainloop()
 
 
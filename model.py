@@ -0,0 +1,195 @@
+import dataclasses          # plain data object for the input parameters
+from dataclasses import dataclass, field
+
+### model.py project structure:
+# InputParams, the widget-free description of one FUNWAVE-TVD input.txt
+# Helper Functions for converting between FUNWAVE keys and InputParams
+
+# FUNWAVE wavemaker types known to the generator
+WAVEMAKERS = ('WK_REG', 'WK_IRR', 'WK_NEW_IRR', 'JON_2D', 'JON_1D', 'TMA_1D',
+              'WK_TIME_SERIES', 'WK_DATA2D', 'WK_NEW_DATA_2D', 'WK_LEFT_BC_IRR',
+              'LEF_SOL', 'INI_SOL', 'INI_REC', 'INI_GAU')
+
+# output fields, in the order they are listed in the GUI
+OUTPUT_FIELDS = ('U', 'V', 'ETA', 'MASK', 'MASK9', 'DEPTH_OUT', 'SourceX', 'SourceY',
+                 'P', 'Q', 'Fx', 'Fy', 'Gx', 'Gy', 'AGE', 'HMAX', 'HMIN', 'UMAX',
+                 'VORMAX', 'MFMAX', 'OUT_Time', 'WaveHeight', 'OUT_METEO',
+                 'ROLLER', 'UNDERTOW', 'OUT_NU')
+
+def _key(key, default):
+    '''
+    Shorthand for a dataclass field that is written to input.txt as KEY
+    '''
+    return field(default = default, metadata = {"key": key})
+
+###############################
+#### Model
+@dataclass
+class InputParams:
+    '''InputParams Class.
+    Plain data object holding every value generate() writes to input.txt.
+    Field names are lower case versions of the FUNWAVE keys, the FUNWAVE
+    key of each field is stored in its metadata (see KEYS).
+
+    Example use case:
+    |   from model import InputParams
+    |   from writer import write_input
+    |
+    |   p = InputParams(mglob = 500, nglob = 500, tperiod = 10.0)
+    |   p = p.replace(Tperiod = 12.0)             # FUNWAVE keys work too
+    |   write_input(p, "input.txt")
+    '''
+    ## title
+    title: str = _key("TITLE", "model1")
+    ## parallel info
+    px: int = _key("PX", 1)
+    py: int = _key("PY", 1)
+    ## depth
+    depth_type: str = _key("DEPTH_TYPE", "FLAT")
+    depth_flat: float = _key("DEPTH_FLAT", 10.0)
+    slope: float = _key("SLP", 0.05)
+    xslope: float = _key("Xslp", 400.0)
+    depth_file: str = _key("DEPTH_FILE", "depth.txt")
+    ## print
+    result_folder: str = _key("RESULT_FOLDER", "output/")
+    ## dimension
+    mglob: int = _key("Mglob", 0)
+    nglob: int = _key("Nglob", 0)
+    dx: float = _key("DX", 1.0)
+    dy: float = _key("DY", 1.0)
+    ## time
+    total_time: float = _key("TOTAL_TIME", 300.0)
+    plot_intv: float = _key("PLOT_INTV", 1.0)
+    screen_intv: float = _key("SCREEN_INTV", 1.0)
+    plot_start: float = _key("PLOT_START", 0.0)
+    fixed_dt: bool = _key("FIXED_DT", False)
+    dt: float = _key("DT_fixed", 1.0)
+    ## hot start
+    hot_start: bool = _key("HOT_START", False)
+    filenum_hotstart: int = _key("FileNumber_HOTSTART", 0)
+    hotstart_intv: float = _key("HOTSTART_INTV", 0.0)
+    ## initial condition
+    init: bool = _key("INI_UVZ", False)
+    eta_file: str = _key("ETA_FILE", "")
+    u_file: str = _key("U_FILE", "")
+    v_file: str = _key("V_FILE", "")
+    init_mask: bool = _key("INI_MASK", False)
+    mask_file: str = _key("MASK_FILE", "")
+    ## physics
+    dispersion: bool = _key("DISPERSION", True)
+    gamma1: float = _key("Gamma1", 1.0)
+    gamma2: float = _key("Gamma2", 1.0)
+    gamma3: float = _key("Gamma3", 1.0)
+    beta_ref: float = _key("Beta_ref", -0.531)
+    viscosity_breaking: bool = _key("VISCOSITY_BREAKING", False)
+    cbrk1: float = _key("Cbrk1", 0.45)
+    cbrk2: float = _key("Cbrk2", 0.35)
+    swe_eta_dep: float = _key("SWE_ETA_DEP", 0.8)
+    roller_effect: bool = _key("ROLLER_EFFECT", False)
+    ## friction
+    cd_fixed: float = _key("Cd_fixed", 0.0)
+    friction_matrix: bool = _key("FRICTION_MATRIX", False)
+    friction_file: str = _key("FRICTION_FILE", "")
+    show_breaking: bool = _key("SHOW_BREAKING", False)
+    wavemaker_cbrk: float = _key("WAVEMAKER_cbrk", 0.45)
+    ## numerics
+    time_scheme: str = _key("Time_Scheme", "Rugne_Kutta")
+    high_order: str = _key("HIGH_ORDER", "FOURTH")
+    cfl: float = _key("CFL", 0.5)
+    froude_cap: float = _key("FroudeCap", 3.0)
+    min_depth: float = _key("MinDepth", 0.1)
+    ## wavemaker, empty string means no wavemaker
+    wavemaker: str = _key("WAVEMAKER", "")
+    dep_wk: float = _key("DEP_WK", 0.0)
+    xc_wk: float = _key("Xc_WK", 0.0)
+    yc_wk: float = _key("Yc_WK", 0.0)
+    ywidth_wk: float = _key("Ywidth_WK", 0.0)
+    tperiod: float = _key("Tperiod", 0.0)
+    amp_wk: float = _key("AMP_WK", 0.0)
+    theta_wk: float = _key("Theta_WK", 0.0)
+    time_ramp: float = _key("Time_ramp", 0.0)
+    delta_wk: float = _key("Delta_WK", 0.0)
+    freqpeak: float = _key("FreqPeak", 0.0)
+    freqmin: float = _key("FreqMin", 0.0)
+    freqmax: float = _key("FreqMax", 0.0)
+    hmo: float = _key("Hmo", 0.0)
+    gamma_tma: float = _key("GammaTMA", 3.3)
+    theta_peak: float = _key("ThetaPeak", 0.0)
+    nfreq: int = _key("Nfreq", 45)
+    ntheta: int = _key("Ntheta", 24)
+    equal_energy: bool = _key("EqualEnergy", False)
+    wave_comp_file: str = _key("WaveCompFile", "")
+    num_wave_comp: int = _key("NumWaveComp", 0)
+    peak_period: float = _key("PeakPeriod", 0.0)
+    xwavemaker: float = _key("XWAVEMAKER", 0.0)
+    wid: float = _key("WID", 0.0)
+    ## periodic boundary condition
+    periodic: bool = _key("PERIODIC", False)
+    ## output
+    num_stations: int = _key("NumStations", 0)
+    station_file: str = _key("STATION_FILE", "")
+    output_res: int = _key("OUTPUT_RES", 1)
+    outputs: tuple = _key("OUTPUTS", ())
+
+    def replace(self, **changes):
+        '''
+        Returns a copy with changes applied, changes may be given by field
+        name or FUNWAVE key
+        '''
+        return dataclasses.replace(self, **{attr_name(k): coerce(k, v) for k, v in changes.items()})
+    def to_dict(self):
+        return dataclasses.asdict(self)
+    @classmethod
+    def from_dict(cls, d):
+        '''
+        Builds InputParams from a dict keyed by field name or FUNWAVE key,
+        missing values are left at their defaults
+        '''
+        return cls().replace(**d)
+
+###############################
+### Helper Functions
+FIELDS = {f.name: f for f in dataclasses.fields(InputParams)}
+KEYS = {f.metadata["key"]: f.name for f in FIELDS.values()}   # FUNWAVE key -> field name
+_LOWER_KEYS = {k.lower(): name for k, name in KEYS.items()}
+
+def attr_name(key):
+    '''
+    This function maps a field name or a FUNWAVE key (any case) to
+    the InputParams field name, raises KeyError if unknown
+    '''
+    if key in FIELDS:
+        return key
+    if key in KEYS:
+        return KEYS[key]
+    if key.lower() in _LOWER_KEYS:
+        return _LOWER_KEYS[key.lower()]
+    raise KeyError(f"Unknown input parameter {key}")
+
+def logical(value):
+    '''
+    This function converts a FUNWAVE logical (T/F) or any other value to bool
+    '''
+    if isinstance(value, str):
+        return value.strip().upper() in ("T", "TRUE", "1", "YES")
+    return bool(value)
+
+def coerce(key, value):
+    '''
+    This function converts value to the type of the field named by key.
+    Strings are accepted for every type, so values read from the command
+    line or an input file can be passed straight through.
+    For example, coerce("HOT_START", "T") returns True
+    '''
+    f = FIELDS[attr_name(key)]
+    if f.type is bool or f.type == "bool":
+        return logical(value)
+    if f.type is int or f.type == "int":
+        return int(float(value)) if isinstance(value, str) else int(value)
+    if f.type is float or f.type == "float":
+        return float(value)
+    if f.type is tuple or f.type == "tuple":
+        if isinstance(value, str):
+            return tuple(v for v in value.replace(",", " ").split())
+        return tuple(value)
+    return str(value).strip() if isinstance(value, str) else str(value)
@@ -0,0 +1,81 @@
+import math
+
+### output_volume.py project structure:
+# OutputVolume/predict_output(), bytes, files and write bandwidth of the
+# fields selected in OUTPUTS for the ASCII and binary output modes
+#
+# FUNWAVE writes one file per selected field every PLOT_INTV from
+# PLOT_START to TOTAL_TIME, each holding the grid subsampled by OUTPUT_RES.
+
+# bytes per value written, ASCII values are E16.6 text
+VALUE_BYTES = {"ASCII": 16, "BINARY": 8}
+
+###############################
+#### Output Volume
+class OutputVolume:
+    '''OutputVolume Class.
+    Predicted output of one run in one output mode, see predict_output()
+
+    Attributes:
+        mode: "ASCII" or "BINARY"
+        frames: snapshots written per field
+        files: files written to RESULT_FOLDER
+        bytes: total bytes written
+        frame_bytes: bytes written at every PLOT_INTV
+        bandwidth: sustained write rate over the run (bytes/s), None
+                   without a wall time estimate
+    '''
+    def __init__(self, mode, frames, files, frame_bytes, seconds = None) -> None:
+        self.mode = mode
+        self.frames = frames
+        self.files = files
+        self.frame_bytes = frame_bytes
+        self.bytes = frames * frame_bytes
+        self.bandwidth = self.bytes / seconds if seconds else None
+    def __repr__(self):
+        text = f"{self.mode}: {human_bytes(self.bytes)} in {self.files} files"
+        if self.bandwidth is not None:
+            text += f", {human_bytes(self.bandwidth)}/s sustained"
+        return text
+
+###############################
+### Helper Functions
+def human_bytes(n):
+    '''
+    This function formats a byte count, e.g. 1536 -> "1.5 KB"
+    '''
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(n) < 1024 or unit == "TB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n:.0f} B"
+        n /= 1024.0
+
+def frame_count(p):
+    '''
+    This function returns how many snapshots FUNWAVE writes per field
+    '''
+    if p.plot_intv <= 0 or p.total_time < p.plot_start:
+        return 0
+    return math.floor((p.total_time - p.plot_start) / p.plot_intv) + 1
+
+def output_grid(p):
+    '''
+    This function returns the (nx, ny) size of one output snapshot
+    '''
+    res = max(1, p.output_res)
+    return math.ceil(p.mglob / res), math.ceil(p.nglob / res)
+
+def predict_output(p, mode = "ASCII", seconds = None):
+    '''
+    This function returns the OutputVolume of InputParams p in mode
+    (a key of VALUE_BYTES). seconds is the predicted wall time of the
+    run (see estimate.estimate_run()), used for the bandwidth.
+    '''
+    nx, ny = output_grid(p)
+    frames = frame_count(p)
+    value_bytes = VALUE_BYTES[mode]
+    if mode == "ASCII":
+        snapshot = (nx * value_bytes + 1) * ny      # one line per row
+    else:
+        snapshot = nx * ny * value_bytes
+    fields = len(p.outputs)
+    return OutputVolume(mode, frames, frames * fields, fields * snapshot, seconds)
@@ -0,0 +1,269 @@
+import argparse             # command line interface
+import math
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # streaming block reductions
+
+from decomposition import best_decomposition, valid
+from extract import read_station_file
+from grid import read_blocks, write_blocks
+from reader import load_params
+from stations import write_stations
+from writer import write_input
+
+### preview.py project structure:
+# Helper Functions for the window and grid of a preview case
+# coarsen_blocks()/crop_blocks(), block reductions of (j0, block) row blocks,
+#   one input block in memory at a time
+# write_preview(), a coarsened and/or cropped copy of a case: DEPTH_FILE,
+#   FRICTION_FILE, ETA/U/V/MASK_FILE, STATION_FILE and a matching input.txt
+# Command line interface, see `python preview.py -h`
+#
+# Example use case:
+# |   python preview.py input.txt preview_x4 --factor 4
+# |   python preview.py input.txt preview_wk --around-wavemaker 800,400
+# writes a 4x coarser copy of the case, and a full resolution copy of the
+# 800 m x 400 m window centered on the wavemaker.
+#
+# A coarse cell is the mean of factor x factor fine cells (fewer on the
+# last row and column), so coarse cell k sits (factor - 1) / 2 fine cells
+# off the x = k * DX of the coarse grid, within half a coarse cell. A crop
+# keeps x and y in metres from the corner of the window, so Xc_WK, Yc_WK,
+# XWAVEMAKER and Xslp move with it.
+
+FORMATS = {"depth": "%.4f", "friction": "%.6f", "eta": "%.6f", "u": "%.6f", "v": "%.6f", "mask": "%d"}
+
+###############################
+### Helper Functions
+def _reduce(rows, factor, starts, how):
+    '''
+    Returns the reduction of every factor x factor tile of rows, rows
+    holds whole tiles in y except maybe the last one
+    '''
+    row_starts = np.arange(0, rows.shape[0], factor)
+    if how == "min":
+        return np.minimum.reduceat(np.minimum.reduceat(rows, row_starts, axis = 0), starts, axis = 1)
+    if how == "max":
+        return np.maximum.reduceat(np.maximum.reduceat(rows, row_starts, axis = 0), starts, axis = 1)
+    sums = np.add.reduceat(np.add.reduceat(rows, row_starts, axis = 0), starts, axis = 1)
+    heights = np.diff(np.append(row_starts, rows.shape[0]))
+    widths = np.diff(np.append(starts, rows.shape[1]))
+    mean = sums / np.outer(heights, widths)
+    return np.rint(mean) if how == "majority" else mean
+
+def coarse_size(n, factor):
+    return math.ceil(n / factor)
+
+def window_cells(p, x0, x1, y0, y1):
+    '''
+    This function returns the cells (i0, i1, j0, j1) of InputParams p that
+    cover x0 <= x <= x1, y0 <= y <= y1 (m), clipped to the grid. i1 and j1
+    are exclusive
+    '''
+    i0 = max(0, math.floor(x0 / p.dx))
+    i1 = min(p.mglob, math.ceil(x1 / p.dx) + 1)
+    j0 = max(0, math.floor(y0 / p.dy))
+    j1 = min(p.nglob, math.ceil(y1 / p.dy) + 1)
+    if i1 - i0 < 1 or j1 - j0 < 1:
+        raise ValueError(f"window {x0:g}..{x1:g} x {y0:g}..{y1:g} m misses the grid")
+    return i0, i1, j0, j1
+
+def wavemaker_window(p, length, width):
+    '''
+    This function returns the cells (see window_cells()) of the length x
+    width (m) window of InputParams p centered on its wavemaker
+    '''
+    x = p.xwavemaker if p.wavemaker in ("INI_SOL", "LEF_SOL") else p.xc_wk
+    return window_cells(p, x - length / 2, x + length / 2, p.yc_wk - width / 2, p.yc_wk + width / 2)
+
+###############################
+#### Block Reductions
+def coarsen_blocks(blocks, mglob, factor, how = "mean"):
+    '''
+    This function yields (j0, block) of the grid given by (j0, block) row
+    blocks of mglob columns, reduced over factor x factor tiles with how:
+    "mean", "min", "max" or "majority" (the mean rounded, for 0/1 masks,
+    ties go dry). Rows left over from one block wait for the next, so
+    any block size works.
+    '''
+    starts = np.arange(0, mglob, factor)
+    carry = None
+    jc = 0
+    for j0, block in blocks:
+        rows = np.asarray(block, dtype = np.float64)
+        if carry is not None:
+            rows = np.concatenate((carry, rows))
+        n = rows.shape[0] // factor * factor
+        carry = rows[n:] if n < rows.shape[0] else None
+        if n:
+            out = _reduce(rows[:n], factor, starts, how)
+            yield jc, out
+            jc += out.shape[0]
+    if carry is not None:
+        yield jc, _reduce(carry, factor, starts, how)
+
+def crop_blocks(blocks, i0, i1, j0, j1):
+    '''
+    This function yields (j0, block) of the columns i0 to i1 and rows j0
+    to j1 (exclusive) of the grid given by (j0, block) row blocks, and
+    stops reading once past j1
+    '''
+    for start, block in blocks:
+        stop = start + block.shape[0]
+        if stop <= j0:
+            continue
+        if start >= j1:
+            break
+        a, b = max(j0, start), min(j1, stop)
+        yield a - j0, block[a - start:b - start, i0:i1]
+
+###############################
+#### Preview Case
+def _path(name, root):
+    return name if os.path.isabs(name) else os.path.join(root, name)
+
+def preview_params(p, factor = 1, window = None):
+    '''
+    This function returns InputParams p on the grid of its preview, cropped
+    to window (i0, i1, j0, j1) and then coarsened by factor. DT_fixed grows
+    with the cells, PX/PY are kept when the smaller grid still takes them.
+    Previews start cold, HOT_START is off
+    '''
+    changes = {"title": f"{p.title}_preview", "hot_start": False}
+    mglob, nglob = p.mglob, p.nglob
+    if window is not None:
+        i0, i1, j0, j1 = window
+        mglob, nglob = i1 - i0, j1 - j0
+        x0, y0 = i0 * p.dx, j0 * p.dy
+        changes.update(xc_wk = p.xc_wk - x0, yc_wk = p.yc_wk - y0, xwavemaker = p.xwavemaker - x0,
+                       xslope = p.xslope - x0)
+    if factor > 1:
+        mglob, nglob = coarse_size(mglob, factor), coarse_size(nglob, factor)
+        changes.update(dx = p.dx * factor, dy = p.dy * factor, dt = p.dt * factor)
+    changes.update(mglob = mglob, nglob = nglob)
+    if not valid(mglob, nglob, max(1, p.px), max(1, p.py)):
+        best = best_decomposition(mglob, nglob, max(1, p.px) * max(1, p.py))
+        changes.update(px = best.px if best else 1, py = best.py if best else 1)
+    return p.replace(**changes)
+
+def preview_blocks(blocks, mglob, factor = 1, window = None, how = "mean"):
+    '''
+    This function yields the row blocks of a preview grid, see preview_params()
+    '''
+    if window is not None:
+        blocks = crop_blocks(blocks, *window)
+        mglob = window[1] - window[0]
+    if factor > 1:
+        blocks = coarsen_blocks(blocks, mglob, factor, how)
+    return blocks
+
+def preview_stations(path, out_path, factor = 1, window = None):
+    '''
+    This function writes the gauges of the STATION_FILE at path that fall
+    in the preview to out_path, on preview cells and without repeats.
+    Returns the number of gauges kept
+    '''
+    i, j = read_station_file(path)
+    if window is not None:
+        i0, i1, j0, j1 = window
+        inside = (i >= i0) & (i < i1) & (j >= j0) & (j < j1)
+        i, j = i[inside] - i0, j[inside] - j0
+    i, j = i // factor, j // factor
+    cells = i * (int(j.max(initial = 0)) + 1) + j
+    first = np.sort(np.unique(cells, return_index = True)[1])
+    write_stations(out_path, i[first], j[first])
+    return len(first)
+
+def write_preview(p, out_dir, root = ".", factor = 1, window = None, filename = "input.txt"):
+    '''
+    This function writes the preview of InputParams p (files relative to
+    root) to out_dir: every grid file it reads, cropped to window (i0, i1,
+    j0, j1) and coarsened by factor a row block at a time, its gauges and
+    input.txt. Masks are coarsened by majority, the other grids by their
+    mean. Grid files that do not exist yet are skipped. Returns
+    (InputParams of the preview, paths written, names of the files skipped)
+    '''
+    factor = max(1, int(factor))
+    os.makedirs(out_dir, exist_ok = True)
+    q = preview_params(p, factor, window)
+    grids = []
+    if p.depth_type == "DATA":
+        grids.append(("depth", "depth_file"))
+    if p.friction_matrix and p.friction_file != "":
+        grids.append(("friction", "friction_file"))
+    if p.init:
+        grids += [(kind, f"{kind}_file") for kind in ("eta", "u", "v") if getattr(p, f"{kind}_file") != ""]
+        if p.init_mask and p.mask_file != "":
+            grids.append(("mask", "mask_file"))
+    written, skipped, changes = [], [], {}
+    for kind, attr in grids:
+        source = _path(getattr(p, attr), root)
+        if not os.path.exists(source):
+            skipped.append(getattr(p, attr))
+            continue
+        name = os.path.basename(source)
+        blocks = preview_blocks(read_blocks(source, p.mglob), p.mglob, factor, window,
+                                "majority" if kind == "mask" else "mean")
+        written.append(write_blocks(os.path.join(out_dir, name), blocks, q.mglob, FORMATS[kind]))
+        changes[attr] = name
+    if p.num_stations > 0 and p.station_file != "":
+        source = _path(p.station_file, root)
+        if os.path.exists(source):
+            name = os.path.basename(source)
+            kept = preview_stations(source, os.path.join(out_dir, name), factor, window)
+            written.append(os.path.join(out_dir, name))
+            changes.update(station_file = name, num_stations = kept)
+        else:
+            skipped.append(p.station_file)
+    if p.wave_comp_file != "":
+        changes["wave_comp_file"] = os.path.relpath(_path(p.wave_comp_file, root), out_dir)
+    q = q.replace(**changes)
+    written.append(write_input(q, os.path.join(out_dir, filename)))
+    return q, written, skipped
+
+###############################
+### Command Line Interface
+def parse_numbers(text):
+    return [float(v) for v in text.split(",")]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write a coarse or cropped preview of a FUNWAVE-TVD case")
+    parser.add_argument("input", help = "input.txt of the full resolution case")
+    parser.add_argument("out_dir", help = "directory of the preview case")
+    parser.add_argument("--factor", type = int, default = 1, help = "coarsening factor, e.g. 2, 4 or 8")
+    parser.add_argument("--window", type = parse_numbers, metavar = "X0,X1,Y0,Y1",
+                        help = "crop to this window (m)")
+    parser.add_argument("--around-wavemaker", type = parse_numbers, metavar = "LENGTH,WIDTH",
+                        help = "crop to a window (m) centered on the wavemaker")
+    parser.add_argument("--filename", default = "input.txt")
+    args = parser.parse_args(argv)
+    p = load_params(args.input)
+    if p.mglob <= 0 or p.nglob <= 0:
+        parser.error("the input has no grid, Mglob and Nglob must be positive")
+    if args.factor < 1:
+        parser.error("--factor must be 1 or more")
+    window = None
+    try:
+        if args.window:
+            window = window_cells(p, *args.window)
+        elif args.around_wavemaker:
+            window = wavemaker_window(p, *args.around_wavemaker)
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+    if args.factor == 1 and window is None:
+        parser.error("nothing to do, pass --factor, --window or --around-wavemaker")
+    start = time.perf_counter()
+    q, written, skipped = write_preview(p, args.out_dir, os.path.dirname(os.path.abspath(args.input)),
+                                        args.factor, window, args.filename)
+    for name in skipped:
+        print(f"{name} does not exist, skipped", file = sys.stderr)
+    for path in written:
+        print(f"Wrote {path}")
+    print(f"Preview {q.mglob}x{q.nglob} at DX = {q.dx:g}, DY = {q.dy:g} "
+          f"(from {p.mglob}x{p.nglob}) in {time.perf_counter() - start:.2f} s", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
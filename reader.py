@@ -0,0 +1,199 @@
+import argparse             # command line interface
+import concurrent.futures   # process pool for directories of inputs
+import glob
+import json
+import os                   # help with PATH
+import sys
+import time
+
+from model import InputParams, KEYS, OUTPUT_FIELDS, attr_name, coerce, logical
+
+### reader.py project structure:
+# parse_lines()/parse_file(), single pass KEY = VALUE reader
+# to_params()/load_params(), turn parsed values into an InputParams
+# load_dir(), read a whole directory of inputs, optionally in parallel
+# Command line interface, see `python reader.py -h`
+
+# every key the parser can recognise, longest first so a glued line
+# such as "DISPERSION = TGamma1 = 1.000000" splits on Gamma1, not a1
+KNOWN_KEYS = sorted(set(KEYS) | set(OUTPUT_FIELDS), key = len, reverse = True)
+
+###############################
+#### Parse Result
+class ParseResult:
+    '''ParseResult Class.
+    Values read from one input file.
+
+    Args:
+        path: file the values came from, None for in memory text
+    Attributes:
+        values: dict of FUNWAVE key -> raw string value, in file order
+        warnings: list of (line number, message) for recovered or skipped lines
+    '''
+    def __init__(self, path = None) -> None:
+        self.path = path
+        self.values = {}
+        self.warnings = []
+    def warn(self, lineno, message):
+        self.warnings.append((lineno, message))
+
+###############################
+### Parsing
+def _split_glued(key, rest):
+    '''
+    Splits "VALUE1 KEY2 = VALUE2 ..." left over from lines written without
+    a newline (e.g. "DISPERSION = TGamma1 = 1.000000"), returns a list of
+    (key, value) pairs or None if a segment does not end in a known key
+    '''
+    parts = rest.split("=")
+    pairs = []
+    for part in parts[:-1]:
+        part = part.strip()
+        for k in KNOWN_KEYS:
+            if part.endswith(k):
+                pairs.append((key, part[:-len(k)].strip()))
+                key = k
+                break
+        else:
+            return None
+    pairs.append((key, parts[-1].strip()))
+    return pairs
+
+def parse_lines(lines, result = None):
+    '''
+    This function reads FUNWAVE KEY = VALUE lines in a single pass.
+    Comments (from "!" to the end of the line) and blank lines are
+    skipped, lines that cannot be understood are recorded as warnings.
+    Returns a ParseResult
+    '''
+    result = result if result is not None else ParseResult()
+    values = result.values
+    for lineno, line in enumerate(lines, 1):
+        bang = line.find("!")
+        if bang != -1:
+            line = line[:bang]
+        line = line.strip()
+        if not line:
+            continue
+        key, sep, rest = line.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            result.warn(lineno, f"Skipped line without KEY = VALUE: {line}")
+            continue
+        if "=" in rest:
+            pairs = _split_glued(key, rest)
+            if pairs is None:
+                result.warn(lineno, f"Skipped malformed line: {line}")
+                continue
+            result.warn(lineno, f"Recovered glued line: {line}")
+            for k, v in pairs:
+                values[k] = v
+        else:
+            values[key] = rest.strip()
+    return result
+
+def parse_text(text):
+    return parse_lines(text.splitlines())
+
+def parse_file(path):
+    '''
+    This function parses the input file at path, streaming it line by line
+    '''
+    with open(path, errors = "replace") as f:
+        return parse_lines(f, ParseResult(path))
+
+###############################
+### Conversion to InputParams
+def to_params(result, base = None):
+    '''
+    This function builds an InputParams from a ParseResult. Values not in
+    the file keep the value from base (default InputParams()). Output
+    fields set to T are collected into outputs, unknown keys and values
+    that do not convert are added to result.warnings.
+    '''
+    base = base if base is not None else InputParams()
+    changes = {}
+    outputs = []
+    for key, value in result.values.items():
+        if key in OUTPUT_FIELDS:
+            if logical(value):
+                outputs.append(key)
+            continue
+        try:
+            name = attr_name(key)
+            changes[name] = coerce(name, value)
+        except KeyError:
+            result.warn(0, f"Unknown key {key}")
+        except ValueError:
+            result.warn(0, f"Bad value for {key}: {value}")
+    # older generate() wrote INI_UVZ = F next to the initial condition files
+    if "ETA_FILE" in result.values:
+        changes["init"] = True
+    if "MASK_FILE" in result.values:
+        changes["init_mask"] = True
+    if outputs:
+        changes["outputs"] = tuple(outputs)
+    return base.replace(**changes)
+
+def load_params(path, base = None):
+    '''
+    Shorthand for to_params(parse_file(path), base)
+    '''
+    return to_params(parse_file(path), base)
+
+###############################
+### Directories
+def _load(path):
+    result = parse_file(path)
+    return path, to_params(result), result.warnings
+
+def list_inputs(paths, pattern = "*.txt"):
+    '''
+    This function expands directories in paths (recursively) to the input
+    files matching pattern, files are passed through
+    '''
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "**", pattern), recursive = True))
+        else:
+            yield path
+
+def load_dir(paths, pattern = "*.txt", workers = 1, chunksize = 64):
+    '''
+    This function yields (path, InputParams, warnings) for every input file
+    under paths (a path or list of paths). workers > 1 parses in a process
+    pool, results keep the order of the file list.
+    '''
+    if isinstance(paths, str):
+        paths = [paths]
+    files = list_inputs(paths, pattern)
+    if workers and workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+            yield from pool.map(_load, files, chunksize = chunksize)
+    else:
+        for path in files:
+            yield _load(path)
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Read FUNWAVE-TVD input files")
+    parser.add_argument("paths", nargs = "+", help = "input files or directories")
+    parser.add_argument("--pattern", default = "*.txt", help = "file pattern inside directories")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--json", action = "store_true", help = "print every parsed case as a JSON line")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    count = 0
+    for path, p, warnings in load_dir(args.paths, args.pattern, args.workers):
+        count += 1
+        if args.json:
+            print(json.dumps({"path": path, "params": p.to_dict()}))
+        for lineno, message in warnings:
+            print(f"{path}:{lineno}: {message}", file = sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"Read {count} files in {elapsed:.2f} s", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
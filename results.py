@@ -0,0 +1,217 @@
+import argparse             # command line interface
+import os                   # help with PATH
+import re
+import sys
+
+import numpy as np          # memory-mapped snapshots
+
+from grid import read_blocks
+from output_volume import output_grid
+from reader import load_params
+
+### results.py project structure:
+# index_folder(), the numbered snapshot files of a RESULT_FOLDER by field
+# FieldStack, one field as a lazy (time, y, x) array over its snapshots
+# Results/open_results(), every field of the RESULT_FOLDER of an input.txt
+# Command line interface, see `python results.py -h`
+#
+# Example use case:
+# |   from results import open_results
+# |
+# |   res = open_results("input.txt")
+# |   eta = res["eta"]                  # nothing is read yet
+# |   gauge = eta[:, 50, 120]           # one value of every snapshot
+# |   window = eta[-1, 0:100, 0:200]    # one window of the last snapshot
+#
+# Binary snapshots (FIELD_IO_TYPE = BINARY) are memory-mapped, a slice
+# only touches the pages holding its values. ASCII snapshots are converted
+# to binary once, into RESULT_FOLDER/.binary, and memory-mapped from there.
+# Snapshots hold Nglob rows of Mglob values (subsampled by OUTPUT_RES),
+# the first row is j = 1, as every grid file of this project.
+
+SNAPSHOT = re.compile(r"^([A-Za-z][A-Za-z0-9]*?)_(\d+)$")     # eta_00001
+CACHE_DIR = ".binary"
+DTYPE = np.float64
+
+###############################
+### Helper Functions
+def index_folder(folder):
+    '''
+    This function returns {field: [(number, path), ...]} of the numbered
+    snapshot files in folder, sorted by number. Field names are lower case
+    '''
+    out = {}
+    for entry in os.scandir(folder):
+        found = SNAPSHOT.match(entry.name)
+        if found and entry.is_file():
+            out.setdefault(found.group(1).lower(), []).append((int(found.group(2)), entry.path))
+    for frames in out.values():
+        frames.sort()
+    return out
+
+def is_binary(path, shape):
+    '''
+    This function tells a binary snapshot (exactly ny * nx doubles) from
+    an ASCII one
+    '''
+    return os.path.getsize(path) == shape[0] * shape[1] * np.dtype(DTYPE).itemsize
+
+def converted(path, shape, cache_dir):
+    '''
+    This function returns the binary copy of the ASCII snapshot at path,
+    converting it a row block at a time the first time, or again once the
+    snapshot is newer than its copy
+    '''
+    target = os.path.join(cache_dir, os.path.basename(path) + ".f8")
+    if (os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path)
+            and is_binary(target, shape)):
+        return target
+    os.makedirs(cache_dir, exist_ok = True)
+    partial = target + ".part"
+    with open(partial, "wb") as f:
+        for j0, block in read_blocks(path, shape[1]):
+            np.asarray(block, dtype = DTYPE).tofile(f)
+    if not is_binary(partial, shape):
+        os.remove(partial)
+        raise ValueError(f"{path} does not hold {shape[0]} rows of {shape[1]} values")
+    os.replace(partial, target)
+    return target
+
+###############################
+#### Field Stack
+class FieldStack:
+    '''FieldStack Class.
+    One output field as a lazy (time, y, x) array. Indexing reads only the
+    snapshots and the rows it selects: the time axis picks files, the y and
+    x axes slice a memory map of each.
+
+    Args:
+        frames: [(number, path), ...] snapshot files in time order
+        shape: (ny, nx) of one snapshot
+        times: time (s) of every snapshot, default the snapshot numbers
+        cache_dir: where ASCII snapshots are converted to binary
+    Attributes:
+        shape: (frames, ny, nx)
+        numbers: snapshot numbers
+    Methods:
+        snapshot(): memory map of one snapshot
+        convert(): converts every ASCII snapshot ahead of time
+    '''
+    def __init__(self, frames, shape, times = None, cache_dir = None) -> None:
+        self.numbers = [n for n, path in frames]
+        self.paths = [path for n, path in frames]
+        self.shape = (len(frames),) + tuple(shape)
+        self.times = np.asarray(times if times is not None else self.numbers, dtype = np.float64)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(self.paths[0]) if frames else ".", CACHE_DIR)
+        self.dtype = np.dtype(DTYPE)
+    def __len__(self):
+        return self.shape[0]
+    def snapshot(self, k):
+        path = self.paths[k]
+        if not is_binary(path, self.shape[1:]):
+            path = converted(path, self.shape[1:], self.cache_dir)
+        return np.memmap(path, dtype = DTYPE, mode = "r", shape = self.shape[1:])
+    def convert(self):
+        for k in range(len(self)):
+            self.snapshot(k)
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError("FieldStack has 3 axes (time, y, x)")
+        key = key + (slice(None),) * (3 - len(key))
+        t, rows = key[0], key[1:]
+        picked = np.arange(len(self))[t]
+        if np.ndim(picked) == 0:
+            return np.array(self.snapshot(int(picked))[rows])
+        out = None
+        for n, k in enumerate(picked):
+            values = self.snapshot(int(k))[rows]
+            if out is None:
+                out = np.empty((len(picked),) + np.shape(values), dtype = DTYPE)
+            out[n] = values
+        if out is None:
+            out = np.empty((0,) + np.broadcast_to(0.0, self.shape[1:])[rows].shape, dtype = DTYPE)
+        return out
+    def __repr__(self):
+        return f"FieldStack({self.shape[0]} x {self.shape[1]} x {self.shape[2]})"
+
+###############################
+#### Results
+class Results:
+    '''Results Class.
+    The fields of one RESULT_FOLDER, results["eta"] is a FieldStack
+
+    Args:
+        folder: RESULT_FOLDER
+        shape: (ny, nx) of one snapshot
+        plot_start, plot_intv: PLOT_START and PLOT_INTV, for the snapshot
+                               times, None to use the snapshot numbers
+    '''
+    def __init__(self, folder, shape, plot_start = None, plot_intv = None) -> None:
+        self.folder = folder
+        self.shape = tuple(shape)
+        self.index = index_folder(folder)
+        self.plot_start = plot_start
+        self.plot_intv = plot_intv
+        self.stacks = {}
+    def fields(self):
+        return sorted(self.index)
+    def times(self, numbers):
+        '''
+        Time of snapshot numbers, FUNWAVE numbers them from 0 at PLOT_START
+        '''
+        if self.plot_intv is None:
+            return list(numbers)
+        return [(self.plot_start or 0.0) + n * self.plot_intv for n in numbers]
+    def __contains__(self, name):
+        return name.lower() in self.index
+    def __getitem__(self, name):
+        name = name.lower()
+        if name not in self.stacks:
+            frames = self.index[name]
+            self.stacks[name] = FieldStack(frames, self.shape, self.times(n for n, path in frames),
+                                           os.path.join(self.folder, CACHE_DIR))
+        return self.stacks[name]
+
+def open_results(input_path, folder = None):
+    '''
+    This function opens the RESULT_FOLDER of the input.txt at input_path
+    (or folder, if given), with the snapshot size and times of its
+    parameters. Returns Results
+    '''
+    p = load_params(input_path)
+    root = os.path.dirname(os.path.abspath(input_path))
+    folder = folder or p.result_folder or "output/"
+    folder = folder if os.path.isabs(folder) else os.path.join(root, folder)
+    nx, ny = output_grid(p)
+    return Results(folder, (ny, nx), p.plot_start, p.plot_intv if p.plot_intv > 0 else None)
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Read snapshots of a FUNWAVE-TVD RESULT_FOLDER")
+    parser.add_argument("input", help = "input.txt of the run")
+    parser.add_argument("--folder", help = "RESULT_FOLDER, default the one of the input")
+    parser.add_argument("--field", help = "field to read, e.g. eta")
+    parser.add_argument("--point", metavar = "I,J", help = "print the series of one cell, 1-based")
+    parser.add_argument("--convert", action = "store_true", help = "convert every ASCII snapshot to binary now")
+    args = parser.parse_args(argv)
+    results = open_results(args.input, args.folder)
+    if not args.field:
+        for name in results.fields():
+            print(f"{name}: {results[name]!r}")
+        return 0
+    if args.field not in results:
+        parser.error(f"no {args.field} snapshots in {results.folder}")
+    stack = results[args.field]
+    if args.convert:
+        stack.convert()
+    if args.point:
+        i, j = (int(v) - 1 for v in args.point.split(","))
+        for t, value in zip(stack.times, stack[:, j, i]):
+            print(f"{t:g} {value:.6g}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
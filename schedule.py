@@ -0,0 +1,232 @@
+import argparse             # command line interface
+import heapq
+import json                 # launch manifests
+import math
+import os                   # help with PATH
+import sys
+import threading            # local stand-in runner
+import time
+
+from decomposition import CostModel
+from jobs import atomic_open
+from reader import load_dir
+from validation import run_estimate
+
+### schedule.py project structure:
+# Job/estimate_jobs(), the ranks (PX x PY) and predicted wall time of every case
+# pack(), list scheduling of the jobs onto nodes x cores, longest job first
+# Manifest, start time, nodes and launch command of every job, saved as JSON
+# run_manifest(), local stand-in runner, replays a manifest with sleeps
+# Command line interface, see `python schedule.py -h`
+#
+# Example use case:
+# |   python sweep.py sweep_out --set Tperiod=8,10,12 --set PX=4,8
+# |   python schedule.py sweep_out --nodes 4 --cores-per-node 32 --out manifest.json
+# |   python schedule.py --run manifest.json --scale 0.001
+# packs the cases onto 4 nodes of 32 cores and replays the plan 1000x faster.
+#
+# A job of at most cores_per_node ranks runs on the cores of one node, it
+# may share the node; a larger job takes whole nodes. Wall times come from
+# estimate.estimate_run() (grid size, TOTAL_TIME and CFL-limited dt).
+
+COMMAND = "mpirun -np {ranks} funwave {input}"
+
+###############################
+#### Jobs
+class Job:
+    '''Job Class.
+    One case to launch
+
+    Args:
+        path: input.txt of the case
+        ranks: MPI ranks, PX x PY
+        seconds: predicted wall time
+    '''
+    def __init__(self, path, ranks, seconds) -> None:
+        self.path = path
+        self.ranks = ranks
+        self.seconds = seconds
+    def __repr__(self):
+        return f"Job({self.path}, {self.ranks} ranks, {self.seconds:.0f} s)"
+
+def estimate_jobs(paths, model = None, cores_per_node = None, pattern = "input.txt", workers = 1):
+    '''
+    This function returns a Job for every input file under paths (files or
+    sweep directories), with its wall time predicted by validation.run_estimate()
+    '''
+    jobs = []
+    for path, p, warnings in load_dir(paths, pattern, workers):
+        run = run_estimate(p, os.path.dirname(os.path.abspath(path)), model, cores_per_node)
+        jobs.append(Job(path, max(1, p.px) * max(1, p.py), run.seconds if run else 0.0))
+    return jobs
+
+###############################
+#### Packing
+def pack(jobs, nodes, cores_per_node):
+    '''
+    This function schedules jobs on nodes x cores_per_node cores, longest
+    job first, each at the earliest time its cores are free (list
+    scheduling, compare Manifest.makespan with Manifest.lower_bound).
+    Returns a Manifest. Raises ValueError for a job needing more cores
+    than exist.
+    '''
+    free = [[0.0] * cores_per_node for _ in range(nodes)]   # free time of every core, sorted
+    entries = []
+    for job in sorted(jobs, key = lambda j: (-j.seconds, -j.ranks, j.path)):
+        if job.ranks <= cores_per_node:
+            # the node whose job.ranks-th core frees up first
+            node = min(range(nodes), key = lambda n: (free[n][job.ranks - 1], n))
+            start = free[node][job.ranks - 1]
+            free[node] = sorted([start + job.seconds] * job.ranks + free[node][job.ranks:])
+            placement = {node: job.ranks}
+        else:
+            need = math.ceil(job.ranks / cores_per_node)
+            if need > nodes:
+                raise ValueError(f"{job.path} needs {job.ranks} ranks, there are {nodes * cores_per_node} cores")
+            # whole nodes, the ones that are completely free first
+            order = heapq.nsmallest(need, range(nodes), key = lambda n: (free[n][-1], n))
+            start = max(free[n][-1] for n in order)
+            placement = {}
+            left = job.ranks
+            for n in sorted(order):
+                free[n] = [start + job.seconds] * cores_per_node
+                placement[n] = min(left, cores_per_node)
+                left -= placement[n]
+        entries.append({"input": job.path, "ranks": job.ranks, "start": start,
+                        "seconds": job.seconds, "nodes": placement})
+    entries.sort(key = lambda e: (e["start"], e["input"]))
+    return Manifest(nodes, cores_per_node, entries)
+
+class Manifest:
+    '''Manifest Class.
+    Launch plan of a sweep, result of pack()
+
+    Args:
+        nodes, cores_per_node: the allocation
+        jobs: dicts of input, ranks, start (s), seconds and nodes ({node: ranks})
+    Attributes:
+        makespan: end of the last job (s)
+        lower_bound: no schedule ends before this, the longer of the
+                     longest job and the core-seconds spread over every core
+    Methods:
+        save()/load(): JSON file, every job also gets its launch command
+        check(): the jobs that would oversubscribe a node
+    '''
+    def __init__(self, nodes, cores_per_node, jobs) -> None:
+        self.nodes = nodes
+        self.cores_per_node = cores_per_node
+        self.jobs = jobs
+        self.makespan = max((j["start"] + j["seconds"] for j in jobs), default = 0.0)
+        work = sum(j["ranks"] * j["seconds"] for j in jobs)
+        longest = max((j["seconds"] for j in jobs), default = 0.0)
+        self.lower_bound = max(longest, work / (nodes * cores_per_node))
+    def save(self, path, command = COMMAND):
+        jobs = [dict(j, nodes = {str(n): r for n, r in j["nodes"].items()},
+                     command = command.format(ranks = j["ranks"], input = j["input"]))
+                for j in self.jobs]
+        with atomic_open(path) as f:
+            json.dump({"nodes": self.nodes, "cores_per_node": self.cores_per_node,
+                       "makespan": self.makespan, "lower_bound": self.lower_bound, "jobs": jobs},
+                      f, indent = 1)
+        return path
+    def check(self):
+        '''
+        Returns messages for every job that starts while its nodes lack
+        the cores, a job ending at a time frees its cores for jobs starting
+        at that time
+        '''
+        events = []
+        for k, j in enumerate(self.jobs):
+            events.append((j["start"], 1, k))
+            events.append((j["start"] + j["seconds"], 0, k))
+        used = [0] * self.nodes
+        out = []
+        for t, starts, k in sorted(events):
+            for n, r in self.jobs[k]["nodes"].items():
+                used[n] += r if starts else -r
+                if used[n] > self.cores_per_node:
+                    out.append(f"node {n} oversubscribed at {t:.0f} s by {self.jobs[k]['input']}")
+        return out
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        jobs = [dict(j, nodes = {int(n): r for n, r in j["nodes"].items()}) for j in data["jobs"]]
+        return cls(data["nodes"], data["cores_per_node"], jobs)
+    def __repr__(self):
+        efficiency = self.lower_bound / self.makespan if self.makespan else 1.0
+        return (f"{len(self.jobs)} jobs on {self.nodes} x {self.cores_per_node} cores, "
+                f"makespan {self.makespan / 3600.0:.2f} h ({efficiency:.0%} of the lower bound)")
+
+###############################
+#### Local Runner
+def run_manifest(manifest, scale = 0.001, log = print):
+    '''
+    This function replays manifest locally with dummy workloads: every job
+    waits for its start time and its cores, then sleeps for its wall time
+    while holding them, both times scaled by scale. Raises RuntimeError
+    for a manifest that oversubscribes a node (see Manifest.check()).
+    Returns the measured makespan in manifest seconds
+    '''
+    errors = manifest.check()
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    free = threading.Condition()
+    used = [0] * manifest.nodes
+    delays = []
+    origin = time.perf_counter()
+    def job(entry):
+        time.sleep(max(0.0, origin + entry["start"] * scale - time.perf_counter()))
+        with free:
+            # sleeps overrun a little, the previous job may still hold the cores
+            free.wait_for(lambda: all(used[n] + r <= manifest.cores_per_node for n, r in entry["nodes"].items()))
+            for n, r in entry["nodes"].items():
+                used[n] += r
+            delays.append((time.perf_counter() - origin) / scale - entry["start"])
+        time.sleep(entry["seconds"] * scale)
+        with free:
+            for n, r in entry["nodes"].items():
+                used[n] -= r
+            free.notify_all()
+    threads = [threading.Thread(target = job, args = (entry,), daemon = True) for entry in manifest.jobs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    measured = (time.perf_counter() - origin) / scale
+    if log:
+        log(f"Replayed {len(manifest.jobs)} jobs in {measured / 3600.0:.2f} h "
+            f"(planned {manifest.makespan / 3600.0:.2f} h, largest start delay {max(delays, default = 0.0):.0f} s)")
+    return measured
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Pack FUNWAVE-TVD sweep cases onto a node allocation")
+    parser.add_argument("paths", nargs = "*", help = "input files or sweep directories")
+    parser.add_argument("--pattern", default = "input.txt", help = "input file name inside directories")
+    parser.add_argument("--nodes", type = int, default = 1)
+    parser.add_argument("--cores-per-node", type = int, default = os.cpu_count())
+    parser.add_argument("--cell-cost", type = float, default = CostModel().cell_cost,
+                        help = "seconds per cell per time step, see estimate.calibrate_cell_cost()")
+    parser.add_argument("--command", default = COMMAND, help = "launch command, {ranks} and {input} are filled in")
+    parser.add_argument("--out", default = "manifest.json")
+    parser.add_argument("--run", metavar = "MANIFEST", help = "replay a manifest with dummy workloads")
+    parser.add_argument("--scale", type = float, default = 0.001, help = "replay speed, real seconds per planned second")
+    args = parser.parse_args(argv)
+    if args.run:
+        run_manifest(Manifest.load(args.run), args.scale)
+        return 0
+    if not args.paths:
+        parser.error("pass input files or sweep directories, or --run MANIFEST")
+    jobs = estimate_jobs(args.paths, CostModel(cell_cost = args.cell_cost), args.cores_per_node, args.pattern)
+    try:
+        manifest = pack(jobs, args.nodes, args.cores_per_node)
+    except ValueError as e:
+        parser.error(str(e))
+    manifest.save(args.out, args.command)
+    print(f"Wrote {manifest} to {args.out}", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
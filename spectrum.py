@@ -0,0 +1,238 @@
+import argparse             # command line interface
+import sys
+
+import numpy as np          # FFT and spectra over whole arrays
+
+from grid import write_blocks
+from jobs import atomic_open
+from reader import load_params
+
+### spectrum.py project structure:
+# wave_components(), FFT of a measured surface elevation series reduced
+#   to NumWaveComp (period, amplitude, phase) components for WK_TIME_SERIES
+# directional_spectrum(), TMA/JONSWAP spectrum with cos-2s spreading for WK_DATA2D
+# write_wave_comp()/write_data2d(), the WaveCompFile of either wavemaker
+# Command line interface, see `python spectrum.py -h`
+#
+# Components follow eta(t) = sum(amp * cos(2 pi t / per + pha)), phases in radians.
+
+GRAVITY = 9.81
+ENERGY_CUTOFF = 0.999   # share of the variance kept by the default fmax
+
+###############################
+### Time Series Components
+def wave_components(eta, dt, num_comp, method = "bin", fmin = None, fmax = None):
+    '''
+    This function returns (per, amp, pha) arrays of at most num_comp
+    components of the surface elevation series eta sampled every dt
+    seconds, ordered by period, longest first.
+    method = "largest" keeps the num_comp largest FFT components,
+    method = "bin" splits [fmin, fmax] into num_comp bands and keeps one
+    component per band with the energy of the band, at its energy
+    weighted frequency and the phase of its largest component.
+    fmin defaults to the lowest FFT frequency, fmax to the frequency
+    below which ENERGY_CUTOFF of the variance lies, so bands are not
+    spent on the noise up to the Nyquist frequency.
+    '''
+    eta = np.asarray(eta, dtype = np.float64)
+    n = eta.size
+    spectrum = np.fft.rfft(eta - eta.mean())
+    freq = np.fft.rfftfreq(n, dt)
+    amp = 2.0 * np.abs(spectrum) / n
+    if n % 2 == 0:
+        amp[-1] /= 2.0      # Nyquist component is not doubled
+    pha = np.angle(spectrum)
+    lo = freq[1] if fmin is None else fmin
+    if fmax is None:
+        cumulative = np.cumsum(amp ** 2)
+        hi = freq[min(freq.size - 1, np.searchsorted(cumulative, ENERGY_CUTOFF * cumulative[-1]))]
+    else:
+        hi = fmax
+    keep = (freq > 0) & (freq >= lo) & (freq <= hi)
+    freq, amp, pha = freq[keep], amp[keep], pha[keep]
+    if freq.size <= num_comp:
+        pass
+    elif method == "largest":
+        top = np.argpartition(amp, -num_comp)[-num_comp:]
+        freq, amp, pha = freq[top], amp[top], pha[top]
+    elif method == "bin":
+        band = np.minimum(((freq - lo) / (hi - lo) * num_comp).astype(np.int64), num_comp - 1)
+        energy = amp ** 2
+        total = np.bincount(band, weights = energy, minlength = num_comp)
+        center = np.bincount(band, weights = energy * freq, minlength = num_comp)
+        # phase of the largest component of each band: sort by (band, amp)
+        order = np.lexsort((amp, band))
+        last = np.flatnonzero(np.diff(band[order], append = num_comp))
+        phase = np.zeros(num_comp)
+        phase[band[order][last]] = pha[order][last]
+        used = total > 0
+        freq = center[used] / total[used]
+        amp = np.sqrt(total[used])
+        pha = phase[used]
+    else:
+        raise ValueError(f"Unknown method {method}, expected 'largest' or 'bin'")
+    order = np.argsort(freq)
+    return 1.0 / freq[order], amp[order], pha[order]
+
+def peak_period(per, amp):
+    '''
+    This function returns the period of the largest component
+    '''
+    return float(per[np.argmax(amp)]) if len(per) else 0.0
+
+###############################
+### Directional Spectra
+def jonswap(freq, freqpeak, hmo, gamma = 3.3):
+    '''
+    This function returns the JONSWAP variance density (m^2 s) at freq,
+    scaled so the spectrum integrates to (Hmo / 4)^2 over freq
+    '''
+    freq = np.asarray(freq, dtype = np.float64)
+    sigma = np.where(freq <= freqpeak, 0.07, 0.09)
+    r = np.exp(-(freq - freqpeak) ** 2 / (2.0 * sigma ** 2 * freqpeak ** 2))
+    with np.errstate(divide = "ignore", over = "ignore", invalid = "ignore"):
+        s = freq ** -5.0 * np.exp(-1.25 * (freqpeak / freq) ** 4) * gamma ** r
+    s = np.where(freq > 0, s, 0.0)
+    return normalize(freq, s, hmo)
+
+def tma(freq, freqpeak, hmo, gamma = 3.3, depth = None):
+    '''
+    This function returns the TMA variance density, a JONSWAP spectrum
+    with Kitaigorodskii's finite depth factor, scaled to Hmo. Without
+    depth it is the JONSWAP spectrum.
+    '''
+    freq = np.asarray(freq, dtype = np.float64)
+    s = jonswap(freq, freqpeak, hmo, gamma)
+    if depth is None or depth <= 0:
+        return s
+    wh = 2.0 * np.pi * freq * np.sqrt(depth / GRAVITY)
+    phi = np.where(wh <= 1.0, 0.5 * wh ** 2, np.where(wh <= 2.0, 1.0 - 0.5 * (2.0 - wh) ** 2, 1.0))
+    return normalize(freq, s * phi, hmo)
+
+def normalize(freq, s, hmo):
+    m0 = np.trapezoid(s, freq) if freq.size > 1 else 0.0
+    return s * ((hmo / 4.0) ** 2 / m0) if m0 > 0 else s
+
+def spreading(theta, theta_peak, s = 10.0):
+    '''
+    This function returns the cos-2s directional spreading function of
+    theta (degrees) around theta_peak, normalized to integrate to 1 over
+    the theta bins
+    '''
+    d = np.cos(np.radians(np.asarray(theta, dtype = np.float64) - theta_peak) / 2.0) ** (2.0 * s)
+    total = d.sum()
+    return d / total if total > 0 else d
+
+def directional_spectrum(freqpeak, hmo, gamma = 3.3, theta_peak = 0.0, nfreq = 45, ntheta = 24,
+                         freqmin = None, freqmax = None, depth = None, spread = 10.0, max_angle = 90.0):
+    '''
+    This function returns (freq, theta, amp) for a TMA (JONSWAP without
+    depth) spectrum discretized into nfreq frequency bands between
+    freqmin and freqmax (default 0.5 and 3 times freqpeak) and ntheta
+    direction bands within max_angle degrees of theta_peak.
+    amp has shape (ntheta, nfreq), amp = sqrt(2 S(f) D(theta) df).
+    '''
+    freqmin = freqmin or 0.5 * freqpeak
+    freqmax = freqmax or 3.0 * freqpeak
+    edges = np.linspace(freqmin, freqmax, nfreq + 1)
+    freq = 0.5 * (edges[1:] + edges[:-1])
+    df = np.diff(edges)
+    angles = np.linspace(-max_angle, max_angle, ntheta + 1)
+    theta = theta_peak + 0.5 * (angles[1:] + angles[:-1])
+    s = tma(freq, freqpeak, hmo, gamma, depth)
+    d = spreading(theta, theta_peak, spread)
+    amp = np.sqrt(2.0 * d[:, np.newaxis] * (s * df)[np.newaxis, :])
+    return freq, theta, amp
+
+def spectrum_from_params(p, **kwargs):
+    '''
+    Shorthand for directional_spectrum() with the wavemaker values of
+    InputParams p, FreqMin/FreqMax of 0 use the defaults. Raises
+    ValueError unless FreqPeak is positive
+    '''
+    if p.freqpeak <= 0:
+        raise ValueError(f"FreqPeak must be positive, got {p.freqpeak:g}")
+    return directional_spectrum(p.freqpeak, p.hmo, p.gamma_tma, p.theta_peak, p.nfreq, p.ntheta,
+                                p.freqmin or None, p.freqmax or None, p.dep_wk or None, **kwargs)
+
+###############################
+### Writers
+def write_wave_comp(path, per, amp, pha, fmt = "%.8e"):
+    '''
+    This function writes a WK_TIME_SERIES WaveCompFile, one "per amp pha"
+    line per component, in one write. Returns path
+    '''
+    block = np.column_stack((per, amp, pha))
+    return write_blocks(path, [(0, block)], 3, fmt)
+
+def write_data2d(path, freq, theta, amp, peak_period, fmt = "%.8e"):
+    '''
+    This function writes a WK_DATA2D WaveCompFile: "NumFreq NumDir",
+    PeakPeriod, the frequencies, the directions (degrees) and the
+    amplitudes of every direction over every frequency, one value per
+    line as FUNWAVE reads them. Returns path
+    '''
+    values = np.concatenate((freq, theta, np.ravel(amp)))
+    line = fmt + "\n"
+    with atomic_open(path) as f:
+        f.write(f"{len(freq)} {len(theta)}\n{peak_period:f}\n" + (line * values.size) % tuple(values.tolist()))
+    return path
+
+###############################
+### Command Line Interface
+def series_columns(path):
+    '''
+    Returns the number of columns of the first data line of a series
+    file, 0 when it has none, without reading the rest of the file
+    '''
+    with open(path) as f:
+        for line in f:
+            line = line.split("!")[0].split("#")[0].strip()
+            if line:
+                return len(line.split())
+    return 0
+
+def load_series(path, dt = None):
+    '''
+    Reads a surface elevation series, either "time eta" columns or a
+    single eta column sampled every dt seconds. Returns (eta, dt)
+    '''
+    data = np.loadtxt(path, comments = ("!", "#"))
+    if data.ndim == 2:
+        return data[:, 1], float(data[1, 0] - data[0, 0])
+    if dt is None:
+        raise ValueError(f"{path} has a single column, dt is needed")
+    return data, dt
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write a FUNWAVE-TVD WaveCompFile")
+    sub = parser.add_subparsers(dest = "mode", required = True)
+    series = sub.add_parser("series", help = "WK_TIME_SERIES components from a measured series")
+    series.add_argument("series", help = "'time eta' columns, or one eta column with --dt")
+    series.add_argument("path", help = "WaveCompFile to write")
+    series.add_argument("--dt", type = float)
+    series.add_argument("--num-comp", type = int, default = 100)
+    series.add_argument("--method", choices = ("bin", "largest"), default = "bin")
+    series.add_argument("--fmin", type = float)
+    series.add_argument("--fmax", type = float)
+    data2d = sub.add_parser("data2d", help = "WK_DATA2D spectrum from the wavemaker values of an input.txt")
+    data2d.add_argument("input", help = "input.txt with FreqPeak, Hmo, GammaTMA, ThetaPeak, Nfreq, Ntheta")
+    data2d.add_argument("path", help = "WaveCompFile to write")
+    data2d.add_argument("--spread", type = float, default = 10.0, help = "cos-2s spreading exponent s")
+    args = parser.parse_args(argv)
+    if args.mode == "series":
+        eta, dt = load_series(args.series, args.dt)
+        per, amp, pha = wave_components(eta, dt, args.num_comp, args.method, args.fmin, args.fmax)
+        write_wave_comp(args.path, per, amp, pha)
+        print(f"NumWaveComp = {len(per)}\nPeakPeriod = {peak_period(per, amp):f}")
+    else:
+        p = load_params(args.input)
+        try:
+            freq, theta, amp = spectrum_from_params(p, spread = args.spread)
+        except ValueError as e:
+            parser.error(str(e))
+        write_data2d(args.path, freq, theta, amp, 1.0 / p.freqpeak)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
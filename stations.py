@@ -0,0 +1,286 @@
+import argparse             # command line interface
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # whole-array placement and snapping
+
+from bathymetry import depth_blocks
+from jobs import atomic_open
+from reader import load_params
+from writer import update_input
+
+### stations.py project structure:
+# Station placement, each returns (x, y) arrays in metres from the grid origin
+#   - transect(), evenly spaced gauges on a line
+#   - contour(), gauges where the depth crosses given levels
+#   - from_coordinates(), metric or geographic (lon, lat) coordinate lists
+# WetIndex, spatial index of the wet cells, snaps points to the nearest one
+# write_stations()/place_stations(), STATION_FILE and NumStations
+# Command line interface, see `python stations.py -h`
+#
+# Example use case:
+# |   python stations.py input.txt --transect 0,50,500,50,1000 --contour 1,2,5 --spacing 10
+# snaps 1000 gauges on a transect and gauges 10 m apart on the 1, 2 and 5 m
+# contours to wet cells, writes stations.txt and sets NumStations and
+# STATION_FILE in input.txt, leaving the rest of the file as it was
+#
+# STATION_FILE holds one "i j" line per gauge, 1-based like FUNWAVE's grid
+# indices, cell (i, j) sits at x = (i - 1) * DX, y = (j - 1) * DY.
+
+EARTH_RADIUS = 6371000.0    # metres, for geographic coordinates
+TILE = 32                   # cells per side of a WetIndex tile
+
+###############################
+#### Station Placement
+def transect(x0, y0, x1, y1, n):
+    '''
+    This function returns n points evenly spaced from (x0, y0) to (x1, y1)
+    '''
+    return np.linspace(x0, x1, n), np.linspace(y0, y1, n)
+
+def contour(blocks, levels, dx = 1.0, dy = 1.0):
+    '''
+    This function returns the points where the depth of (j0, depth) row
+    blocks crosses any of levels, linearly interpolated between the two
+    cells either side of the crossing, along rows and along columns
+    '''
+    xs, ys = [], []
+    last = None     # last row of the previous block, for crossings between blocks
+    for j0, depth in blocks:
+        rows = depth if last is None else np.vstack((last, depth))
+        first = j0 if last is None else j0 - 1
+        for level in levels:
+            s = rows - level
+            # crossings between cells (i, j) and (i + 1, j)
+            below = s < 0
+            jj, ii = np.nonzero(below[:, :-1] != below[:, 1:])
+            a, b = s[jj, ii], s[jj, ii + 1]
+            xs.append((ii + a / (a - b)) * dx)
+            ys.append((jj + first) * dy)
+            # crossings between cells (i, j) and (i, j + 1)
+            jj, ii = np.nonzero(below[:-1, :] != below[1:, :])
+            a, b = s[jj, ii], s[jj + 1, ii]
+            xs.append(ii * dx)
+            ys.append((jj + first + a / (a - b)) * dy)
+        last = depth[-1:]
+    if not xs:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(xs), np.concatenate(ys)
+
+def thin(x, y, spacing):
+    '''
+    This function keeps the first point in every spacing x spacing square,
+    so gauges along a contour end up about spacing apart
+    '''
+    if spacing <= 0 or len(x) == 0:
+        return x, y
+    keys = np.stack((np.floor(x / spacing), np.floor(y / spacing)), axis = 1)
+    keep = np.sort(np.unique(keys, axis = 0, return_index = True)[1])
+    return x[keep], y[keep]
+
+def from_coordinates(path, origin = None):
+    '''
+    This function reads points from a text file of two columns. Without
+    origin they are x, y in metres, with origin = (lon0, lat0) they are
+    longitude, latitude in degrees, projected to metres east and north of
+    origin (equirectangular, fine over the extent of a FUNWAVE grid)
+    '''
+    data = np.loadtxt(path, ndmin = 2, usecols = (0, 1), delimiter = None)
+    if origin is None:
+        return data[:, 0], data[:, 1]
+    lon0, lat0 = origin
+    x = EARTH_RADIUS * np.radians(data[:, 0] - lon0) * np.cos(np.radians(lat0))
+    y = EARTH_RADIUS * np.radians(data[:, 1] - lat0)
+    return x, y
+
+###############################
+#### Spatial Index
+class WetIndex:
+    '''WetIndex Class.
+    Spatial index of the wet cells of a grid, bucketed into tiles of
+    tile x tile cells. A point on a wet cell snaps to it directly. For a
+    point on a dry cell a window of tiles around it grows until it holds
+    a wet cell (tested with a summed-area table of wet cells per tile),
+    then the non-empty tiles that could hold a closer cell are searched
+    nearest first. Snapping costs a few tiles per point instead of a scan
+    of the grid.
+
+    Args:
+        wet: (nglob, mglob) boolean array, True for wet cells
+        dx, dy: grid spacing
+        tile: cells per side of a tile
+    Methods:
+        from_blocks(): builds the index from (j0, depth) row blocks
+        nearest(): (i, j) of the nearest wet cell of each point
+    '''
+    def __init__(self, wet, dx = 1.0, dy = 1.0, tile = TILE) -> None:
+        self.wet = wet
+        self.nglob, self.mglob = wet.shape
+        self.dx = dx
+        self.dy = dy
+        self.tile = tile
+        counts = np.add.reduceat(wet.view(np.uint8), np.arange(0, self.nglob, tile), axis = 0, dtype = np.int64)
+        self.counts = np.add.reduceat(counts, np.arange(0, self.mglob, tile), axis = 1)
+        self.table = np.zeros((self.counts.shape[0] + 1, self.counts.shape[1] + 1), dtype = np.int64)
+        self.table[1:, 1:] = self.counts.cumsum(0).cumsum(1)
+    @classmethod
+    def from_blocks(cls, blocks, mglob, nglob, min_depth, dx = 1.0, dy = 1.0, tile = TILE):
+        wet = np.zeros((nglob, mglob), dtype = bool)
+        for j0, depth in blocks:
+            wet[j0:j0 + depth.shape[0]] = depth > min_depth
+        return cls(wet, dx, dy, tile)
+    def window(self, tx, ty, r):
+        '''
+        Returns the tile ranges (ty0, ty1, tx0, tx1) within r tiles of
+        tile (tx, ty) and the number of wet cells in them
+        '''
+        nty, ntx = self.counts.shape
+        tx0, tx1 = max(0, tx - r), min(ntx, tx + r + 1)
+        ty0, ty1 = max(0, ty - r), min(nty, ty + r + 1)
+        t = self.table
+        return (ty0, ty1, tx0, tx1), t[ty1, tx1] - t[ty0, tx1] - t[ty1, tx0] + t[ty0, tx0]
+    def _search(self, x, y, i, j):
+        '''
+        Nearest wet cell of the point (x, y) on dry cell (i, j), or (-1, -1)
+        '''
+        tile = self.tile
+        tx, ty = i // tile, j // tile
+        # smallest window holding a wet cell, doubling then bisecting r
+        lo, r = 0, 1
+        while True:
+            (ty0, ty1, tx0, tx1), count = self.window(tx, ty, r)
+            if count:
+                break
+            if (ty0, ty1, tx0, tx1) == (0, self.counts.shape[0], 0, self.counts.shape[1]):
+                return -1, -1
+            lo, r = r, 2 * r
+        while r - lo > 1:
+            mid = (lo + r) // 2
+            if self.window(tx, ty, mid)[1]:
+                r = mid
+            else:
+                lo = mid
+        # a wet cell of this window bounds the distance, every closer cell
+        # lies in the tiles within reach
+        reach = (r + 1) * tile * np.hypot(self.dx, self.dy)
+        (ty0, ty1, tx0, tx1), count = self.window(tx, ty, int(np.ceil(reach / (tile * min(self.dx, self.dy)))) + 1)
+        tys, txs = np.nonzero(self.counts[ty0:ty1, tx0:tx1])
+        tys += ty0
+        txs += tx0
+        # distance from the point to the box of every non-empty tile
+        gx = np.maximum(0.0, np.maximum(txs * tile * self.dx - x,
+                                        x - np.minimum((txs + 1) * tile, self.mglob) * self.dx + self.dx))
+        gy = np.maximum(0.0, np.maximum(tys * tile * self.dy - y,
+                                        y - np.minimum((tys + 1) * tile, self.nglob) * self.dy + self.dy))
+        box = gx * gx + gy * gy
+        best, found = np.inf, (-1, -1)
+        for k in np.argsort(box, kind = "stable"):
+            if box[k] > best:
+                break
+            i0, j0 = txs[k] * tile, tys[k] * tile
+            jj, ii = np.nonzero(self.wet[j0:j0 + tile, i0:i0 + tile])
+            d2 = ((ii + i0) * self.dx - x) ** 2 + ((jj + j0) * self.dy - y) ** 2
+            n = np.argmin(d2)
+            if d2[n] < best:
+                best, found = d2[n], (ii[n] + i0, jj[n] + j0)
+        return found
+    def nearest(self, x, y):
+        '''
+        Returns the 0-based (i, j) arrays of the nearest wet cell of every
+        point, -1 for points outside the grid or without any wet cell
+        '''
+        x = np.asarray(x, dtype = np.float64)
+        y = np.asarray(y, dtype = np.float64)
+        i = np.rint(x / self.dx).astype(np.int64)
+        j = np.rint(y / self.dy).astype(np.int64)
+        inside = (i >= 0) & (i < self.mglob) & (j >= 0) & (j < self.nglob)
+        i[~inside] = -1
+        j[~inside] = -1
+        dry = np.flatnonzero(inside)
+        dry = dry[~self.wet[j[dry], i[dry]]]
+        for k in dry:
+            i[k], j[k] = self._search(x[k], y[k], i[k], j[k])
+        return i, j
+
+###############################
+### Station File
+def write_stations(path, i, j):
+    '''
+    This function writes 0-based (i, j) cells to path as a STATION_FILE,
+    one 1-based "i j" line per gauge. Returns path
+    '''
+    with atomic_open(path) as f:
+        f.write("".join(f"{a} {b}\n" for a, b in zip((np.asarray(i) + 1).tolist(), (np.asarray(j) + 1).tolist())))
+    return path
+
+def place_stations(p, x, y, path = "stations.txt", root = ".", unique = True, index = None):
+    '''
+    This function snaps the points (x, y) to the nearest wet cells of
+    InputParams p (depth above MinDepth), writes them to path (relative
+    to root) and returns (InputParams with NumStations and STATION_FILE
+    set, number of points dropped). Points outside the grid or without a
+    wet cell are dropped, with unique so are repeats of a cell.
+    '''
+    if index is None:
+        index = WetIndex.from_blocks(depth_blocks(p, root), p.mglob, p.nglob, p.min_depth, p.dx, p.dy)
+    i, j = index.nearest(x, y)
+    keep = i >= 0
+    i, j = i[keep], j[keep]
+    if unique and len(i):
+        first = np.sort(np.unique(j * index.mglob + i, return_index = True)[1])
+        i, j = i[first], j[first]
+    write_stations(path if os.path.isabs(path) else os.path.join(root, path), i, j)
+    return p.replace(num_stations = len(i), station_file = path), len(x) - len(i)
+
+###############################
+### Command Line Interface
+def parse_numbers(text):
+    return [float(v) for v in text.split(",")]
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Place FUNWAVE-TVD stations and write STATION_FILE")
+    parser.add_argument("input", help = "input.txt giving the grid and the depth")
+    parser.add_argument("--transect", type = parse_numbers, action = "append", default = [],
+                        metavar = "X0,Y0,X1,Y1,N", help = "N gauges on a line, in metres")
+    parser.add_argument("--contour", type = parse_numbers, metavar = "DEPTH[,DEPTH...]",
+                        help = "gauges on these depth contours")
+    parser.add_argument("--spacing", type = float, help = "distance between contour gauges, default max(DX, DY)")
+    parser.add_argument("--points", action = "append", default = [],
+                        help = "file of x y (or lon lat with --origin) columns")
+    parser.add_argument("--origin", type = parse_numbers, metavar = "LON,LAT",
+                        help = "geographic position of the grid origin, --points are lon lat")
+    parser.add_argument("--output", default = "stations.txt", help = "STATION_FILE to write, relative to the input")
+    parser.add_argument("--keep-duplicates", action = "store_true", help = "keep gauges snapped to the same cell")
+    parser.add_argument("--no-update", action = "store_true",
+                        help = "do not set NumStations and STATION_FILE in input.txt")
+    args = parser.parse_args(argv)
+    p = load_params(args.input)
+    root = os.path.dirname(os.path.abspath(args.input))
+    xs, ys = [], []
+    for x0, y0, x1, y1, n in args.transect:
+        x, y = transect(x0, y0, x1, y1, int(n))
+        xs.append(x)
+        ys.append(y)
+    if args.contour:
+        x, y = contour(depth_blocks(p, root), args.contour, p.dx, p.dy)
+        x, y = thin(x, y, args.spacing or max(p.dx, p.dy))
+        xs.append(x)
+        ys.append(y)
+    for path in args.points:
+        x, y = from_coordinates(path, args.origin)
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        parser.error("nothing to place, pass --transect, --contour or --points")
+    start = time.perf_counter()
+    p, dropped = place_stations(p, np.concatenate(xs), np.concatenate(ys), args.output, root,
+                                unique = not args.keep_duplicates)
+    print(f"Wrote {p.num_stations} stations to {args.output} in {time.perf_counter() - start:.2f} s"
+          + (f", dropped {dropped} (outside the grid, dry or repeated)" if dropped else ""), file = sys.stderr)
+    if not args.no_update:
+        update_input(args.input, {"NumStations": p.num_stations, "STATION_FILE": p.station_file})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
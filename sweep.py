@@ -0,0 +1,359 @@
+import argparse             # command line interface
+import concurrent.futures   # process pool for parallel sweeps
+import itertools            # cartesian products of parameter axes
+import json                 # parameter set lists
+import os                   # help with PATH
+import sys
+import time                 # throughput reporting
+
+from cache import CaseCache, params_hash
+import instrument           # --profile
+from model import InputParams, attr_name, coerce
+from reader import load_params
+from table import CaseTable, table_path
+from writer import write_input, write_input_cached
+
+### sweep.py project structure:
+# Helper Functions for building parameter sets
+# run_sweep(), streams cases to disk without any GUI
+# run_sweep_parallel(), same as run_sweep() across a process pool
+# Command line interface, see `python sweep.py -h`
+#
+# Example use case:
+# |   python sweep.py sweep_out --set Tperiod=8,10,12 --set AMP_WK=0.5,1.0 \
+# |                             --set CFL=0.3,0.5 --base wavemaker=WK_REG
+# writes sweep_out/case_000000/input.txt ... sweep_out/case_000011/input.txt
+# with --cache the cases are written to sweep_out/<hash>/input.txt instead
+# (see cache.py) and cases written by an earlier run are skipped, with
+# --table every case is also recorded in sweep_out/cases.table (see table.py)
+# --profile PATH times every stage, see instrument.py
+
+###############################
+### Helper Functions
+def product_cases(base, axes):
+    '''
+    This function yields one InputParams per point of the cartesian
+    product of axes, a dict of {key: [values]}. Keys may be field
+    names or FUNWAVE keys. The last axis varies fastest.
+    '''
+    names = [attr_name(k) for k in axes]
+    values = [[coerce(n, v) for v in axes[k]] for n, k in zip(names, axes)]
+    for combo in itertools.product(*values):
+        yield base.replace(**dict(zip(names, combo)))
+
+def list_cases(base, param_sets):
+    '''
+    This function yields one InputParams per dict in param_sets,
+    each dict overrides the values of base
+    '''
+    for d in param_sets:
+        yield base.replace(**d)
+
+def case_dir(out_dir, index):
+    return os.path.join(out_dir, f"case_{index:06d}")
+
+def timed_cases(cases):
+    '''
+    This function yields cases, timing how long each one takes to build
+    '''
+    cases = iter(cases)
+    while True:
+        with instrument.span("build_case", "sweep"):
+            p = next(cases, None)
+        if p is None:
+            return
+        yield p
+
+###############################
+### Sweep
+class SweepStats:
+    '''SweepStats Class.
+    Result of run_sweep()
+
+    Args:
+        count: number of cases handled
+        seconds: wall time spent writing
+        skipped: cases found in the cache and not written again
+    '''
+    def __init__(self, count, seconds, skipped = 0) -> None:
+        self.count = count
+        self.seconds = seconds
+        self.skipped = skipped
+    def rate(self):
+        return self.count / self.seconds if self.seconds > 0 else float("inf")
+    def __repr__(self):
+        text = f"{self.count} cases in {self.seconds:.2f} s ({self.rate():.0f} cases/s)"
+        if self.skipped:
+            text += f", {self.skipped} already cached"
+        return text
+
+def sweep_cache(out_dir, filename = "input.txt"):
+    '''
+    Returns the CaseCache of a cached sweep, cases are kept in
+    out_dir/<hash>/filename
+    '''
+    return CaseCache(out_dir, pattern = os.path.join("{hash}", filename))
+
+def sweep_table(out_dir, cache = False):
+    '''
+    Returns the CaseTable of a sweep, a cached sweep adds to the rows of
+    earlier runs, the others start over
+    '''
+    return CaseTable(table_path(out_dir), reset = not cache)
+
+def run_sweep(cases, out_dir, filename = "input.txt", report_every = 1000, log = print,
+              cache = False, table = False, progress = None, cancel = None):
+    '''
+    This function writes every InputParams in cases (any iterable, it is
+    consumed lazily) to out_dir/case_NNNNNN/filename and returns SweepStats.
+    With cache = True cases go to out_dir/<hash>/filename instead and
+    cases already on disk are skipped, see sweep_cache(). With table = True
+    the cases written are recorded in the sweep's CaseTable, see table.py.
+    Progress is passed to log every report_every cases, pass log = None
+    to stay quiet. progress(count) is called after every case, and the
+    sweep stops early, keeping the cases written so far, once cancel (a
+    threading.Event) is set.
+    '''
+    os.makedirs(out_dir, exist_ok = True)
+    store = sweep_cache(out_dir, filename) if cache else None
+    rows = sweep_table(out_dir, cache) if table else None
+    if instrument.enabled():
+        cases = timed_cases(cases)
+    start = time.perf_counter()
+    count = 0
+    skipped = 0
+    for i, p in enumerate(cases):
+        if cancel is not None and cancel.is_set():
+            break
+        if store is not None:
+            path, created = store.write(p)
+            skipped += not created
+        else:
+            d = case_dir(out_dir, i)
+            with instrument.span("makedirs", "sweep"):
+                os.makedirs(d, exist_ok = True)
+            path = write_input(p, os.path.join(d, filename))
+            created = True
+        if rows is not None and created:
+            with instrument.span("table", "sweep"):
+                rows.append(path, p)
+        count += 1
+        if progress is not None:
+            progress(count)
+        if log and report_every and count % report_every == 0:
+            elapsed = time.perf_counter() - start
+            log(f"{count} cases written ({count / elapsed:.0f} cases/s)")
+    if rows is not None:
+        with instrument.span("table", "sweep"):
+            rows.flush()
+    stats = SweepStats(count, time.perf_counter() - start, skipped)
+    if log:
+        log(f"Wrote {stats}")
+    return stats
+
+def _write_chunk(out_dir, filename, start, chunk):
+    '''
+    Worker side of run_sweep_parallel(), writes chunk[k] as case start + k.
+    Templates are cached per worker process, see writer.render_cached()
+    '''
+    for k, p in enumerate(chunk):
+        d = case_dir(out_dir, start + k)
+        os.makedirs(d, exist_ok = True)
+        write_input_cached(p, os.path.join(d, filename))
+    return len(chunk), []
+
+def _write_chunk_cached(out_dir, filename, start, chunk):
+    '''
+    Worker side of a cached run_sweep_parallel(), writes the cases of
+    chunk that are not on disk yet. Returns the number of cases and the
+    (hash, InputParams) pairs written, the parent process records them in
+    the index so only one process appends to it. Two workers may both
+    write a case missing from disk, CaseCache.record() keeps one entry.
+    '''
+    written = []
+    for p in chunk:
+        h = params_hash(p)
+        d = os.path.join(out_dir, h)
+        path = os.path.join(d, filename)
+        if os.path.exists(path):
+            continue
+        os.makedirs(d, exist_ok = True)
+        write_input_cached(p, path)
+        written.append((h, p))
+    return len(chunk), written
+
+def run_sweep_parallel(cases, out_dir, filename = "input.txt", workers = None,
+                       chunk_size = 256, report_every = 1000, log = print, cache = False,
+                       table = False, progress = None, cancel = None):
+    '''
+    Same as run_sweep(), with cases written by a ProcessPoolExecutor of
+    workers processes (default os.cpu_count()). cases is consumed lazily,
+    chunk_size cases at a time, with at most two chunks in flight per
+    worker so memory stays flat for any sweep size. The CaseTable is only
+    written by this process, as the chunks come back. progress(count) is
+    called as chunks come back, once cancel is set no more chunks are
+    sent and the ones in flight are waited for.
+    '''
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok = True)
+    store = sweep_cache(out_dir, filename) if cache else None
+    write_chunk = _write_chunk_cached if cache else _write_chunk
+    rows = sweep_table(out_dir, cache) if table else None
+    start = time.perf_counter()
+    count = 0
+    skipped = 0
+    last_report = 0
+    cases = iter(cases)
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as pool:
+        pending = {}
+        index = 0
+        while True:
+            while len(pending) < 2 * workers and not (cancel is not None and cancel.is_set()):
+                with instrument.span("build_chunk", "sweep"):
+                    chunk = list(itertools.islice(cases, chunk_size))
+                if not chunk:
+                    break
+                future = pool.submit(write_chunk, out_dir, filename, index, chunk)
+                pending[future] = (index, chunk if rows is not None and not cache else None)
+                index += len(chunk)
+            if not pending:
+                break
+            with instrument.span("wait", "sweep"):
+                done = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED).done
+            for future in done:
+                first, chunk = pending.pop(future)
+                n, written = future.result()
+                count += n
+                if store is not None:
+                    with instrument.span("record", "sweep"):
+                        written = store.record(written)
+                    skipped += n - len(written)
+                if rows is not None:
+                    if store is not None:
+                        rows.extend((os.path.join(out_dir, store.relpath(h)), p) for h, p in written)
+                    else:
+                        rows.extend((os.path.join(case_dir(out_dir, first + k), filename), p)
+                                    for k, p in enumerate(chunk))
+            if progress is not None:
+                progress(count)
+            if log and report_every and count - last_report >= report_every:
+                last_report = count
+                elapsed = time.perf_counter() - start
+                log(f"{count} cases written ({count / elapsed:.0f} cases/s)")
+    if rows is not None:
+        with instrument.span("table", "sweep"):
+            rows.flush()
+    stats = SweepStats(count, time.perf_counter() - start, skipped)
+    if log:
+        log(f"Wrote {stats} with {workers} workers")
+    return stats
+
+###############################
+### Command Line Interface
+def parse_assignment(text):
+    '''
+    Splits "KEY=v1,v2,..." into ("KEY", ["v1", "v2", ...])
+    '''
+    if "=" not in text:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE[,VALUE...], got {text}")
+    key, values = text.split("=", 1)
+    return key.strip(), [v.strip() for v in values.split(",")]
+
+def build_axes(assignments):
+    '''
+    This function turns (key, [values]) pairs into {key: [values]} for
+    product_cases(), checking every key and value first. Raises
+    ValueError, also for a key given twice (as FUNWAVE key or field name)
+    '''
+    axes = {}
+    seen = {}       # field name -> key it was given as
+    for key, values in assignments:
+        try:
+            name = attr_name(key)
+        except KeyError as e:
+            raise ValueError(f"bad sweep axis {key!r}: {e}") from None
+        if name in seen:
+            raise ValueError(f"{seen[name]} is swept twice, list all its values in one axis")
+        seen[name] = key
+        for v in values:
+            coerce(name, v)
+        axes[key] = values
+    return axes
+
+def parse_axes(text):
+    '''
+    This function parses "KEY=V1,V2; KEY=V3,..." (the sweep field of the
+    GUI) into {key: [values]}, see build_axes(). Raises ValueError
+    '''
+    assignments = []
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        try:
+            assignments.append(parse_assignment(part))
+        except argparse.ArgumentTypeError as e:
+            raise ValueError(f"bad sweep axis {part.strip()!r}: {e}") from None
+    return build_axes(assignments)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description = "Write a FUNWAVE-TVD input.txt parameter sweep")
+    parser.add_argument("out_dir", help = "directory that receives the case_NNNNNN folders")
+    parser.add_argument("--set", dest = "axes", action = "append", default = [],
+                        type = parse_assignment, metavar = "KEY=V1,V2",
+                        help = "sweep axis, repeat for a cartesian product")
+    parser.add_argument("--cases", help = "JSON file holding a list of parameter sets, used instead of --set")
+    parser.add_argument("--base-file", help = "existing input.txt the cases start from")
+    parser.add_argument("--base", action = "append", default = [], type = parse_assignment,
+                        metavar = "KEY=VALUE", help = "value shared by every case")
+    parser.add_argument("--filename", default = "input.txt")
+    parser.add_argument("--report-every", type = int, default = 1000)
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "worker processes, 1 writes serially in this process")
+    parser.add_argument("--chunk-size", type = int, default = 256,
+                        help = "cases handed to a worker at a time")
+    parser.add_argument("--cache", action = "store_true",
+                        help = "name cases by parameter hash and skip cases already written")
+    parser.add_argument("--table", action = "store_true",
+                        help = "record every case in OUT_DIR/cases.table for queries, see table.py")
+    parser.add_argument("--profile", metavar = "PATH",
+                        help = "time every stage, writes PATH.json and PATH.trace.json (see instrument.py), "
+                               "worker processes are not timed, use --workers 1 for the section writers")
+    return parser
+
+def base_params(args):
+    '''
+    Returns the InputParams shared by every case of the sweep
+    '''
+    base = load_params(args.base_file) if args.base_file else InputParams()
+    return base.replace(**{k: ",".join(v) for k, v in args.base})
+
+def cases_from_args(args, base):
+    if args.cases:
+        with open(args.cases) as f:
+            return list_cases(base, json.load(f))
+    return product_cases(base, build_axes(args.axes))
+
+def main(argv = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile:
+        instrument.enable(args.profile)
+    base = base_params(args)
+    try:
+        cases = cases_from_args(args, base)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers and args.workers > 1:
+        stats = run_sweep_parallel(cases, args.out_dir, filename = args.filename,
+                                   workers = args.workers, chunk_size = args.chunk_size,
+                                   report_every = args.report_every, cache = args.cache,
+                                   table = args.table)
+    else:
+        stats = run_sweep(cases, args.out_dir, filename = args.filename,
+                          report_every = args.report_every, cache = args.cache, table = args.table)
+    if args.profile:
+        print(instrument.RECORDER.report(), file = sys.stderr)
+    return 0 if stats.count else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
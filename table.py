@@ -0,0 +1,379 @@
+import argparse             # command line interface
+import ast                  # query expressions
+import json                 # table schema and string dictionaries
+import operator
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # columns and vectorized queries
+
+from model import FIELDS, InputParams, attr_name
+from reader import load_dir
+
+### table.py project structure:
+# Helper Functions for the column types and query expressions
+# CaseTable, one row per case and one typed column per InputParams field,
+#   appended as a sweep runs and queried with whole-column comparisons
+# Command line interface, see `python table.py -h`
+#
+# Example use case:
+# |   python sweep.py sweep_out --set Tperiod=8,10,12 --set CFL=0.3,0.5 --table
+# |   python table.py sweep_out "Tperiod > 10 and CFL == 0.3"
+# prints the input files of the matching cases, or in Python
+# |   from table import CaseTable
+# |
+# |   table = CaseTable("sweep_out/cases.table")
+# |   rows = table.where("Tperiod > 10 and CFL == 0.3")
+# |   paths = table.paths(rows)
+#
+# Every column is a raw little endian file of one value per row, memory
+# mapped by queries, so a query reads only the columns it names. Strings
+# (and OUTPUTS) are stored as int32 codes into an append-only dictionary.
+# A column that has held one value on every row so far is kept in the
+# schema instead of a file, sweeps vary a handful of keys out of ~100.
+# The row count in the schema is written last, rows appended by a run
+# that stopped half way are cut off when the table is opened again.
+
+TABLE_NAME = "cases.table"      # directory of the table inside a sweep
+SCHEMA_NAME = "schema.json"
+FLUSH_ROWS = 1 << 16            # rows buffered before they are appended
+
+###############################
+### Helper Functions
+def column_dtype(name):
+    '''
+    This function returns the numpy dtype of the column of field name,
+    strings and tuples are int32 codes
+    '''
+    t = FIELDS[name].type
+    if t is bool or t == "bool":
+        return np.dtype("?")
+    if t is int or t == "int":
+        return np.dtype("<i8")
+    if t is float or t == "float":
+        return np.dtype("<f8")
+    return np.dtype("<i4")
+
+def is_coded(name):
+    return column_dtype(name) == np.dtype("<i4")
+
+def text_value(value):
+    '''
+    Returns the dictionary entry of a string or tuple value
+    '''
+    return " ".join(value) if isinstance(value, tuple) else str(value)
+
+COMPARE = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+           ast.Gt: operator.gt, ast.GtE: operator.ge}
+
+###############################
+#### Table
+class CaseTable:
+    '''CaseTable Class.
+    Columnar table of generated cases, one row per case
+
+    Args:
+        directory: directory of the table, created if missing
+        reset: drop every row first
+    Attributes:
+        root: the paths of the cases are stored relative to it, the
+              parent of directory
+        rows: number of rows written to disk
+    Methods:
+        append(): adds one (path, InputParams) row, written by flush()
+        column(): the stored values of one column, codes for strings
+        values(): the values of one column, strings decoded
+        where(): row numbers matching a query expression
+        paths()/params(): the case file and InputParams of rows
+    '''
+    def __init__(self, directory, reset = False) -> None:
+        self.directory = directory
+        self.root = os.path.dirname(os.path.abspath(directory))
+        self.names = list(FIELDS)
+        self.pending = []
+        self._maps = {}
+        os.makedirs(directory, exist_ok = True)
+        schema = self._path(SCHEMA_NAME)
+        if reset or not os.path.exists(schema):
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    os.remove(entry.path)
+            self.rows = 0
+            self.const = {}
+        else:
+            with open(schema) as f:
+                data = json.load(f)
+            self.rows = data["rows"]
+            self.const = data["const"]
+        self.vocab = {name: [] for name in self.names if is_coded(name)}
+        for name, words in self.vocab.items():
+            if os.path.exists(self._path(name + ".vocab")):
+                with open(self._path(name + ".vocab")) as f:
+                    words += [json.loads(line) for line in f]
+        self.codes = {name: {w: k for k, w in enumerate(words)} for name, words in self.vocab.items()}
+        self._repair()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+    def _repair(self):
+        '''
+        Cuts every file back to the rows recorded in the schema
+        '''
+        for name in self.names:
+            path = self._path(name + ".bin")
+            if os.path.exists(path) and os.path.getsize(path) > self.rows * column_dtype(name).itemsize:
+                os.truncate(path, self.rows * column_dtype(name).itemsize)
+        ends = self._path("paths.end")
+        if os.path.exists(ends) and os.path.getsize(ends) > self.rows * 8:
+            os.truncate(ends, self.rows * 8)
+        if os.path.exists(self._path("paths.txt")):
+            end = int(np.fromfile(ends, dtype = "<u8", count = self.rows)[-1]) if self.rows else 0
+            if os.path.getsize(self._path("paths.txt")) > end:
+                os.truncate(self._path("paths.txt"), end)
+    def __len__(self):
+        return self.rows + len(self.pending)
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.flush()
+
+    ### Writing
+    def append(self, path, p):
+        self.pending.append((path, p))
+        if len(self.pending) >= FLUSH_ROWS:
+            self.flush()
+    def extend(self, entries):
+        for path, p in entries:
+            self.append(path, p)
+    def _encode(self, name, values):
+        if not is_coded(name):
+            return np.array(values, dtype = column_dtype(name))
+        codes = self.codes[name]
+        new = []
+        lookup = {}     # value -> code, every distinct value is looked up once
+        for value in dict.fromkeys(values):
+            word = text_value(value)
+            code = codes.get(word)
+            if code is None:
+                code = codes[word] = len(self.vocab[name])
+                self.vocab[name].append(word)
+                new.append(word)
+            lookup[value] = code
+        if len(lookup) == 1:
+            out = np.full(len(values), code, dtype = column_dtype(name))
+        else:
+            out = np.fromiter(map(lookup.__getitem__, values), dtype = column_dtype(name), count = len(values))
+        if new:
+            with open(self._path(name + ".vocab"), "a") as f:
+                f.write("".join(json.dumps(w) + "\n" for w in new))
+        return out
+    def flush(self):
+        '''
+        Appends the buffered rows to the column files, then records the
+        new row count in the schema
+        '''
+        if not self.pending:
+            return
+        self._maps = {}
+        columns = zip(*map(operator.attrgetter(*self.names), (p for path, p in self.pending)))
+        for name, values in zip(self.names, columns):
+            encoded = self._encode(name, values)
+            path = self._path(name + ".bin")
+            if name in self.const:
+                if np.all(encoded == self.const[name]):
+                    continue
+                with open(path, "wb") as f:     # the column stops being constant
+                    np.full(self.rows, self.const[name], dtype = encoded.dtype).tofile(f)
+                del self.const[name]
+            elif not os.path.exists(path) and np.all(encoded == encoded[0]):
+                self.const[name] = encoded[0].item()
+                continue
+            with open(path, "ab") as f:
+                encoded.tofile(f)
+        text = [os.path.relpath(path, self.root) + "\n" for path, p in self.pending]
+        with open(self._path("paths.txt"), "ab") as f:
+            start = f.tell()
+            data = "".join(text).encode()
+            f.write(data)
+        ends = start + np.cumsum([len(t.encode()) for t in text], dtype = np.uint64)
+        with open(self._path("paths.end"), "ab") as f:
+            ends.astype("<u8").tofile(f)
+        self.rows += len(self.pending)
+        self.pending = []
+        partial = self._path(SCHEMA_NAME + ".part")
+        with open(partial, "w") as f:
+            json.dump({"rows": self.rows, "const": self.const, "columns": self.names}, f)
+        os.replace(partial, self._path(SCHEMA_NAME))
+
+    ### Reading
+    def column(self, key):
+        '''
+        Returns the (rows,) stored values of the column of key (field name
+        or FUNWAVE key), a read-only memory map or a broadcast constant
+        '''
+        self.flush()
+        name = attr_name(key)
+        if name not in self._maps:
+            dtype = column_dtype(name)
+            if name in self.const:
+                column = np.broadcast_to(np.array(self.const[name], dtype = dtype), (self.rows,))
+            elif self.rows == 0:
+                column = np.empty(0, dtype = dtype)
+            else:
+                column = np.memmap(self._path(name + ".bin"), dtype = dtype, mode = "r", shape = (self.rows,))
+            self._maps[name] = column
+        return self._maps[name]
+    def values(self, key, rows = None):
+        column = self.column(key)
+        column = column if rows is None else column[rows]
+        name = attr_name(key)
+        if is_coded(name):
+            return np.array(self.vocab[name], dtype = object)[column]
+        return np.asarray(column)
+    def code(self, key, value):
+        '''
+        Returns the code of a string value in the column of key, -1 if no
+        row holds it
+        '''
+        name = attr_name(key)
+        return self.codes[name].get(text_value(value), -1)
+    def where(self, expression):
+        '''
+        This function returns the row numbers matching expression, Python
+        syntax over FUNWAVE keys or field names: comparisons (chained or
+        not), in/not in with a list, and/or/not. Strings only compare with
+        ==, != and in. Raises ValueError for anything else
+        '''
+        try:
+            tree = ast.parse(expression, mode = "eval")
+        except SyntaxError as e:
+            raise ValueError(f"cannot parse query {expression!r}: {e.msg}")
+        mask = np.broadcast_to(np.asarray(self._evaluate(tree.body), dtype = bool), (self.rows,))
+        return np.flatnonzero(mask)
+    def _operand(self, node):
+        '''
+        Returns (name, column) of a key or (None, value) of a constant
+        '''
+        if isinstance(node, ast.Name):
+            try:
+                name = attr_name(node.id)
+            except KeyError as e:
+                raise ValueError(str(e.args[0]))
+            return name, self.column(name)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+            return None, -node.operand.value
+        if isinstance(node, ast.Constant):
+            return None, node.value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return None, [self._operand(e)[1] for e in node.elts]
+        raise ValueError(f"unsupported query term {ast.unparse(node)}")
+    def _compare(self, left, op, right):
+        (lname, lvalue), (rname, rvalue) = left, right
+        if lname is None and rname is not None and type(op) in COMPARE:
+            flipped = {ast.Lt: ast.Gt(), ast.LtE: ast.GtE(), ast.Gt: ast.Lt(), ast.GtE: ast.LtE()}
+            return self._compare(right, flipped.get(type(op), op), left)
+        coded = lname is not None and is_coded(lname)
+        if isinstance(op, (ast.In, ast.NotIn)):
+            values = [self.code(lname, v) for v in rvalue] if coded else rvalue
+            out = np.isin(lvalue, values)
+            return ~out if isinstance(op, ast.NotIn) else out
+        if type(op) not in COMPARE:
+            raise ValueError(f"unsupported comparison {type(op).__name__}")
+        if coded:
+            if rname is not None or type(op) not in (ast.Eq, ast.NotEq):
+                raise ValueError(f"{lname} holds text, compare it with == or != to a value")
+            rvalue = self.code(lname, rvalue)
+        return COMPARE[type(op)](lvalue, rvalue)
+    def _evaluate(self, node):
+        if isinstance(node, ast.BoolOp):
+            parts = [np.asarray(self._evaluate(v), dtype = bool) for v in node.values]
+            return (np.logical_and if isinstance(node.op, ast.And) else np.logical_or).reduce(parts)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~np.asarray(self._evaluate(node.operand), dtype = bool)
+        if isinstance(node, ast.Compare):
+            terms = [self._operand(node.left)] + [self._operand(c) for c in node.comparators]
+            out = True
+            for left, op, right in zip(terms, node.ops, terms[1:]):
+                out = out & self._compare(left, op, right)
+            return out
+        name, value = self._operand(node)
+        if name is None or column_dtype(name) != np.dtype("?"):
+            raise ValueError(f"{ast.unparse(node)} is not a condition")
+        return value
+    def paths(self, rows):
+        '''
+        Returns the case files of rows
+        '''
+        self.flush()
+        rows = np.asarray(rows, dtype = np.int64)
+        if rows.size == 0:
+            return []
+        ends = np.memmap(self._path("paths.end"), dtype = "<u8", mode = "r", shape = (self.rows,))
+        starts = np.where(rows > 0, ends[np.maximum(rows - 1, 0)], 0)
+        out = []
+        with open(self._path("paths.txt"), "rb") as f:
+            for start, end in zip(starts.tolist(), ends[rows].tolist()):
+                f.seek(start)
+                out.append(os.path.join(self.root, f.read(end - start - 1).decode()))
+        return out
+    def params(self, row):
+        '''
+        Returns the InputParams stored in row
+        '''
+        return InputParams.from_dict({name: self.values(name, [row])[0] for name in self.names})
+    def nbytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+    def __repr__(self):
+        varying = len(self.names) - len(self.const)
+        return f"CaseTable({len(self)} cases, {varying} varying columns, {self.nbytes() / 2 ** 20:.1f} MiB)"
+
+def table_path(out_dir):
+    return os.path.join(out_dir, TABLE_NAME)
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Query the case table of a FUNWAVE-TVD sweep")
+    parser.add_argument("sweep", help = "sweep directory (or the table directory itself)")
+    parser.add_argument("query", nargs = "?", help = 'e.g. "Tperiod > 10 and CFL == 0.3"')
+    parser.add_argument("--build", action = "store_true",
+                        help = "rebuild the table from the input files under the sweep directory")
+    parser.add_argument("--pattern", default = "input.txt", help = "input file name inside directories")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--show", help = "comma separated keys printed next to every path")
+    parser.add_argument("--count", action = "store_true", help = "only print the number of matches")
+    args = parser.parse_args(argv)
+    directory = args.sweep if os.path.exists(os.path.join(args.sweep, SCHEMA_NAME)) else table_path(args.sweep)
+    if args.build:
+        start = time.perf_counter()
+        with CaseTable(directory, reset = True) as table:
+            for path, p, warnings in load_dir(args.sweep, args.pattern, args.workers):
+                table.append(path, p)
+        print(f"Built {table} in {time.perf_counter() - start:.2f} s", file = sys.stderr)
+        if not args.query:
+            return 0
+    elif not os.path.exists(os.path.join(directory, SCHEMA_NAME)):
+        parser.error(f"no case table in {args.sweep}, pass --build or sweep with --table")
+    table = CaseTable(directory)
+    if not args.query:
+        print(table)
+        return 0
+    start = time.perf_counter()
+    try:
+        rows = table.where(args.query)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    if args.count:
+        print(len(rows))
+    else:
+        keys = [k.strip() for k in args.show.split(",")] if args.show else []
+        shown = [table.values(k, rows) for k in keys]
+        for n, path in enumerate(table.paths(rows)):
+            print(" ".join([path] + [f"{k}={v[n]}" for k, v in zip(keys, shown)]))
+    print(f"{len(rows)} of {table.rows} cases match ({elapsed * 1e3:.1f} ms)", file = sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+import argparse             # command line interface
+import math
+import os                   # help with PATH
+import sys
+import time
+
+import numpy as np          # wavelength over the depth field
+
+from bathymetry import depth_blocks, profile_from_params
+from checkpoint import BANDWIDTH, NODE_MTBF_HOURS, plan_checkpoints
+from decomposition import best_decomposition, CostModel, valid
+from dispersion import KH_MAX, wave_period, wavelength
+from estimate import estimate_run
+from grid import ScanCancelled, scan_grid
+import instrument           # opt-in check timing
+from output_volume import VALUE_BYTES, human_bytes, predict_output
+from reader import load_params
+
+### validation.py project structure:
+# Widget-free checks of an InputParams, used by the GUI's validate()
+# check_decomposition(), PX/PY against the best split of the same ranks
+# grid_files(), the grid files an input.txt refers to
+# check_grid_files(), scans those files with grid.scan_grid()
+# check_run(), CFL-limited dt, wall time and core-hours (estimate.py)
+# check_output(), RESULT_FOLDER size and bandwidth against Quotas (output_volume.py)
+# check_hotstart(), HOTSTART_INTV against the Young/Daly optimum (checkpoint.py)
+# check_wavelength()/check_resolution(), finite depth wavelength at the
+#   wavemaker and over the depth field against DX/DY (dispersion.py)
+# Check/Validator, every check with the InputParams fields it reads, so
+#   only checks whose inputs changed run again (live validation in the GUI)
+# Command line interface, see `python validation.py -h`
+
+# warn when PX x PY is predicted this much slower than the best split
+SLOW_SPLIT = 1.1
+# warn when HOTSTART_INTV expects this many times the overhead of the optimum
+SLOW_CHECKPOINT = 1.25
+# warn without hot start when failures are expected to cost this fraction of the run
+FAILURE_LOSS = 0.05
+# grid points per wavelength needed to resolve a wave
+MIN_POINTS = 10
+# warn when more than this fraction of the wet cells resolves the wave with fewer points
+UNDER_RESOLVED = 0.1
+
+_scans = {}         # (path, size, mtime, mglob, min_depth) -> GridReport
+
+###############################
+### Parallel Checks
+def check_decomposition(p, cores_per_node = None, model = None):
+    '''
+    This function returns warnings for a PX x PY split of InputParams p
+    that is invalid or predicted to be SLOW_SPLIT times slower than the
+    best split of the same number of ranks (see decomposition.py)
+    '''
+    if p.mglob <= 0 or p.nglob <= 0 or p.px <= 0 or p.py <= 0:
+        return []
+    model = model or CostModel()
+    if not valid(p.mglob, p.nglob, p.px, p.py, model.ghost):
+        return [f"PX = {p.px}, PY = {p.py} leaves subdomains narrower than the ghost cells"]
+    best = best_decomposition(p.mglob, p.nglob, p.px * p.py, cores_per_node, model)
+    current = sum(model.step_time(p.mglob, p.nglob, p.px, p.py, cores_per_node))
+    if best is not None and current > SLOW_SPLIT * best.seconds:
+        return [f"PX = {p.px}, PY = {p.py} is predicted {current / best.seconds - 1:.0%} slower "
+                f"than PX = {best.px}, PY = {best.py}"]
+    return []
+
+###############################
+### Grid Files
+def grid_files(p):
+    '''
+    This function returns (name, path, min_depth) for every grid file
+    InputParams p refers to. min_depth is p.min_depth for the depth file,
+    where cells shallower than MinDepth are reported, and None otherwise.
+    '''
+    out = []
+    if not ("FLAT" in p.depth_type or "SLOPE" in p.depth_type) and p.depth_file != "":
+        out.append(("Depth", p.depth_file, p.min_depth))
+    if p.friction_matrix and p.friction_file != "":
+        out.append(("Friction", p.friction_file, None))
+    if p.init:
+        for name, path in (("Eta", p.eta_file), ("U", p.u_file), ("V", p.v_file)):
+            if path != "":
+                out.append((name, path, None))
+        if p.init_mask and p.mask_file != "":
+            out.append(("Mask", p.mask_file, None))
+    return out
+
+def check_grid_files(p, root = ".", progress = None, cancel = None):
+    '''
+    This function scans every grid file of InputParams p, relative paths
+    are taken from root (the folder FUNWAVE runs in). Returns a list of
+    warnings and a list of notes (the value range of each file).
+    progress(name, fraction) is called while scanning, cancel is passed
+    on to scan_grid().
+    '''
+    warnings = []
+    notes = []
+    for name, path, min_depth in grid_files(p):
+        full = path if os.path.isabs(path) else os.path.join(root, path)
+        if not os.path.isfile(full):
+            warnings.append(f"{name} file {path} does not exist")
+            continue
+        step = None if progress is None else (lambda fraction, name = name: progress(name, fraction))
+        report = scan_file(full, p.mglob, min_depth, progress = step, cancel = cancel)
+        warnings.extend(report.problems(p.mglob, p.nglob, name))
+        notes.append(report.summary(name))
+    return warnings, notes
+
+def scan_file(path, mglob = None, min_depth = None, progress = None, cancel = None):
+    '''
+    Same as grid.scan_grid(), the report is kept until the file changes
+    (size or modification time) so validating again does not rescan it
+    '''
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, mglob, min_depth)
+    report = _scans.get(key)
+    if report is None:
+        report = _scans[key] = scan_grid(path, mglob, min_depth, progress = progress, cancel = cancel)
+    return report
+
+def depth_range(p, root = ".", progress = None, cancel = None):
+    '''
+    This function returns the (min, max) depth of InputParams p, from
+    the depth file for DEPTH_TYPE = DATA. Returns None if the depth
+    file is missing or has no finite values.
+    '''
+    if "FLAT" in p.depth_type:
+        return p.depth_flat, p.depth_flat
+    if "SLOPE" in p.depth_type:
+        length = max(0.0, (p.mglob - 1) * p.dx - p.xslope)
+        return p.depth_flat - p.slope * length, p.depth_flat
+    path = p.depth_file if os.path.isabs(p.depth_file) else os.path.join(root, p.depth_file)
+    if p.depth_file == "" or not os.path.isfile(path):
+        return None
+    step = None if progress is None else (lambda fraction: progress("Depth", fraction))
+    report = scan_file(path, p.mglob, p.min_depth, progress = step, cancel = cancel)
+    return None if report.min is None else (report.min, report.max)
+
+###############################
+### Run Cost
+def run_estimate(p, root = ".", model = None, cores_per_node = None, progress = None, cancel = None):
+    '''
+    This function returns estimate.estimate_run() for InputParams p with
+    the deepest point of its bathymetry, or None if that is unknown
+    '''
+    limits = depth_range(p, root, progress, cancel)
+    if limits is None:
+        return None
+    return estimate_run(p, limits[1], model, cores_per_node)
+
+def check_run(p, root = ".", budget = None, model = None, cores_per_node = None,
+              progress = None, cancel = None):
+    '''
+    This function estimates the CFL-limited time step and the cost of
+    InputParams p (see estimate.py). Returns a list of warnings and a
+    list of notes, a run over budget core-hours is a warning.
+    '''
+    run = run_estimate(p, root, model, cores_per_node, progress, cancel)
+    if run is None:
+        return [], []
+    warnings = []
+    notes = [f"CFL-limited dt = {run.dt_cfl:.4g} s (max celerity {run.cmax:.2f} m/s)",
+             f"{run.steps} steps, {run.seconds / 3600.0:.2f} h wall, {run.core_hours:.1f} core-hours "
+             f"on {max(1, p.px) * max(1, p.py)} ranks"]
+    if p.fixed_dt and p.dt > run.dt_cfl:
+        warnings.append(f"Fixed dt = {p.dt:g} s exceeds the CFL-limited dt = {run.dt_cfl:.4g} s")
+    if budget and run.core_hours > budget:
+        warnings.append(f"Run needs {run.core_hours:.1f} core-hours, budget is {budget:g}")
+    return warnings, notes
+
+###############################
+### Output Volume
+class Quotas:
+    '''Quotas Class.
+    Limits of the filesystem holding RESULT_FOLDER, None means no limit
+
+    Args:
+        bytes: space available
+        files: number of files (inodes) available
+        bandwidth: sustained write rate available (bytes/s)
+    '''
+    def __init__(self, bytes = None, files = None, bandwidth = None) -> None:
+        self.bytes = bytes
+        self.files = files
+        self.bandwidth = bandwidth
+    def __eq__(self, other):
+        return isinstance(other, Quotas) and vars(self) == vars(other)
+    def __hash__(self):
+        return hash((self.bytes, self.files, self.bandwidth))
+
+def check_output(p, quotas = None, seconds = None):
+    '''
+    This function predicts what InputParams p writes to RESULT_FOLDER in
+    every output mode (see output_volume.py) and returns a list of
+    warnings and a list of notes. seconds is the predicted wall time,
+    without it the bandwidth is not checked.
+    '''
+    quotas = quotas or Quotas()
+    warnings = []
+    notes = []
+    if not p.outputs:
+        return warnings, notes
+    for mode in VALUE_BYTES:
+        volume = predict_output(p, mode, seconds)
+        notes.append(f"Output {volume}")
+        if quotas.bytes and volume.bytes > quotas.bytes:
+            warnings.append(f"{mode} output of {human_bytes(volume.bytes)} exceeds the "
+                            f"{human_bytes(quotas.bytes)} quota")
+        if quotas.files and volume.files > quotas.files:
+            warnings.append(f"{mode} output of {volume.files} files exceeds the {quotas.files} file quota")
+        if quotas.bandwidth and volume.bandwidth and volume.bandwidth > quotas.bandwidth:
+            warnings.append(f"{mode} output needs {human_bytes(volume.bandwidth)}/s, "
+                            f"filesystem sustains {human_bytes(quotas.bandwidth)}/s")
+    return warnings, notes
+
+###############################
+### Hot Start
+def check_hotstart(p, root = ".", model = None, cores_per_node = None, node_mtbf_hours = None,
+                   bandwidth = None, progress = None, cancel = None):
+    '''
+    This function plans the hot start checkpoints of InputParams p (see
+    checkpoint.py) and returns a list of warnings and a list of notes. A
+    HOTSTART_INTV well off the optimum, or a long run without hot start,
+    is a warning.
+    '''
+    run = run_estimate(p, root, model, cores_per_node, progress, cancel)
+    plan = plan_checkpoints(p, run.seconds if run else None, cores_per_node,
+                            node_mtbf_hours or NODE_MTBF_HOURS, bandwidth or BANDWIDTH)
+    if plan is None:
+        return [], []
+    warnings = []
+    if plan.interval >= plan.wall:
+        notes = [f"Hot start not needed, failures cost {plan.none:.2%} expected overhead"]
+    else:
+        notes = [f"Hot start {plan}"]
+    if plan.current is not None and plan.current > SLOW_CHECKPOINT * plan.overhead + 1e-4:
+        warnings.append(f"HOTSTART_INTV = {p.hotstart_intv:g} s expects {plan.current:.1%} overhead, "
+                        f"{plan.hotstart_intv:.4g} s would expect {plan.overhead:.1%}")
+    if not p.hot_start and plan.none > FAILURE_LOSS:
+        warnings.append(f"Without hot start node failures are expected to cost {plan.none:.0%} of the run, "
+                        f"HOTSTART_INTV = {plan.hotstart_intv:.4g} s would cut that to {plan.overhead:.1%}")
+    return warnings, notes
+
+###############################
+### Quick Checks
+def check_dimensions(p):
+    if p.mglob == 0 or p.nglob == 0 or p.dx == 0 or p.dy == 0:
+        return ["Global dimensions evaluate to 0"], []
+    return [], []
+
+def check_wavemaker_bounds(p):
+    warnings = []
+    if p.wavemaker == 'WK_REG':
+        if p.xc_wk > p.mglob * p.dx:
+            warnings.append("Out of Bounds x coordinate for wave maker")
+        if p.yc_wk > p.nglob * p.dy:
+            warnings.append("Out of Bounds y coordinate for wave maker")
+        if p.ywidth_wk > p.nglob * p.dy:
+            warnings.append("Invalid wave maker y width")
+    return warnings, []
+
+def wavemaker_depth(p):
+    '''
+    This function returns the depth at the wavemaker of InputParams p,
+    DEP_WK if given, else the FLAT/SLOPE depth at Xc_WK, else None
+    '''
+    if p.dep_wk > 0:
+        return p.dep_wk
+    if "FLAT" in p.depth_type or "SLOPE" in p.depth_type:
+        return float(profile_from_params(p)(p.xc_wk, 0.0))
+    return None
+
+def check_wavelength(p):
+    '''
+    This function checks the finite depth wavelength of the wavemaker of
+    InputParams p: kh within FUNWAVE's dispersion, enough grid points per
+    wavelength and DEP_WK matching the FLAT/SLOPE depth at Xc_WK
+    '''
+    period = wave_period(p)
+    depth = wavemaker_depth(p)
+    if period is None or depth is None:
+        return [], []
+    warnings = []
+    if depth <= p.min_depth:
+        return [f"Wave maker at Xc_WK = {p.xc_wk:g} m sits on dry cells (depth {depth:.3g} m)"], []
+    length = float(wavelength(period, depth))
+    kh = 2 * math.pi * depth / length
+    points = length / max(p.dx, p.dy) if max(p.dx, p.dy) > 0 else math.inf
+    notes = [f"Wave maker wavelength {length:.4g} m at h = {depth:.4g} m (kh = {kh:.2f}, "
+             f"{points:.0f} points per wavelength)"]
+    if kh > KH_MAX:
+        warnings.append(f"Wave maker depth {depth:.4g} m exceeds half the wavelength (kh = {kh:.2f} > pi), "
+                        "outside FUNWAVE's dispersion")
+    if points < MIN_POINTS:
+        warnings.append(f"Wave maker wavelength {length:.4g} m spans only {points:.1f} grid points, "
+                        f"at least {MIN_POINTS} are needed")
+    if p.dep_wk > 0 and ("FLAT" in p.depth_type or "SLOPE" in p.depth_type):
+        local = float(profile_from_params(p)(p.xc_wk, 0.0))
+        if abs(local - p.dep_wk) > 0.1 * max(local, p.dep_wk):
+            warnings.append(f"DEP_WK = {p.dep_wk:g} m differs from the depth {local:.4g} m at Xc_WK")
+    return warnings, notes
+
+def check_resolution(p, root = ".", cancel = None):
+    '''
+    This function solves the wavelength of the wavemaker period over every
+    wet cell of InputParams p (depth streamed a row block at a time) and
+    warns when too many cells resolve it with fewer than MIN_POINTS points.
+    A missing DEPTH_FILE is left to check_grid_files()
+    '''
+    period = wave_period(p)
+    if period is None or p.mglob <= 0 or p.nglob <= 0 or max(p.dx, p.dy) <= 0:
+        return [], []
+    if not ("FLAT" in p.depth_type or "SLOPE" in p.depth_type):
+        path = p.depth_file if os.path.isabs(p.depth_file) else os.path.join(root, p.depth_file)
+        if not os.path.isfile(path):
+            return [], []
+    wet = coarse = deep = 0
+    shortest = math.inf
+    try:
+        for j0, depth in depth_blocks(p, root):
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(p.depth_file)
+            h = depth[depth > p.min_depth]
+            if h.size == 0:
+                continue
+            length = wavelength(period, h)
+            wet += h.size
+            coarse += int(np.count_nonzero(length < MIN_POINTS * max(p.dx, p.dy)))
+            deep += int(np.count_nonzero(2 * h > length))
+            shortest = min(shortest, float(length.min()))
+    except ValueError as e:     # ragged or unreadable DEPTH_FILE
+        return [f"Grid file scan failed: {e}"], []
+    if wet == 0:
+        return [], []
+    warnings = []
+    notes = [f"Shortest wavelength {shortest:.4g} m, {coarse / wet:.1%} of wet cells under "
+             f"{MIN_POINTS} points per wavelength, {deep / wet:.1%} deeper than half a wavelength"]
+    if coarse > UNDER_RESOLVED * wet:
+        warnings.append(f"{coarse / wet:.0%} of wet cells resolve the {period:.3g} s wave with fewer "
+                        f"than {MIN_POINTS} points, refine DX/DY")
+    return warnings, notes
+
+def check_file_names(p):
+    warnings = []
+    if p.depth_type == "DATA" and p.depth_file == "":
+        warnings.append("Depth data file not specified")
+    if p.friction_matrix and p.friction_file == "":
+        warnings.append("Friction matrix file not specified")
+    return warnings, []
+
+###############################
+#### Incremental Validation
+class Check:
+    '''Check Class.
+    One validation check and the inputs it depends on
+
+    Args:
+        name: label of the check
+        func: func(p, settings) returns (warnings, notes) for InputParams p
+        fields: InputParams field names func reads
+        settings: keys of the settings dict func reads (root, budget, ...)
+        expensive: True for checks that read files, the GUI runs them off
+                   the Tk thread
+    '''
+    def __init__(self, name, func, fields, settings = (), expensive = False) -> None:
+        self.name = name
+        self.func = func
+        self.fields = tuple(fields)
+        self.settings = tuple(settings)
+        self.expensive = expensive
+    def key(self, p, settings):
+        '''
+        Everything the result depends on, including the size and time of
+        the files it reads, the result is reused while the key is equal
+        '''
+        key = tuple(getattr(p, f) for f in self.fields) + tuple(settings.get(s) for s in self.settings)
+        if self.expensive:
+            key += file_stamps(p, settings.get("root", "."))
+        return key
+    def run(self, p, settings):
+        with instrument.span(self.name, "check"):
+            return self.func(p, settings)
+
+def file_stamps(p, root = "."):
+    '''
+    This function returns (path, size, mtime) of every grid file of
+    InputParams p, so a check reading them runs again once they change
+    '''
+    out = []
+    for name, path, min_depth in grid_files(p):
+        full = path if os.path.isabs(path) else os.path.join(root, path)
+        try:
+            stat = os.stat(full)
+            out.append((full, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            out.append((full, None, None))
+    return tuple(out)
+
+_DEPTH_FIELDS = ("depth_type", "depth_flat", "slope", "xslope", "depth_file", "min_depth")
+_RUN_FIELDS = _DEPTH_FIELDS + ("mglob", "nglob", "dx", "dy", "px", "py", "cfl", "fixed_dt", "dt",
+                               "total_time", "wavemaker", "amp_wk")
+
+def _check_hotstart(p, settings):
+    return check_hotstart(p, settings.get("root", "."), node_mtbf_hours = settings.get("mtbf"),
+                          bandwidth = settings.get("checkpoint_bandwidth"))
+
+def _check_output(p, settings):
+    run = run_estimate(p, settings.get("root", "."))
+    return check_output(p, settings.get("quotas"), run.seconds if run else None)
+
+# every check of the GUI's validation panel, in display order
+CHECKS = (
+    Check("dimensions", lambda p, s: check_dimensions(p), ("mglob", "nglob", "dx", "dy")),
+    Check("decomposition", lambda p, s: (check_decomposition(p), []), ("mglob", "nglob", "px", "py")),
+    Check("wavemaker bounds", lambda p, s: check_wavemaker_bounds(p),
+          ("wavemaker", "xc_wk", "yc_wk", "ywidth_wk", "mglob", "nglob", "dx", "dy")),
+    Check("wavelength", lambda p, s: check_wavelength(p),
+          ("wavemaker", "tperiod", "freqpeak", "peak_period", "dep_wk", "xc_wk", "dx", "dy") + _DEPTH_FIELDS),
+    Check("file names", lambda p, s: check_file_names(p),
+          ("depth_type", "depth_file", "friction_matrix", "friction_file")),
+    Check("grid files", lambda p, s: check_grid_files(p, s.get("root", "."), s.get("progress"), s.get("cancel")),
+          ("depth_type", "depth_file", "friction_matrix", "friction_file", "init", "eta_file", "u_file",
+           "v_file", "init_mask", "mask_file", "mglob", "nglob", "min_depth"), ("root",), expensive = True),
+    Check("run cost", lambda p, s: check_run(p, s.get("root", "."), s.get("budget")),
+          _RUN_FIELDS, ("root", "budget"), expensive = True),
+    Check("resolution", lambda p, s: check_resolution(p, s.get("root", "."), s.get("cancel")),
+          ("wavemaker", "tperiod", "freqpeak", "peak_period", "mglob", "nglob", "dx", "dy") + _DEPTH_FIELDS,
+          ("root",), expensive = True),
+    Check("hot start", _check_hotstart, _RUN_FIELDS + ("hot_start", "hotstart_intv"),
+          ("root", "mtbf", "checkpoint_bandwidth"), expensive = True),
+    Check("output volume", _check_output,
+          _RUN_FIELDS + ("outputs", "output_res", "plot_intv", "plot_start"), ("root", "quotas"), expensive = True),
+)
+
+class Validator:
+    '''Validator Class.
+    Runs Checks incrementally. Results are kept with the key of their
+    inputs (see Check.key()), so validating again only runs the checks
+    whose fields, settings or files changed.
+
+    Args:
+        checks: Checks to run, default CHECKS
+    Methods:
+        stale(): checks whose kept result does not match p
+        run(): runs the stale checks, returns the results of every check
+        store(): keeps a result computed elsewhere (e.g. a worker thread)
+    '''
+    def __init__(self, checks = CHECKS) -> None:
+        self.checks = checks
+        self.results = {}           # name -> (key, (warnings, notes))
+        self.seconds = {}           # name -> time of the last run
+    def stale(self, p, settings):
+        out = []
+        for check in self.checks:
+            kept = self.results.get(check.name)
+            if kept is None or kept[0] != check.key(p, settings):
+                out.append(check)
+        return out
+    def store(self, check, key, result, seconds = 0.0):
+        self.results[check.name] = (key, result)
+        self.seconds[check.name] = seconds
+    def run(self, p, settings = None, expensive = True):
+        '''
+        Runs the stale checks (only the cheap ones unless expensive) and
+        returns [(check, (warnings, notes) or None)] for every check, None
+        for a stale check that was not run
+        '''
+        settings = settings or {}
+        for check in self.stale(p, settings):
+            if check.expensive and not expensive:
+                continue
+            start = time.perf_counter()
+            result = check.run(p, settings)
+            self.store(check, check.key(p, settings), result, time.perf_counter() - start)
+        out = []
+        for check in self.checks:
+            kept = self.results.get(check.name)
+            fresh = kept is not None and kept[0] == check.key(p, settings)
+            out.append((check, kept[1] if fresh else None))
+        return out
+
+###############################
+### Command Line Interface
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Check FUNWAVE-TVD input files and their grid files")
+    parser.add_argument("paths", nargs = "+", help = "input.txt files")
+    parser.add_argument("--budget", type = float, help = "core-hours allowed per run")
+    parser.add_argument("--cell-cost", type = float, default = CostModel().cell_cost,
+                        help = "seconds per cell per time step, see estimate.calibrate_cell_cost()")
+    parser.add_argument("--cores-per-node", type = int)
+    parser.add_argument("--quota-gb", type = float, help = "space available for RESULT_FOLDER")
+    parser.add_argument("--quota-files", type = int, help = "files available for RESULT_FOLDER")
+    parser.add_argument("--bandwidth-mb", type = float, help = "sustained write rate of the filesystem (MB/s)")
+    parser.add_argument("--node-mtbf-hours", type = float, default = NODE_MTBF_HOURS,
+                        help = "mean time between failures of one node, for the hot start plan")
+    args = parser.parse_args(argv)
+    model = CostModel(cell_cost = args.cell_cost)
+    quotas = Quotas(args.quota_gb and args.quota_gb * 1024 ** 3, args.quota_files,
+                    args.bandwidth_mb and args.bandwidth_mb * 1024 ** 2)
+    failed = 0
+    for path in args.paths:
+        p = load_params(path)
+        root = os.path.dirname(os.path.abspath(path))
+        warnings, notes = check_grid_files(p, root)
+        run_warnings, run_notes = check_run(p, root, args.budget, model, args.cores_per_node)
+        run = run_estimate(p, root, model, args.cores_per_node)
+        out_warnings, out_notes = check_output(p, quotas, run.seconds if run else None)
+        res_warnings, res_notes = check_resolution(p, root)
+        hot_warnings, hot_notes = check_hotstart(p, root, model, args.cores_per_node, args.node_mtbf_hours,
+                                                 quotas.bandwidth)
+        wave_warnings, wave_notes = check_wavelength(p)
+        quick = check_dimensions(p)[0] + check_wavemaker_bounds(p)[0] + wave_warnings + check_file_names(p)[0]
+        warnings = (quick + check_decomposition(p, args.cores_per_node, model) + warnings + run_warnings
+                    + res_warnings + hot_warnings + out_warnings)
+        notes += wave_notes + run_notes + res_notes + hot_notes + out_notes
+        for message in notes:
+            print(f"{path}: {message}")
+        for message in warnings:
+            print(f"{path}: WARNING {message}")
+        failed += bool(warnings)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
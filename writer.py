@@ -0,0 +1,394 @@
+import re
+from operator import attrgetter    # field values of a Template
+
+import instrument           # opt-in section timing
+from jobs import atomic_open    # temporary file and rename
+
+### writer.py project structure:
+# Static comment blocks written to every input.txt
+# Section writers, each returns the lines of one input.txt section
+# render()/write_input(), widget-free replacement of the GUI's generate()
+# update_input(), changes a few keys of an existing input.txt in place
+
+###############################
+#### Static Comment Blocks
+HEADER = ("! INPUT FILE FOR FUNWAVE_TVD\n! NOTE: all input parameter are capital sensitive\n"
+          "! --------------------TITLE-------------------------------------\n! title only for log file\n")
+PARALLEL_HEADER = ("! -------------------PARALLEL INFO-----------------------------\n!    PX,PY - processor numbers in X and Y\n"
+                   "!    NOTE: make sure consistency with mpirun -np n (px*py)\n")
+DEPTH_HEADER = ("! --------------------DEPTH-------------------------------------\n! Depth types, DEPTH_TYPE=DATA: from depth file\n"
+                "!              DEPTH_TYPE=FLAT: idealized flat, need depth_flat\n!              DEPTH_TYPE=SLOPE: idealized slope,\n"
+                "!                                 need slope,SLP starting point, Xslp\n!                                 and depth_flat\n")
+PRINT_HEADER = "! -------------------PRINT---------------------------------\n! PRINT*,\n! result folder\n"
+DIMENSION_HEADER = "! ------------------DIMENSION-----------------------------\n! global grid dimension\n"
+TIME_HEADER = ("! ----------------- TIME----------------------------------\n"
+               "! time: total computational time/ plot time / screen interval\n! all in seconds\n")
+HOTSTART_HEADER = "! -------------------HOT START---------------------------------\n"
+INIT_HEADER = "! ---------------INITIAL CONDITION----------------------------\n"
+PHYSICS_HEADER = ("! ----------------PHYSICS------------------------------\n! parameters to control type of equations\n"
+                  "! dispersion: all dispersive terms\n! gamma1=1.0,gamma2=1.0: defalt: Fully nonlinear equations\n")
+FRICTION_HEADER = "!----------------Friction-----------------------------\n"
+NUMERICS_HEADER = ("! ----------------NUMERICS----------------------------\n! time scheme: runge_kutta for all types of equations\n"
+                   "!              predictor-corrector for NSWE\n! space scheme: second-order\n!               fourth-order\n"
+                   "! construction: HLLC\n! cfl condition: CFL\n! froude number cap: FroudeCap\n")
+WAVEMAKER_HEADER = ("! ----------------WAVEMAKER------------------------------\n!  wave maker\n"
+                    "! LEF_SOL- left boundary solitary, need AMP,DEP, LAGTIME\n! INI_SOL- initial solitary wave, WKN B solution,\n"
+                    "! need AMP, DEP, XWAVEMAKER\n! INI_REC - rectangular hump, need to specify Xc,Yc and WID\n"
+                    "! WK_REG - Wei and Kirby 1999 internal wave maker, Xc_WK,Tperiod\n"
+                    "!          AMP_WK,DEP_WK,Theta_WK, Time_ramp (factor of period)\n"
+                    "! WK_IRR - Wei and Kirby 1999 TMA spectrum wavemaker, Xc_WK,\n"
+                    "!          DEP_WK,Time_ramp, Delta_WK, FreqPeak, FreqMin,FreqMax,\n!          Hmo,GammaTMA,ThetaPeak\n"
+                    "! WK_TIME_SERIES - fft time series to get each wave component\n"
+                    "!                 and then use Wei and Kirby 1999\n"
+                    "!          need input WaveCompFile (including 3 columns: per,amp,pha)\n"
+                    "!          NumWaveComp,PeakPeriod,DEP_WK,Xc_WK,Ywidth_WK\n")
+PERIODIC_HEADER = "! ---------------- PERIODIC BOUNDARY CONDITION ---------\n! South-North periodic boundary condition\n!\n"
+OUTPUT_HEADER = ("! -----------------OUTPUT-----------------------------\n! stations\n"
+                 "! if NumberStations>0, need input i,j in STATION_FILE\n")
+
+def tf(x):
+    '''
+    FUNWAVE logical
+    '''
+    return "T" if x else "F"
+
+###############################
+### Section Writers
+# each takes an InputParams and returns a list of strings, joined by render()
+def title_section(p):
+    return [HEADER, f"TITLE = {p.title}\n\n"]
+
+def parallel_section(p):
+    return [PARALLEL_HEADER, f"PX ={p.px : .0f}\nPY ={p.py : .0f}\n"]
+
+def depth_section(p):
+    out = [DEPTH_HEADER, f"DEPTH_TYPE ={p.depth_type}\n"]
+    if "FLAT" in p.depth_type or "SLOPE" in p.depth_type:
+        out.append(f"DEPTH_FLAT ={p.depth_flat : f}\n")
+        if "SLOPE" in p.depth_type:
+            out.append(f"SLP ={p.slope : f}\nXslp ={p.xslope : f}\n")
+    else:
+        out.append(f"DEPTH_FILE = {p.depth_file}\n")
+    return out
+
+def print_section(p):
+    return [PRINT_HEADER, "RESULT_FOLDER = " + ("./" if p.result_folder == "" else p.result_folder) + "\n"]
+
+def dimension_section(p):
+    return [DIMENSION_HEADER, f"Mglob = {p.mglob}\nNglob = {p.nglob}\n",
+            f"DX = {p.dx :f}\nDY = {p.dy :f}\n"]
+
+def time_section(p):
+    return [TIME_HEADER, f"TOTAL_TIME ={p.total_time : f}\n",
+            f"PLOT_INTV ={p.plot_intv : f}\n",
+            f"PLOT_START ={p.plot_start : f}\n",
+            f"SCREEN_INTV ={p.screen_intv : f}\n"]
+
+def hotstart_section(p):
+    if not p.hot_start:
+        return []
+    return [HOTSTART_HEADER, "HOT_START = T\n",
+            f"FileNumber_HOTSTART = {p.filenum_hotstart}\n",
+            f"HOTSTART_INTV = {p.hotstart_intv :f}\n"]
+
+def init_section(p):
+    if not p.init:
+        return []
+    out = [INIT_HEADER, "INI_UVZ = T\n", f"ETA_FILE = {p.eta_file}\n"]
+    if p.u_file != "":
+        out.append(f"U_FILE = {p.u_file}\n")
+    if p.v_file != "":
+        out.append(f"V_FILE = {p.v_file}\n")
+    if p.init_mask:
+        out.append(f"MASK_FILE = {p.mask_file}\n")
+    return out
+
+def physics_section(p):
+    out = [PHYSICS_HEADER, "DISPERSION = " + tf(p.dispersion) + "\n",
+           f"Gamma1 = {p.gamma1 :f}\n",
+           f"Gamma2 = {p.gamma2 :f}\n",
+           f"Gamma3 = {p.gamma3 :f}\n",
+           f"Beta_ref = {p.beta_ref :f}\n"]
+    if p.viscosity_breaking:
+        out.append("VISCOSITY_BREAKING = T\n")
+        out.append(f"Cbrk1 = {p.cbrk1}\n")
+        out.append(f"Cbrk2 = {p.cbrk2}\n")
+    else:
+        out.append("VISCOSITY_BREAKING = F\n")
+    out.append(f"SWE_ETA_DEP = {p.swe_eta_dep}\n")
+    out.append("ROLLER_EFFECT = " + tf(p.roller_effect) + "\n")
+    return out
+
+def friction_section(p):
+    out = [FRICTION_HEADER, f"Cd_fixed = {p.cd_fixed:f}\n",
+           "FRICTION_MATRIX = " + tf(p.friction_matrix) + "\n"]
+    if p.friction_matrix:
+        out.append(f"FRICTION_FILE = {p.friction_file}\n")
+    out.append("SHOW_BREAKING = " + tf(p.show_breaking) + "\n")
+    out.append(f"WAVEMAKER_cbrk = {p.wavemaker_cbrk:f}\n")
+    return out
+
+def numerics_section(p):
+    return [NUMERICS_HEADER, f"Time_Scheme = {p.time_scheme}\n",
+            f"HIGH_ORDER = {p.high_order}\n",
+            f"CFL = {p.cfl}\n",
+            f"FroudeCap = {p.froude_cap}\n",
+            f"MinDepth = {p.min_depth:f}\n"]
+
+def wavemaker_section(p):
+    out = [WAVEMAKER_HEADER]
+    if p.wavemaker == "":
+        return out
+    out.append(f"WAVEMAKER = {p.wavemaker}\n")
+    match p.wavemaker:
+        case 'WK_REG':
+            out.append(f"DEP_WK = {p.dep_wk:f}\n")
+            out.append(f"Xc_WK = {p.xc_wk:f}\n")
+            out.append(f"Yc_WK = {p.yc_wk:f}\n")
+            out.append(f"Tperiod = {p.tperiod:f}\n")
+            out.append(f"AMP_WK = {p.amp_wk:f}\n")
+            out.append(f"Theta_WK = {p.theta_wk:f}\n")
+            out.append(f"Delta_WK = {p.delta_wk:f}\n")
+        case 'WK_IRR':
+            pass
+        case 'WK_NEW_IRR':
+            pass
+        case 'JON_2D':
+            pass
+        case 'JON_1D':
+            pass
+        case 'TMA_1D':
+            pass
+        case 'WK_TIME_SERIES':
+            out.append(f"WaveCompFile = {p.wave_comp_file}\n")
+            out.append(f"NumWaveComp = {p.num_wave_comp}\n")
+            out.append(f"PeakPeriod = {p.peak_period:f}\n")
+            out.append(f"DEP_WK = {p.dep_wk:f}\n")
+            out.append(f"Xc_WK = {p.xc_wk:f}\n")
+            out.append(f"Ywidth_WK = {p.ywidth_wk:f}\n")
+        case 'WK_DATA2D':
+            out.append(f"WaveCompFile = {p.wave_comp_file}\n")
+            out.append(f"DEP_WK = {p.dep_wk:f}\n")
+            out.append(f"Xc_WK = {p.xc_wk:f}\n")
+            out.append(f"Ywidth_WK = {p.ywidth_wk:f}\n")
+        case 'WK_NEW_DATA_2D':
+            pass
+        case 'LEFT_BC_IRR':
+            pass
+        case 'LEF_SOL':
+            pass
+        case 'INI_SOL':
+            out.append(f"AMP_WK = {p.amp_wk:f}\n")
+            out.append(f"DEP_WK = {p.dep_wk:f}\n")
+            out.append(f"XWAVEMAKER = {p.xwavemaker:f}\n")
+        case 'INI_REC' | 'INI_GAU':
+            out.append(f"AMP_WK = {p.amp_wk:f}\n")
+            out.append(f"Xc_WK = {p.xc_wk:f}\n")
+            out.append(f"Yc_WK = {p.yc_wk:f}\n")
+            out.append(f"WID = {p.wid:f}\n")
+    return out
+
+def periodic_section(p):
+    return [PERIODIC_HEADER, "PERIODIC = " + tf(p.periodic) + "\n"]
+
+def output_section(p):
+    out = [OUTPUT_HEADER, f"NumStations = {p.num_stations}\n"]
+    if p.num_stations > 0:
+        out.append(f"STATION_FILE = {p.station_file}\n")
+    for item in p.outputs:
+        out.append(item + " = T\n")
+    return out
+
+# order in which sections appear in input.txt
+SECTIONS = (title_section, parallel_section, depth_section, print_section,
+            dimension_section, time_section, hotstart_section, init_section,
+            physics_section, friction_section, numerics_section,
+            wavemaker_section, periodic_section, output_section)
+
+###############################
+### Rendering
+def render(p):
+    '''
+    This function returns the full text of input.txt for InputParams p
+    '''
+    out = []
+    if instrument.enabled():
+        for section in SECTIONS:
+            with instrument.span(section.__name__, "writer"):
+                out.extend(section(p))
+        return "".join(out)
+    for section in SECTIONS:
+        out.extend(section(p))
+    return "".join(out)
+
+def write_input(p, path):
+    '''
+    This function writes InputParams p to path with a single write to a
+    temporary file that is then renamed, so path never holds part of a
+    case. Returns path
+    '''
+    text = render(p)
+    with instrument.span("write", "writer"), atomic_open(path) as f:
+        f.write(text)
+    return path
+
+def update_input(path, values):
+    '''
+    This function sets the FUNWAVE keys of values ({key: value}) in the
+    input file at path, changing only the lines of those keys. Comments,
+    unknown keys and the order of the file are kept, keys the file does
+    not set are appended. Returns path
+    '''
+    wanted = {key.upper(): (key, value) for key, value in values.items()}
+    with open(path) as f:
+        lines = f.readlines()
+    for n, line in enumerate(lines):
+        text, bang, comment = line.partition("!")
+        key, sep, _ = text.partition("=")
+        entry = wanted.pop(key.strip().upper(), None) if sep else None
+        if entry is not None:
+            tail = " " + bang + comment.rstrip("\n") if bang else ""
+            lines[n] = f"{key.rstrip()} = {entry[1]}{tail}\n"
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    lines += [f"{key} = {value}\n" for key, value in wanted.values()]
+    with atomic_open(path) as f:
+        f.write("".join(lines))
+    return path
+
+###############################
+### Templates
+# Rendering every section again for each case of a large sweep repeats the
+# same branching and string building. A Template is the rendered text of
+# one shape of input.txt cut into literal chunks and value slots. A case
+# only formats the values that are not the very objects of the case
+# rendered before (cases of a sweep share every value they do not vary,
+# see InputParams.replace()) and joins the chunks once.
+_MARK = "\x00"
+
+class _Slot:
+    '''
+    Stand-in for a field value while compiling a Template. Formatting a
+    _Slot produces a marked placeholder, while comparisons and truth tests
+    use the real value so the section writers take the same branches.
+    '''
+    __hash__ = None
+    def __init__(self, name, value) -> None:
+        self.name = name
+        self.value = value
+    def __format__(self, spec):
+        return f"{_MARK}{self.name}:{spec}{_MARK}" if spec else f"{_MARK}{self.name}{_MARK}"
+    def __str__(self):
+        return format(self, "")
+    def __add__(self, other):
+        return str(self) + other
+    def __radd__(self, other):
+        return other + str(self)
+    def __bool__(self):
+        return bool(self.value)
+    def __eq__(self, other):
+        return self.value == other
+    def __ne__(self, other):
+        return self.value != other
+    def __gt__(self, other):
+        return self.value > other
+    def __lt__(self, other):
+        return self.value < other
+    def __contains__(self, x):
+        return x in self.value
+
+class _Probe:
+    def __init__(self, p) -> None:
+        self._p = p
+    def __getattr__(self, name):
+        value = getattr(self._p, name)
+        if isinstance(value, tuple):    # iterated, e.g. outputs
+            return value
+        return _Slot(name, value)
+
+def shape(p):
+    '''
+    This function returns every value that selects a branch in the section
+    writers, two InputParams with the same shape share a Template.
+    Keep in sync with the if/match statements above.
+    '''
+    return (p.depth_type, p.result_folder == "", p.hot_start, p.init,
+            p.u_file != "", p.v_file != "", p.init_mask, p.dispersion,
+            p.viscosity_breaking, p.roller_effect, p.friction_matrix,
+            p.show_breaking, p.wavemaker, p.periodic, p.num_stations > 0,
+            p.outputs)
+
+def _formatter(spec):
+    '''
+    Returns a function formatting one value like format(value, spec),
+    printf style where spec allows it since that is quicker
+    '''
+    if spec == "":
+        return str
+    if re.fullmatch(r"[ +-]?\d*(\.\d+)?[fFeEgG]", spec):
+        return ("%" + spec).__mod__
+    return lambda value: format(value, spec)
+
+class Template:
+    '''Template Class.
+    Compiled input.txt for one shape (see shape()), built by running the
+    section writers once on a probe of p.
+
+    Args:
+        p: InputParams, any case of the shape to compile
+    Attributes:
+        chunks: literal text with None in place of every value
+        slots: (index in chunks, formatter) of every value
+    Methods:
+        render(): returns input.txt text for an InputParams of the same shape
+    '''
+    def __init__(self, p) -> None:
+        text = "".join(s for section in SECTIONS for s in section(_Probe(p)))
+        parts = text.split(_MARK)
+        # even parts are literal text, odd parts are name[:spec] fields
+        self.chunks = []
+        self.slots = []
+        names = []
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                self.chunks.append(part)
+                continue
+            name, _, spec = part.partition(":")
+            names.append(name)
+            self.slots.append((len(self.chunks), _formatter(spec)))
+            self.chunks.append(None)
+        self.shape = shape(p)
+        getter = attrgetter(*names) if names else (lambda q: ())
+        self.values = (lambda q: (getter(q),)) if len(names) == 1 else getter
+        self.last = ((object(),) * len(names), self.chunks)    # (values, chunks) of the last case
+    def render(self, p):
+        values = self.values(p)
+        last_values, out = self.last
+        out = out.copy()
+        for (i, fmt), value, last in zip(self.slots, values, last_values):
+            if value is not last:
+                out[i] = fmt(value)
+        self.last = (values, out)       # one assignment, safe to share between threads
+        return "".join(out)
+
+_templates = {}     # per process cache, shape -> Template
+
+def render_cached(p):
+    '''
+    Same output as render(p), reusing the Template of p's shape
+    '''
+    key = shape(p)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = Template(p)
+    return template.render(p)
+
+def write_input_cached(p, path):
+    '''
+    Same as write_input(), reusing the Template of p's shape
+    '''
+    with instrument.span("render_cached", "writer"):
+        text = render_cached(p)
+    with instrument.span("write", "writer"), atomic_open(path) as f:
+        f.write(text)
+    return path